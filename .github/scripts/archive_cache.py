@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+整合包压缩包的本地缓存，供 update_checker.py 与 compare_archives.py 共用。
+
+每个版本（整合包 ID + 版本 ID）只需通过 CurseTheBeast 下载一次：
+    objects/<sha256>.zip   按内容寻址保存的压缩包，内容相同的版本共用同一个文件
+    index.json             {"<整合包ID>/<版本ID>": {"sha256", "size", "last_used"}}
+缓存总大小超过上限时，按最近使用时间（LRU）淘汰最久未使用的压缩包。
+
+可通过环境变量调整（均为可选）：
+    ARCHIVE_CACHE_DIR        缓存目录（默认 .cache/modpack_archives）
+    ARCHIVE_CACHE_MAX_BYTES  缓存大小上限（默认 4 GiB，0 表示不限制）
+    CURSE_THE_BEAST          CurseTheBeast 可执行文件路径（默认 ./CurseTheBeast）
+
+用法:
+    python archive_cache.py fetch <整合包ID> <版本ID> [-o 输出路径]
+    python archive_cache.py list
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 共用模块位于 .github/workflows
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "workflows"))
+import pipeline_profiler as profiler
+
+DEFAULT_CACHE_DIR = ".cache/modpack_archives"
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+INDEX_FILE = "index.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def download_with_cursethebeast(pack_id, version_id, dest):
+    """通过 CurseTheBeast 下载指定版本的整合包到 dest，失败时抛出 RuntimeError。"""
+    executable = os.environ.get("CURSE_THE_BEAST", "./CurseTheBeast")
+    command = [executable, 'download', str(pack_id), str(version_id), '--output', str(dest)]
+    print(f"Executing: {' '.join(command)}")
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"下载整合包 {pack_id} 的版本 {version_id} 失败: {result.stderr}")
+
+
+class ArchiveCache:
+    """按内容寻址、LRU 淘汰的整合包压缩包缓存。"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / INDEX_FILE
+        self.max_bytes = max_bytes
+        self.index = self._load_index()
+
+    @classmethod
+    def from_env(cls):
+        max_bytes = os.environ.get("ARCHIVE_CACHE_MAX_BYTES", "").strip()
+        return cls(os.environ.get("ARCHIVE_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                   int(max_bytes) if max_bytes else DEFAULT_MAX_BYTES)
+
+    # --- 索引 ---
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".index.", suffix=".tmp", dir=self.root)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self.index}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _key(pack_id, version_id) -> str:
+        return f"{pack_id}/{version_id}"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / f"{digest}.zip"
+
+    # --- 读取与写入 ---
+    def get(self, pack_id, version_id):
+        """返回已缓存的压缩包路径并更新其使用时间；未缓存或文件已损坏时返回 None。"""
+        key = self._key(pack_id, version_id)
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        path = self._object_path(entry['sha256'])
+        if not path.is_file() or path.stat().st_size != entry['size']:
+            print(f"缓存中的 {key} 已丢失或损坏，将重新下载。")
+            del self.index[key]
+            if path.is_file():
+                os.remove(path)
+            self._save_index()
+            return None
+        entry['last_used'] = time.time()
+        self._save_index()
+        return path
+
+    def put(self, pack_id, version_id, source_path) -> Path:
+        """将下载好的压缩包移入缓存（内容相同的压缩包只保存一份），返回缓存中的路径。"""
+        digest = file_sha256(source_path)
+        size = os.path.getsize(source_path)
+        path = self._object_path(digest)
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        if path.is_file() and path.stat().st_size == size:
+            os.remove(source_path)
+        else:
+            os.replace(source_path, path)
+        self.index[self._key(pack_id, version_id)] = {'sha256': digest, 'size': size, 'last_used': time.time()}
+        self.evict(keep=digest)
+        self._save_index()
+        return path
+
+    def fetch(self, pack_id, version_id, download=download_with_cursethebeast) -> Path:
+        """
+        返回指定版本的压缩包路径：已缓存时直接复用，否则调用 download(pack_id, version_id, 临时路径) 下载后加入缓存。
+        """
+        path = self.get(pack_id, version_id)
+        if path is not None:
+            print(f"使用缓存的整合包 {pack_id} 版本 {version_id}: {path}")
+            profiler.count("archive_cache_hits")
+            return path
+
+        profiler.count("archive_cache_misses")
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        # 临时文件与缓存位于同一目录，下载完成后可直接重命名
+        fd, tmp_path = tempfile.mkstemp(prefix=".download.", suffix=".zip", dir=self.objects_dir)
+        os.close(fd)
+        os.remove(tmp_path)
+        try:
+            with profiler.stage("download"):
+                download(pack_id, version_id, tmp_path)
+            profiler.count("download_bytes", os.path.getsize(tmp_path))
+            return self.put(pack_id, version_id, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # --- 淘汰 ---
+    def total_size(self) -> int:
+        return sum({entry['sha256']: entry['size'] for entry in self.index.values()}.values())
+
+    def evict(self, keep: str = None):
+        """按最近使用时间淘汰压缩包，直到总大小不超过上限。keep 为不淘汰的压缩包（刚加入的）摘要。"""
+        if not self.max_bytes:
+            return
+        # 同一压缩包可能对应多个版本，以其中最近的使用时间为准
+        last_used = {}
+        for entry in self.index.values():
+            last_used[entry['sha256']] = max(last_used.get(entry['sha256'], 0), entry['last_used'])
+        total = self.total_size()
+        for digest in sorted(last_used, key=last_used.get):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            keys = [key for key, entry in self.index.items() if entry['sha256'] == digest]
+            total -= self.index[keys[0]]['size']
+            for key in keys:
+                del self.index[key]
+            # 连同 compare_archives.py 写在压缩包旁的清单等 sidecar 文件一起删除
+            for path in self.objects_dir.glob(f"{digest}.*"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            print(f"缓存超过上限，已淘汰: {', '.join(keys)}")
+            profiler.count("archive_cache_evictions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="整合包压缩包本地缓存。")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    parser_fetch = subparsers.add_parser('fetch', help='获取指定版本的压缩包（未缓存时下载）。')
+    parser_fetch.add_argument('pack_id', help='整合包 ID')
+    parser_fetch.add_argument('version_id', help='版本 ID')
+    parser_fetch.add_argument('-o', '--output', help='将压缩包复制到该路径；未指定时只输出缓存中的路径')
+    subparsers.add_parser('list', help='列出缓存中的所有版本。')
+    profiler.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure("archive_cache", args)
+
+    cache = ArchiveCache.from_env()
+    if args.command == 'fetch':
+        path = cache.fetch(args.pack_id, args.version_id)
+        if args.output:
+            shutil.copyfile(path, args.output)
+            path = args.output
+        print(path)
+    elif args.command == 'list':
+        for key, entry in sorted(cache.index.items(), key=lambda item: item[1]['last_used'], reverse=True):
+            print(f"{key}\t{entry['size']}\t{entry['sha256']}")
+        print(f"共 {len(cache.index)} 个版本，{cache.total_size()} 字节（上限 {cache.max_bytes or '不限'}）")
+
+
+if __name__ == "__main__":
+    main()
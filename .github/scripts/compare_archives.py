@@ -2,17 +2,45 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import bisect
+import codecs
 import difflib
 import hashlib
+import io
+import json
 import os
 import pathlib
-import shutil
+import posixpath
+import sys
 import tarfile
 import tempfile
 import zipfile
+import zlib
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from html import escape
 
+# 共用模块位于 .github/workflows
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "workflows"))
+import pipeline_profiler as profiler
+from archive_cache import ArchiveCache
+from file_discovery import load_rules, scan_files
+
+# 压缩包清单保存在压缩包旁的同名 sidecar 文件中，压缩包的大小或修改时间变化后自动重建
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+# 与 is_text_file 相同：文本模式读取时首次解码的字节数（TextIOWrapper 的块大小）
+TEXT_PROBE_SIZE = 8192
+
+# 清单中的单个文件：大小、CRC32、SHA-256 与是否为（UTF-8）文本文件
+ManifestEntry = namedtuple('ManifestEntry', ['size', 'crc32', 'sha256', 'is_text'])
+
+# 重命名检测：内容相似度（按行计算）不低于该值的删除/新增文本文件视为移动后又修改
+RENAME_SIMILARITY = 0.6
+# 相似度比较的最大次数，避免大规模目录重组时耗时失控
+RENAME_COMPARISON_BUDGET = 2000
+
 # --- 最终版 HTML 报告模板 ---
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -46,6 +74,7 @@ HTML_TEMPLATE = """
         .card-removed {{ background: #cb2431; }}
         .card-modified {{ background: #f29d24; color: #fff; }}
         .card-identical {{ background: #0366d6; }}
+        .card-renamed {{ background: #6f42c1; }}
 
         .details-section {{ padding: 10px 30px 30px; }}
         details {{
@@ -114,6 +143,10 @@ HTML_TEMPLATE = """
                     <div class="count">{modified_count}</div>
                     <div class="label">修改文件</div>
                 </div>
+                <div class="summary-card card-renamed">
+                    <div class="count">{renamed_count}</div>
+                    <div class="label">移动文件</div>
+                </div>
                 <div class="summary-card card-identical">
                     <div class="count">{identical_count}</div>
                     <div class="label">未变文件</div>
@@ -153,7 +186,11 @@ def generate_contextual_diff(path1, path2, context_lines=2):
             lines2 = f2.readlines()
     except Exception as e:
         return {"stats": {"added": 0, "removed": 0}, "html": f"<p>无法读取文件进行比较: {e}</p>"}
+    return generate_lines_diff(lines1, lines2, context_lines)
+
 
+def generate_lines_diff(lines1, lines2, context_lines=2):
+    """generate_contextual_diff 的核心部分，直接比较两组文本行"""
     # 1. 计算统计信息
     added_lines, removed_lines = 0, 0
     matcher = difflib.SequenceMatcher(None, lines1, lines2)
@@ -216,33 +253,303 @@ def generate_contextual_diff(path1, path2, context_lines=2):
     }
 
 
-def extract_archive(archive_path, dest_dir):
-    """解压压缩包"""
-    path = pathlib.Path(archive_path)
-    print(f"正在解压 {path.name}...")
+# --- 压缩包清单 ---
+def _member_path(name: str) -> str:
+    """将压缩包内的成员名规范为相对路径（以 "/" 分隔）"""
+    return pathlib.PurePosixPath(name.replace('\\', '/').lstrip('/')).as_posix()
+
+
+def _iter_members(archive_path):
+    """逐个返回压缩包内的文件 (相对路径, 可读的文件对象, zip 中记录的 CRC32 或 None)，不解压到磁盘"""
+    name = os.path.basename(archive_path)
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(archive_path, 'r') as z:
+            for info in z.infolist():
+                if not info.is_dir():
+                    with z.open(info) as f:
+                        yield _member_path(info.filename), f, info.CRC
+    elif name.endswith(('.tar.gz', '.tgz', '.tar')):
+        with tarfile.open(archive_path, 'r:*') as t:
+            for info in t:
+                if info.isfile():
+                    with t.extractfile(info) as f:
+                        yield _member_path(info.name), f, None
+    else:
+        raise ValueError(f"不支持的压缩格式: {name}")
+
+
+def _hash_member(f, crc32=None) -> ManifestEntry:
+    """流式读取一个文件，计算清单条目"""
+    sha256 = hashlib.sha256()
+    size = 0
+    compute_crc = crc32 is None
+    crc32 = crc32 or 0
+    head = b""
+    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+        if len(head) < TEXT_PROBE_SIZE:
+            head += chunk[:TEXT_PROBE_SIZE - len(head)]
+        sha256.update(chunk)
+        size += len(chunk)
+        if compute_crc:
+            crc32 = zlib.crc32(chunk, crc32)
     try:
-        if path.name.endswith('.zip'):
-            with zipfile.ZipFile(archive_path, 'r') as z:
-                z.extractall(dest_dir)
-        elif path.name.endswith(('.tar.gz', '.tgz', '.tar')):
-            with tarfile.open(archive_path, 'r:*') as t:
-                t.extractall(dest_dir)
-        else:
-            raise ValueError(f"不支持的压缩格式: {path.name}")
-    except Exception as e:
-        print(f"错误: 解压 {path.name} 失败. {e}")
-        return False
-    return True
+        # 末尾不完整的多字节字符不算解码失败（与文本模式分块读取时相同）
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+        is_text = True
+    except UnicodeDecodeError:
+        is_text = False
+    return ManifestEntry(size, crc32, sha256.hexdigest(), is_text)
+
+
+def build_manifest(archive_path) -> dict:
+    """读取压缩包内所有文件，返回 {相对路径: ManifestEntry}"""
+    print(f"正在生成 {os.path.basename(archive_path)} 的文件清单...")
+    manifest = {}
+    for rel_path, f, crc32 in _iter_members(archive_path):
+        manifest[rel_path] = _hash_member(f, crc32)
+    profiler.count("manifests_built")
+    return manifest
+
 
+def _archive_signature(archive_path) -> dict:
+    stat = os.stat(archive_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def load_manifest(archive_path):
+    """读取压缩包的清单 sidecar；不存在、版本不符或压缩包已变化时返回 None"""
+    try:
+        with open(str(archive_path) + MANIFEST_SUFFIX, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != MANIFEST_VERSION or data.get('archive') != _archive_signature(archive_path):
+        return None
+    return {rel_path: ManifestEntry(*values) for rel_path, values in data['files'].items()}
+
+
+def save_manifest(archive_path, manifest):
+    """将清单原子地写入压缩包旁的 sidecar 文件；目录不可写时只打印警告"""
+    sidecar = str(archive_path) + MANIFEST_SUFFIX
+    data = {
+        'version': MANIFEST_VERSION,
+        'archive': _archive_signature(archive_path),
+        'files': {rel_path: list(entry) for rel_path, entry in sorted(manifest.items())},
+    }
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=".manifest.", suffix=".tmp", dir=os.path.dirname(sidecar) or ".")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, sidecar)
+    except OSError as e:
+        print(f"警告: 无法保存文件清单 {sidecar}: {e}")
+
+
+def get_manifest(archive_path) -> dict:
+    """返回压缩包的清单，优先复用 sidecar，否则生成并保存"""
+    manifest = load_manifest(archive_path)
+    if manifest is not None:
+        print(f"复用 {os.path.basename(archive_path)} 的文件清单。")
+        profiler.count("manifests_reused")
+        return manifest
+    manifest = build_manifest(archive_path)
+    save_manifest(archive_path, manifest)
+    return manifest
+
+
+def read_member_lines(archive_path, rel_paths) -> dict:
+    """
+    从压缩包中读取指定文本文件的各行（与文本模式 readlines 的换行处理相同），返回 {相对路径: 行列表}。
+    无法解码的文件对应的值为异常对象。
+    """
+    wanted = set(rel_paths)
+    lines = {}
+    if not wanted:
+        return lines
+    for rel_path, f, _ in _iter_members(archive_path):
+        if rel_path in wanted:
+            try:
+                lines[rel_path] = io.TextIOWrapper(f, encoding='utf-8').readlines()
+            except UnicodeDecodeError as e:
+                lines[rel_path] = e
+            if len(lines) == len(wanted):
+                break
+    return lines
+
+
+def read_file_lines(root, rel_paths) -> dict:
+    """read_member_lines 的目录版本"""
+    lines = {}
+    for rel_path in rel_paths:
+        try:
+            with open(os.path.join(root, rel_path), 'r', encoding='utf-8') as f:
+                lines[rel_path] = f.readlines()
+        except (UnicodeDecodeError, OSError) as e:
+            lines[rel_path] = e
+    return lines
+
+
+def diff_lines_or_error(lines1, lines2):
+    """generate_lines_diff，其中一方读取失败时与 generate_contextual_diff 一样返回错误说明"""
+    for lines in (lines1, lines2):
+        if isinstance(lines, Exception):
+            return {"stats": {"added": 0, "removed": 0}, "html": f"<p>无法读取文件进行比较: {lines}</p>"}
+    return generate_lines_diff(lines1, lines2)
+
+
+# --- 重命名与移动检测 ---
+def _pair_exact_moves(removed, added, manifest1, manifest2) -> list:
+    """按内容哈希配对内容完全相同的移动（空文件除外），返回 [(旧路径, 新路径)]"""
+    by_hash = defaultdict(list)
+    for rel in sorted(removed):
+        if manifest1[rel].size:
+            by_hash[manifest1[rel].sha256].append(rel)
+    pairs = []
+    for rel in sorted(added):
+        candidates = by_hash.get(manifest2[rel].sha256)
+        if candidates and manifest2[rel].size:
+            # 多个候选时优先文件名相同的
+            name = posixpath.basename(rel)
+            index = next((i for i, old in enumerate(candidates) if posixpath.basename(old) == name), 0)
+            pairs.append((candidates.pop(index), rel))
+    return pairs
+
+
+def _pair_similar_moves(removed, added, manifest1, manifest2, read_lines1, read_lines2,
+                        threshold=RENAME_SIMILARITY, budget=RENAME_COMPARISON_BUDGET) -> list:
+    """
+    配对移动后又有修改的文本文件，返回 [(旧路径, 新路径, 相似度, 旧文件各行, 新文件各行)]。
+    只比较大小之比不低于 threshold 的候选（按大小排序后二分查找），同名文件优先，总比较次数不超过 budget。
+    """
+    old_files = sorted((manifest1[rel].size, rel) for rel in removed if manifest1[rel].is_text and manifest1[rel].size)
+    old_sizes = [size for size, _ in old_files]
+    candidates = {}
+    for rel in sorted(added):
+        entry = manifest2[rel]
+        if budget <= 0 or not entry.is_text or not entry.size:
+            continue
+        lo = bisect.bisect_left(old_sizes, entry.size * threshold)
+        hi = bisect.bisect_right(old_sizes, entry.size / threshold)
+        if lo >= hi:
+            continue
+        name = posixpath.basename(rel)
+        ranked = sorted((old for _, old in old_files[lo:hi]),
+                        key=lambda old: (posixpath.basename(old) != name, abs(manifest1[old].size - entry.size), old))
+        candidates[rel] = ranked[:budget]
+        budget -= len(candidates[rel])
+    if not candidates:
+        return []
+
+    lines1 = read_lines1({old for ranked in candidates.values() for old in ranked})
+    lines2 = read_lines2(candidates)
+    scored = []
+    for rel, ranked in candidates.items():
+        if isinstance(lines2[rel], Exception):
+            continue
+        matcher = difflib.SequenceMatcher(None)
+        matcher.set_seq2(lines2[rel])
+        for old in ranked:
+            if isinstance(lines1[old], Exception):
+                continue
+            matcher.set_seq1(lines1[old])
+            profiler.count("rename_comparisons")
+            if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold:
+                ratio = matcher.ratio()
+                if ratio >= threshold:
+                    scored.append((ratio, old, rel))
+
+    # 相似度高的优先配对，每个文件只参与一次配对
+    pairs, used = [], set()
+    for ratio, old, rel in sorted(scored, key=lambda item: (-item[0], item[1], item[2])):
+        if old not in used and rel not in used:
+            used.update((old, rel))
+            pairs.append((old, rel, ratio, lines1[old], lines2[rel]))
+    return pairs
+
+
+def detect_renames(removed, added, manifest1, manifest2, read_lines1, read_lines2) -> list:
+    """
+    在删除与新增的文件之间检测移动/重命名。read_lines1/2 接收相对路径集合，返回 {相对路径: 行列表}。
+    返回的每一项为 {"old_path", "path", "similarity", "is_binary", "diff_data"}；内容未变时 diff_data 为 None。
+    """
+    renamed = []
+    for old, rel in _pair_exact_moves(removed, added, manifest1, manifest2):
+        renamed.append({"old_path": pathlib.Path(old), "path": pathlib.Path(rel), "similarity": 1.0,
+                        "is_binary": not (manifest1[old].is_text and manifest2[rel].is_text), "diff_data": None})
+    paired = {item["old_path"].as_posix() for item in renamed} | {item["path"].as_posix() for item in renamed}
+    similar = _pair_similar_moves([rel for rel in removed if rel not in paired], [rel for rel in added if rel not in paired],
+                                  manifest1, manifest2, read_lines1, read_lines2)
+    for old, rel, ratio, lines1, lines2 in similar:
+        with profiler.stage("diff"):
+            diff_data = generate_lines_diff(lines1, lines2)
+        profiler.count("diffs_generated")
+        renamed.append({"old_path": pathlib.Path(old), "path": pathlib.Path(rel), "similarity": ratio,
+                        "is_binary": False, "diff_data": diff_data})
+    profiler.count("renames_detected", len(renamed))
+    renamed.sort(key=lambda item: item["path"])
+    return renamed
+
+
+def compare_archive_manifests(archive1, archive2, manifest1, manifest2, renames=True):
+    """按清单比较两个压缩包，只读取内容有变化的文本文件来生成差异。renames 为 True 时检测移动/重命名的文件"""
+    print("正在比较文件清单...")
+    rules = load_rules("compare")
+    files1 = {rel for rel in manifest1 if rules.is_included(rel)}
+    files2 = {rel for rel in manifest2 if rules.is_included(rel)}
+
+    common_files = files1 & files2
+    profiler.count("files_compared", len(common_files))
+    # 大小、CRC32 与 SHA-256 均相同视为未变
+    identical = {rel for rel in common_files if manifest1[rel] == manifest2[rel]}
+    changed = sorted(common_files - identical)
+    text_changed = [rel for rel in changed if manifest1[rel].is_text and manifest2[rel].is_text]
+
+    lines1 = read_member_lines(archive1, text_changed)
+    lines2 = read_member_lines(archive2, text_changed)
+    modified_files = []
+    for rel in changed:
+        diff_data = None
+        is_text = rel in lines1 and rel in lines2
+        if is_text:
+            print(f"  - 正在为 {rel} 生成 diff...")
+            with profiler.stage("diff"):
+                diff_data = diff_lines_or_error(lines1[rel], lines2[rel])
+            profiler.count("diffs_generated")
+        modified_files.append({
+            "path": pathlib.Path(rel), "is_binary": not is_text, "diff_data": diff_data
+        })
+
+    removed, added = files1 - files2, files2 - files1
+    renamed = []
+    if renames:
+        renamed = detect_renames(removed, added, manifest1, manifest2,
+                                 lambda rels: read_member_lines(archive1, rels),
+                                 lambda rels: read_member_lines(archive2, rels))
+        removed -= {item["old_path"].as_posix() for item in renamed}
+        added -= {item["path"].as_posix() for item in renamed}
+
+    print("比较完成。")
+    return {
+        "added": sorted(pathlib.Path(rel) for rel in added),
+        "removed": sorted(pathlib.Path(rel) for rel in removed),
+        "modified": modified_files,
+        "renamed": renamed,
+        "identical": sorted(pathlib.Path(rel) for rel in identical),
+    }
 
-def compare_directories(dir1, dir2):
-    """比较目录并为文本文件生成上下文差异"""
+
+def compare_directories(dir1, dir2, renames=True):
+    """比较目录并为文本文件生成上下文差异。renames 为 True 时检测移动/重命名的文件"""
     print("正在比较文件内容...")
 
-    files1 = {p.relative_to(dir1) for p in pathlib.Path(dir1).rglob('*') if p.is_file()}
-    files2 = {p.relative_to(dir2) for p in pathlib.Path(dir2).rglob('*') if p.is_file()}
+    # 遍历时取得的 stat 结果随条目返回，比较文件大小时无需再次访问文件系统
+    rules = load_rules("compare")
+    entries1 = {pathlib.Path(rel): entry for rel, entry in scan_files(dir1, rules).items()}
+    entries2 = {pathlib.Path(rel): entry for rel, entry in scan_files(dir2, rules).items()}
+    files1, files2 = set(entries1), set(entries2)
 
     common_files = files1.intersection(files2)
+    profiler.count("files_compared", len(common_files))
     modified_files = []
     identical_files = set()
 
@@ -251,7 +558,7 @@ def compare_directories(dir1, dir2):
         path2 = pathlib.Path(dir2) / rel_path
 
         # 使用哈希值进行精确比较
-        if path1.stat().st_size == path2.stat().st_size and hashlib.sha256(
+        if entries1[rel_path].stat.st_size == entries2[rel_path].stat.st_size and hashlib.sha256(
                 path1.read_bytes()).hexdigest() == hashlib.sha256(path2.read_bytes()).hexdigest():
             identical_files.add(rel_path)
         else:
@@ -259,18 +566,35 @@ def compare_directories(dir1, dir2):
             diff_data = None
             if is_text:
                 print(f"  - 正在为 {rel_path} 生成 diff...")
-                diff_data = generate_contextual_diff(path1, path2)
+                with profiler.stage("diff"):
+                    diff_data = generate_contextual_diff(path1, path2)
+                profiler.count("diffs_generated")
 
             modified_files.append({
                 "path": rel_path, "is_binary": not is_text, "diff_data": diff_data
             })
 
+    removed, added = files1 - files2, files2 - files1
+    renamed = []
+    if renames and removed and added:
+        # 只为删除与新增的文件计算清单条目
+        manifest1, manifest2 = ({}, {})
+        for manifest, root, paths in ((manifest1, dir1, removed), (manifest2, dir2, added)):
+            for rel_path in paths:
+                with open(pathlib.Path(root) / rel_path, 'rb') as f:
+                    manifest[rel_path.as_posix()] = _hash_member(f)
+        renamed = detect_renames(set(manifest1), set(manifest2), manifest1, manifest2,
+                                 lambda rels: read_file_lines(dir1, rels), lambda rels: read_file_lines(dir2, rels))
+        removed -= {item["old_path"] for item in renamed}
+        added -= {item["path"] for item in renamed}
+
     print("比较完成。")
     modified_files.sort(key=lambda x: x['path'])
     return {
-        "added": sorted(list(files2 - files1)),
-        "removed": sorted(list(files1 - files2)),
+        "added": sorted(list(added)),
+        "removed": sorted(list(removed)),
         "modified": modified_files,
+        "renamed": renamed,
         "identical": sorted(list(identical_files)),
     }
 
@@ -308,6 +632,31 @@ def generate_html_report(results, archive1_path, archive2_path, output_path):
             """)
         return "".join(details_items)
 
+    def create_renamed_files_html(files):
+        if not files: return ""
+        details_items = []
+        for file_info in files:
+            path_str = f"{escape(file_info['old_path'].as_posix())} → {escape(file_info['path'].as_posix())}"
+            similarity = f'<span>{file_info["similarity"]:.0%}</span>'
+
+            if file_info['diff_data'] is None:
+                summary_extra = f'<div class="diff-stats">{similarity}</div>'
+                content_html = '<div class="diff-summary-bin">内容未变，仅移动了位置。</div>'
+            else:
+                stats = file_info['diff_data']['stats']
+                add_stat = f'<span class="diff-stat-add">+{stats["added"]}</span>' if stats["added"] > 0 else ''
+                del_stat = f'<span class="diff-stat-del">-{stats["removed"]}</span>' if stats["removed"] > 0 else ''
+                summary_extra = f'<div class="diff-stats">{similarity} {add_stat} {del_stat}</div>'
+                content_html = f'<div class="diff-container">{file_info["diff_data"]["html"]}</div>'
+
+            details_items.append(f"""
+            <details>
+                <summary><span>{path_str}</span>{summary_extra}</summary>
+                {content_html}
+            </details>
+            """)
+        return "".join(details_items)
+
     # --- 开始修改 ---
 
     # 1. 创建一个从中文标题到英文数据键的映射
@@ -315,6 +664,7 @@ def generate_html_report(results, archive1_path, archive2_path, output_path):
         "新增文件": "added",
         "删除文件": "removed",
         "修改文件": "modified",
+        "移动文件": "renamed",
         "未变文件": "identical"
     }
 
@@ -323,6 +673,7 @@ def generate_html_report(results, archive1_path, archive2_path, output_path):
         "新增文件": create_simple_file_list_html(results['added']),
         "删除文件": create_simple_file_list_html(results['removed']),
         "修改文件": create_modified_files_html(results['modified']),
+        "移动文件": create_renamed_files_html(results.get('renamed', [])),
         "未变文件": create_simple_file_list_html(results['identical'])
     }
 
@@ -332,11 +683,11 @@ def generate_html_report(results, archive1_path, archive2_path, output_path):
         # 使用映射字典找到对应的英文键
         data_key = key_map[title]
         # 直接从 results 字典获取列表并计算长度
-        count = len(results[data_key])
+        count = len(results.get(data_key, []))
 
         if count > 0:
             # 对于修改的文件，内容已经包含了<details>，所以我们不需要再包一层
-            if title == "修改文件":
+            if title in ("修改文件", "移动文件"):
                 # 直接添加修改文件的HTML块
                 details_html += f'<div>{content}</div>'
             else:
@@ -355,6 +706,7 @@ def generate_html_report(results, archive1_path, archive2_path, output_path):
         added_count=len(results['added']),
         removed_count=len(results['removed']),
         modified_count=len(results['modified']),
+        renamed_count=len(results.get('renamed', [])),
         identical_count=len(results['identical']),
         details_html=details_html
     )
@@ -370,22 +722,40 @@ def main():
         description="比较两个压缩包内容，并生成一个带上下文差异和统计信息的高级HTML报告。",
         formatter_class=argparse.RawTextHelpFormatter
     )
-    parser.add_argument("archive1", help="第一个压缩包（旧版本）的路径。")
-    parser.add_argument("archive2", help="第二个压缩包（新版本）的路径。")
+    parser.add_argument("archive1", help="第一个压缩包（旧版本）的路径；指定 --pack-id 时为旧版本的版本 ID。")
+    parser.add_argument("archive2", help="第二个压缩包（新版本）的路径；指定 --pack-id 时为新版本的版本 ID。")
     parser.add_argument("-o", "--output", default="comparison_report.html", help="输出HTML报告的文件名。")
+    parser.add_argument("--pack-id", help="整合包 ID。指定后从本地压缩包缓存获取两个版本（未缓存时通过 CurseTheBeast 下载）。")
+    parser.add_argument("--no-renames", action="store_true", help="不检测移动/重命名的文件，将其报告为删除与新增。")
+    profiler.add_profile_arguments(parser)
     args = parser.parse_args()
+    profiler.configure("compare_archives", args)
 
-    for path in [args.archive1, args.archive2]:
+    if args.pack_id:
+        cache = ArchiveCache.from_env()
+        archive1, archive2 = (cache.fetch(args.pack_id, version_id) for version_id in (args.archive1, args.archive2))
+        archive1_name, archive2_name = (f"{args.pack_id}-{version_id}.zip" for version_id in (args.archive1, args.archive2))
+    else:
+        archive1, archive2 = archive1_name, archive2_name = args.archive1, args.archive2
+
+    for path in [archive1, archive2]:
         if not os.path.exists(path):
             print(f"错误: 文件不存在 {path}");
             return
 
-    with tempfile.TemporaryDirectory() as td1, tempfile.TemporaryDirectory() as td2:
-        if not extract_archive(args.archive1, td1) or not extract_archive(args.archive2, td2): return
+    # 两个版本均有清单时，比较只是清单的合并，仅读取有变化的文本文件
+    with profiler.stage("manifest"):
+        try:
+            manifest1, manifest2 = get_manifest(archive1), get_manifest(archive2)
+        except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+            print(f"错误: 读取压缩包失败. {e}")
+            return
 
-        results = compare_directories(td1, td2)
-        generate_html_report(results, args.archive1, args.archive2, args.output)
-        print(f"\n报告已保存到: {os.path.abspath(args.output)}")
+    with profiler.stage("compare"):
+        results = compare_archive_manifests(archive1, archive2, manifest1, manifest2, renames=not args.no_renames)
+    with profiler.stage("report"):
+        generate_html_report(results, archive1_name, archive2_name, args.output)
+    print(f"\n报告已保存到: {os.path.abspath(args.output)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,6 +7,12 @@ import shutil
 import filecmp
 from pathlib import Path
 
+# 共用模块位于 .github/workflows
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "workflows"))
+import pipeline_profiler as profiler
+from archive_cache import ArchiveCache
+from file_discovery import DiscoveryRules, load_rules, scan_files
+
 
 def run_command(command):
     """Executes a command and raises an exception on failure."""
@@ -33,14 +39,41 @@ def get_file_hash(filepath):
     h = hashlib.sha256()
     with open(filepath, 'rb') as f:
         for chunk in iter(lambda: f.read(4096), b""): h.update(chunk)
+    profiler.count("files_hashed")
     return h.hexdigest()
 
 
-def compare_folders(dcmp, added_files, deleted_files, changed_files):
-    for name in dcmp.right_only: added_files.add(Path(dcmp.right) / name)
-    for name in dcmp.left_only: deleted_files.add(Path(dcmp.left) / name)
-    for name in dcmp.diff_files: changed_files.add(Path(dcmp.right) / name)
-    for sub_dcmp in dcmp.subdirs.values(): compare_folders(sub_dcmp, added_files, deleted_files, changed_files)
+def top_level_difference(rel_path, other_dirs):
+    """
+    Returns the first level of rel_path that does not exist on the other side,
+    so that (like dircmp) a wholly added or deleted folder is reported once.
+    """
+    parts = rel_path.split('/')
+    for i in range(1, len(parts)):
+        prefix = '/'.join(parts[:i])
+        if prefix not in other_dirs:
+            return prefix
+    return rel_path
+
+
+def files_differ(old_entry, new_entry):
+    """Compares two discovered files, using the cached sizes before reading any content."""
+    if old_entry.stat.st_size != new_entry.stat.st_size:
+        return True
+    return not filecmp.cmp(old_entry.path, new_entry.path, shallow=False)
+
+
+def compare_folders(old_dir, new_dir, rules, added_files, deleted_files, changed_files):
+    old_dirs, new_dirs = set(), set()
+    old_entries, new_entries = scan_files(old_dir, rules, old_dirs), scan_files(new_dir, rules, new_dirs)
+    # Folders (including empty ones) present on one side only
+    for rel_path in new_entries.keys() - old_entries.keys() | new_dirs - old_dirs:
+        added_files.add(Path(new_dir) / top_level_difference(rel_path, old_dirs))
+    for rel_path in old_entries.keys() - new_entries.keys() | old_dirs - new_dirs:
+        deleted_files.add(Path(old_dir) / top_level_difference(rel_path, new_dirs))
+    for rel_path in old_entries.keys() & new_entries.keys():
+        if files_differ(old_entries[rel_path], new_entries[rel_path]):
+            changed_files.add(Path(new_dir) / rel_path)
 
 
 def generate_pr_body(pack_name, new_version, updated, added, deleted, source_root, new_root):
@@ -81,25 +114,10 @@ def apply_exclusion_rules(file_set, exclusion_patterns, root_path):
     if not exclusion_patterns:
         return file_set
 
-    kept_files = set()
-    for file_path in file_set:
-        relative_path = file_path.relative_to(root_path)
-        is_excluded = False  # Default to include
-
-        # Iterate through patterns in the specified order
-        for pattern in exclusion_patterns:
-            is_negation = pattern.startswith('!')
-            match_pattern = pattern[1:] if is_negation else pattern
-            
-            if relative_path.match(match_pattern):
-                # If it's a negation, it should be included (not excluded)
-                # If it's a regular pattern, it should be excluded
-                is_excluded = not is_negation
-        
-        if not is_excluded:
-            kept_files.add(file_path)
-            
-    return kept_files
+    # Same matching rules as file discovery ('!' re-includes, the last matching pattern wins)
+    rules = DiscoveryRules(exclude=exclusion_patterns)
+    return {file_path for file_path in file_set
+            if not rules.is_excluded(file_path.relative_to(root_path).as_posix())}
 
 
 # --- Main Logic ---
@@ -121,7 +139,8 @@ def main():
 
     print(f"Checking updates for: {pack_name} (ID: {pack_id})\nLocal version: {local_version_name}")
 
-    inspect_output = run_command(['./CurseTheBeast', 'inspect', str(pack_id)])
+    with profiler.stage("inspect"):
+        inspect_output = run_command(['./CurseTheBeast', 'inspect', str(pack_id)])
 
     versions_map = {}
     for line in inspect_output.splitlines():
@@ -149,49 +168,53 @@ def main():
     print(f"New version found: {latest_version_name} (ID: {latest_version_id})")
     print(f"Old version: {local_version_name} (ID: {local_version_id})")
 
-    print(f"Downloading LATEST version ({latest_version_name}) for file update...")
+    print(f"Fetching LATEST version ({latest_version_name}) for file update...")
     temp_root = repo_root / 'temp_update'
     shutil.rmtree(temp_root, ignore_errors=True)
     extract_dir = temp_root / 'extracted'
     os.makedirs(extract_dir, exist_ok=True)
-    run_command(
-        ['./CurseTheBeast', 'download', str(pack_id), latest_version_id, '--output', str(temp_root / f"{pack_id}.zip")])
-    with zipfile.ZipFile(temp_root / f"{pack_id}.zip", 'r') as z:
+    # Each version is downloaded once; re-runs and the diff report reuse the cached archive
+    archive_path = ArchiveCache.from_env().fetch(pack_id, latest_version_id)
+    with profiler.stage("extract"), zipfile.ZipFile(archive_path, 'r') as z:
         z.extractall(extract_dir)
     new_source_root = extract_dir / 'overrides'
     if not new_source_root.exists(): sys.exit("Error: 'overrides' directory not found.")
 
     updated_files, added_files, deleted_files = set(), set(), set()
-    # (The comparison loops for filePatterns and folders are unchanged)
-    for item in attention_list.get('filePatterns', []):
-        pattern = item['pattern'];
-        ignore_deletions = item.get('ignoreDeletions', False)
-        old_matches = set(source_dir.glob(pattern));
-        new_matches = set(new_source_root.glob(pattern))
-        relative_paths_from_old = {p.relative_to(source_dir) for p in old_matches}
-        relative_paths_from_new = {p.relative_to(new_source_root) for p in new_matches}
-        for rel_path in relative_paths_from_old.union(relative_paths_from_new):
-            old_f, new_f = source_dir / rel_path, new_source_root / rel_path
-            if not new_f.exists():
-                if not ignore_deletions: deleted_files.add(old_f)
-            elif not old_f.exists():
-                added_files.add(new_f)
-            elif get_file_hash(old_f) != get_file_hash(new_f):
-                updated_files.add(new_f)
-    for item in attention_list.get('folders', []):
-        folder_rel_str = item['path'];
-        ignore_deletions = item.get('ignoreDeletions', False)
-        old_d, new_d = source_dir / folder_rel_str, new_source_root / folder_rel_str
-        if not new_d.exists():
-            if old_d.exists() and not ignore_deletions: deleted_files.add(old_d)
-            continue
-        if not old_d.exists(): added_files.add(new_d); continue
-        dcmp = filecmp.dircmp(str(old_d), str(new_d), ignore=['.DS_Store'])
-        f_add, f_del, f_change = set(), set(), set()
-        compare_folders(dcmp, f_add, f_del, f_change)
-        added_files.update(f_add);
-        updated_files.update(f_change)
-        if not ignore_deletions: deleted_files.update(f_del)
+    with profiler.stage("compare"):
+        # Directories that cannot contain a match of the pattern are pruned instead of globbed
+        folder_rules = load_rules("update")
+        for item in attention_list.get('filePatterns', []):
+            pattern = item['pattern'];
+            ignore_deletions = item.get('ignoreDeletions', False)
+            pattern_rules = DiscoveryRules(include=[pattern], anchored=True)
+            old_matches = scan_files(source_dir, pattern_rules)
+            new_matches = scan_files(new_source_root, pattern_rules)
+            for rel_path in old_matches.keys() | new_matches.keys():
+                old_f, new_f = source_dir / rel_path, new_source_root / rel_path
+                if rel_path not in new_matches:
+                    if not ignore_deletions: deleted_files.add(old_f)
+                elif rel_path not in old_matches:
+                    added_files.add(new_f)
+                elif (old_matches[rel_path].stat.st_size != new_matches[rel_path].stat.st_size
+                      or get_file_hash(old_f) != get_file_hash(new_f)):
+                    updated_files.add(new_f)
+        for item in attention_list.get('folders', []):
+            folder_rel_str = item['path'];
+            ignore_deletions = item.get('ignoreDeletions', False)
+            old_d, new_d = source_dir / folder_rel_str, new_source_root / folder_rel_str
+            if not new_d.exists():
+                if old_d.exists() and not ignore_deletions: deleted_files.add(old_d)
+                continue
+            if not old_d.exists(): added_files.add(new_d); continue
+            f_add, f_del, f_change = set(), set(), set()
+            compare_folders(old_d, new_d, folder_rules, f_add, f_del, f_change)
+            added_files.update(f_add);
+            updated_files.update(f_change)
+            if not ignore_deletions: deleted_files.update(f_del)
+    profiler.count("files_added", len(added_files))
+    profiler.count("files_updated", len(updated_files))
+    profiler.count("files_deleted", len(deleted_files))
 
     added_files = apply_exclusion_rules(added_files, exclusion_patterns, new_source_root)
     updated_files = apply_exclusion_rules(updated_files, exclusion_patterns, new_source_root)
@@ -201,16 +224,17 @@ def main():
         return
 
     # (File application logic is unchanged)
-    for item in sorted(list(deleted_files), key=lambda p: len(p.parts), reverse=True): shutil.rmtree(
-        item) if item.is_dir() else item.unlink()
-    all_to_copy = sorted(list(updated_files.union(added_files)))
-    for item in all_to_copy:
-        dest = source_dir / item.relative_to(new_source_root)
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        if item.is_dir():
-            shutil.copytree(item, dest, dirs_exist_ok=True)
-        else:
-            shutil.copy2(item, dest)
+    with profiler.stage("apply"):
+        for item in sorted(list(deleted_files), key=lambda p: len(p.parts), reverse=True): shutil.rmtree(
+            item) if item.is_dir() else item.unlink()
+        all_to_copy = sorted(list(updated_files.union(added_files)))
+        for item in all_to_copy:
+            dest = source_dir / item.relative_to(new_source_root)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if item.is_dir():
+                shutil.copytree(item, dest, dirs_exist_ok=True)
+            else:
+                shutil.copy2(item, dest)
 
     with open(info_file_path, "r+", encoding="utf-8") as f:
         data = json.load(f)
@@ -236,6 +260,7 @@ def main():
 
 
 if __name__ == "__main__":
+    profiler.configure("update_checker")
     try:
         main()
     except Exception as e:
@@ -14,6 +14,8 @@ LangSpliter 命令行工具
      python LangSpliter.py split --source-lang "path/to/en_us.snbt" --output-dir "path/to/output"
    - **(新功能)** 拆分时将单行列表展平 (不加数字后缀):
      python LangSpliter.py split --flatten-single-lines
+   - 增量拆分，只重新生成输入发生变化的章节 JSON 文件:
+     python LangSpliter.py split --incremental
 
 2. 合并 JSON 文件为 SNBT 文件:
    - 使用默认路径:
@@ -22,20 +24,42 @@ LangSpliter 命令行工具
      python LangSpliter.py merge --json-dir "path/to/json_files" --output-snbt "path/to/zh_cn.snbt"
    - **(新功能)** 在合并时，将 custom_name/lore 更新回其原始的章节 SNBT 文件中:
      python LangSpliter.py merge --chapters-dir "path/to/chapters" --output-chapters-dir "path/to/modified_chapters"
+   - 增量合并，只重写翻译发生变化的章节文件:
+     python LangSpliter.py merge --manifest "path/to/merge_manifest.json"
+
+3. 监视模式，输入文件变化时自动增量拆分或合并（参数与 split / merge 相同，Ctrl+C 退出）:
+     python LangSpliter.py watch split
+     python LangSpliter.py watch merge --json-dir "path/to/json_files" --interval 0.5
+
+4. 记录各阶段耗时、计数与峰值内存（参数需放在子命令之前，详见 pipeline_profiler.py）:
+     python LangSpliter.py --profile --profile-memory split
 
 要查看所有可用参数，请使用 -h 或 --help:
   python LangSpliter.py -h
   python LangSpliter.py split -h
   python LangSpliter.py merge -h
+  python LangSpliter.py watch split -h
 """
 
+import io
 import os
+import sys
 import json
 import re
+import filecmp
+import bisect
+import hashlib
+import shutil
+import tempfile
+import time
 import ftb_snbt_lib as snbtlib
-from ftb_snbt_lib.tag import List,String,Compound
+from ftb_snbt_lib.tag import List,String
 import argparse
-from collections import OrderedDict
+from array import array
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+import pipeline_profiler as profiler
+from file_discovery import InputCache
 
 # --- Author: Maxing ---
 
@@ -46,6 +70,15 @@ CATEGORIES_TO_FILES = {
 }
 OTHER_ENTRIES_FILE = "en_us_other_entries.json"
 
+# --- 增量处理配置 ---
+# 清单文件以 "." 开头，合并时会被忽略；版本号变化时旧清单自动失效
+SPLIT_MANIFEST_FILE = ".split_manifest.json"
+SPLIT_MANIFEST_VERSION = 2
+MERGE_MANIFEST_VERSION = 1
+
+# 合并时对章节文件执行的批量文本替换规则
+REPLACE_RULES_FILE = ".github/configs/replace_rule.json"
+
 # --- 排序逻辑配置 ---
 SORT_ORDER_CONFIG = {
     'chapter.': [
@@ -74,99 +107,717 @@ def escape_string_for_snbt(s: str) -> str:
     return s
 
 
-def split_and_process_all(source_lang_file, chapters_dir, chapter_groups_file, output_dir, flatten_single_lines: bool):
+# --- 语言文件快速解析 ---
+# FTB Quests 的语言文件是一个只包含字符串和字符串列表的扁平 Compound。
+# 下面的词法规则与 ftb_snbt_lib 保持一致（注释、逗号可选、NAME 需紧跟冒号、字符串反转义方式），
+# 遇到任何超出该形状的内容时抛出 FlatLangSnbtError，由调用方回退到 ftb_snbt_lib 完整解析。
+_FLAT_LANG_TOKEN_PATTERN = re.compile(r"""
+    (?P<skip>(?:[ \t\r\n]+|\#[^\n]*)+)
+  | "(?P<string>[^"\\]*(?:\\.[^"\\]*)*)"
+  | (?P<name>[a-zA-Z0-9._+-]+)(?=:)
+  | (?P<punct>[{}\[\]:,])
+""", re.VERBOSE)
+
+
+class FlatLangSnbtError(ValueError):
+    """语言文件内容超出快速解析器支持的扁平形状。"""
+
+
+def _unescape_snbt_token(raw: str) -> str:
+    # 与 ftb_snbt_lib 的 t_STRING 完全相同的反转义顺序
+    return raw.replace(r'\"', '"').replace(r'\\', '\\')
+
+
+def iter_flat_lang_snbt(text: str):
+    """
+    直接从 SNBT 文本中逐条产出 (key, str | list[str])，不构建任何标签对象。
+    仅支持 {key: "value", key: ["line", ...]} 形式的扁平语言文件，其余情况抛出 FlatLangSnbtError。
+    与 ftb_snbt_lib 的语法一致，逗号只能出现在两个条目之间，且可以省略。
+    """
+    tokens = _iter_flat_lang_tokens(text)
+
+    def next_token():
+        return next(tokens, (None, None))
+
+    kind, value = next_token()
+    if (kind, value) != ('punct', '{'):
+        raise FlatLangSnbtError(f"期望 '{{'，实际为 {value!r}")
+
+    kind, value = next_token()
+    if (kind, value) != ('punct', '}'):
+        while True:
+            if kind == 'name':
+                # ftb_snbt_lib 会优先把以 true/false 开头的名称识别为布尔值
+                if value.startswith(('true', 'false')):
+                    raise FlatLangSnbtError(f"键名 {value!r} 需要完整解析")
+                key = value
+            elif kind == 'string':
+                key = _unescape_snbt_token(value)
+            else:
+                raise FlatLangSnbtError(f"期望键名，实际为 {value!r}")
+            if next_token() != ('punct', ':'):
+                raise FlatLangSnbtError(f"键 {key!r} 后缺少 ':'")
+
+            kind, value = next_token()
+            if kind == 'string':
+                yield key, _unescape_snbt_token(value)
+            elif (kind, value) == ('punct', '['):
+                yield key, _read_flat_lang_list(next_token)
+            else:
+                raise FlatLangSnbtError(f"键 {key!r} 的值不是字符串或字符串列表")
+
+            kind, value = next_token()
+            if (kind, value) == ('punct', '}'):
+                break
+            if (kind, value) == ('punct', ','):
+                kind, value = next_token()
+
+    if next_token() != (None, None):
+        raise FlatLangSnbtError("Compound 结束后仍有多余内容")
+
+
+def _read_flat_lang_list(next_token) -> list:
+    """读取 '[' 之后的字符串列表，直到对应的 ']'。"""
+    lines = []
+    kind, value = next_token()
+    if (kind, value) == ('punct', ']'):
+        return lines
+    while True:
+        if kind != 'string':
+            raise FlatLangSnbtError(f"列表中出现非字符串内容 {value!r}")
+        lines.append(_unescape_snbt_token(value))
+        kind, value = next_token()
+        if (kind, value) == ('punct', ']'):
+            return lines
+        if (kind, value) == ('punct', ','):
+            kind, value = next_token()
+
+
+def _iter_flat_lang_tokens(text: str):
+    """产出 (类型, 值)，跳过空白、逗号和注释。"""
+    match_token = _FLAT_LANG_TOKEN_PATTERN.match
+    pos = 0
+    end = len(text)
+    while pos < end:
+        match = match_token(text, pos)
+        if match is None:
+            raise FlatLangSnbtError(f"位置 {pos} 处出现无法识别的内容 {text[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        if kind != 'skip':
+            yield kind, match.group(kind)
+        pos = match.end()
+
+
+def load_lang_snbt(text: str) -> dict:
+    """
+    加载 FTB Quests 语言文件，返回 {key: str | list[str]}。
+    优先使用快速解析器；内容不是纯字符串/字符串列表的扁平结构时回退到 ftb_snbt_lib。
+    重复键的处理与 ftb_snbt_lib 相同（保留首次出现的位置，使用最后一次的值）。
+    """
+    try:
+        return dict(iter_flat_lang_snbt(text))
+    except FlatLangSnbtError as e:
+        print(f"  -> 提示：语言文件不是纯字符串的扁平结构（{e}），改用 ftb_snbt_lib 完整解析。")
+        return snbtlib.loads(text)
+
+
+def format_snbt_text_value(value, indent: str = "\t") -> str:
+    """
+    按 ftb_snbt_lib 的写入格式输出字符串或字符串列表。indent 为该值所在行（键所在行）的缩进：
+    空列表为 "[ ]"，单行列表不展开，多行列表每行比 indent 多缩进一级、结尾括号与 indent 对齐。
+    """
+    if isinstance(value, list):
+        if not value:
+            return "[ ]"
+        lines = [f'"{escape_string_for_snbt(str(line))}"' for line in value]
+        if len(lines) == 1:
+            return f"[{lines[0]}]"
+        item_indent = indent + "\t"
+        return f"[\n{item_indent}" + f"\n{item_indent}".join(lines) + f"\n{indent}]"
+    return f'"{escape_string_for_snbt(str(value))}"'
+
+
+def write_flat_lang_snbt(fp, items) -> int:
+    """
+    将 (key, str | list[str]) 逐条写入文件，输出与
+    snbtlib.dumps(Compound({key: String/List[String], ...})) 逐字节一致，
+    但不构建标签树，也不在内存中拼接整个输出字符串。返回写入的条目数。
+    """
+    count = 0
+    for key, value in items:
+        fp.write("{\n\t" if count == 0 else "\n\t")
+        # 与 dumps 一致：普通 str 类型的键名原样输出，不加引号
+        fp.write(f"{key}: {format_snbt_text_value(value)}")
+        count += 1
+    fp.write("\n}\n" if count else "{ }\n")
+    return count
+
+
+# --- 章节文件的源码区间修补 ---
+# 完整的 SNBT 词法规则，顺序与 ftb_snbt_lib 一致（BOOL 优先于 NAME，数字后缀规则相同）
+_SNBT_TOKEN_PATTERN = re.compile(r"""
+    (?P<skip>(?:[ \t\r\n]+|\#[^\n]*)+)
+  | (?P<bool>true|false)
+  | (?P<name>[a-zA-Z0-9._+-]+)(?=:)
+  | "(?P<string>[^"\\]*(?:\\.[^"\\]*)*)"
+  | (?P<number>-?[0-9]+[bsL]|-?[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?[fd]|-?[0-9]+)
+  | (?P<type>[BIL]+)(?=;)
+  | (?P<punct>[{}\[\]:;,])
+""", re.VERBOSE)
+
+
+class SnbtSpanError(ValueError):
+    """章节文件无法按源码区间修补（语法超出支持范围，或需要新增键），需回退到完整解析并重新序列化。"""
+
+
+class SpanCompound(dict):
+    """在普通字典之外，记录每个键对应的值在源文本中的区间 (start, end)。"""
+    __slots__ = ('spans',)
+
+    def __init__(self):
+        super().__init__()
+        self.spans = {}
+
+
+def parse_snbt_with_spans(text: str) -> SpanCompound:
+    """
+    单次扫描解析 SNBT 文本，返回由 SpanCompound / list / str / 数值组成的结构，
+    并记录所有 Compound 值的源码区间。语法与 ftb_snbt_lib 保持一致，无法识别时抛出 SnbtSpanError。
+    """
+    tokens = []
+    match_token = _SNBT_TOKEN_PATTERN.match
+    pos = 0
+    while pos < len(text):
+        match = match_token(text, pos)
+        if match is None:
+            raise SnbtSpanError(f"位置 {pos} 处出现无法识别的内容 {text[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        if kind != 'skip':
+            tokens.append((kind, match.group(kind), match.start(), match.end()))
+        pos = match.end()
+    tokens.append((None, None, len(text), len(text)))
+
+    index = 0
+
+    def take():
+        nonlocal index
+        token = tokens[index]
+        if token[0] is not None:
+            index += 1
+        return token
+
+    def peek_is(kind, value=None):
+        token = tokens[index]
+        return token[0] == kind and (value is None or token[1] == value)
+
+    def parse_value():
+        kind, value, start, end = take()
+        if kind == 'string':
+            return _unescape_snbt_token(value), start, end
+        if kind == 'number':
+            body = value.rstrip('bsLfd')
+            if value[-1] in 'fd' or '.' in body or 'e' in body.lower():
+                return float(body), start, end
+            return int(body), start, end
+        if kind == 'bool':
+            return value == 'true', start, end
+        if kind == 'punct' and value == '{':
+            return parse_compound(start)
+        if kind == 'punct' and value == '[':
+            return parse_list(start)
+        raise SnbtSpanError(f"位置 {start} 处期望一个值，实际为 {value!r}")
+
+    def parse_compound(start):
+        compound = SpanCompound()
+        if peek_is('punct', '}'):
+            return compound, start, take()[3]
+        while True:
+            kind, value, key_start, _ = take()
+            if kind == 'name':
+                key = value
+            elif kind == 'string':
+                key = _unescape_snbt_token(value)
+            else:
+                raise SnbtSpanError(f"位置 {key_start} 处期望键名，实际为 {value!r}")
+            if not peek_is('punct', ':'):
+                raise SnbtSpanError(f"位置 {key_start} 处的键 {key!r} 后缺少 ':'")
+            take()
+            compound[key], value_start, value_end = parse_value()
+            compound.spans[key] = (value_start, value_end)
+            if peek_is('punct', '}'):
+                return compound, start, take()[3]
+            if peek_is('punct', ','):
+                take()
+
+    def parse_list(start):
+        items = []
+        if peek_is('type'):
+            take()
+            if not peek_is('punct', ';'):
+                raise SnbtSpanError(f"位置 {start} 处的数组缺少 ';'")
+            take()
+        if peek_is('punct', ']'):
+            return items, start, take()[3]
+        while True:
+            items.append(parse_value()[0])
+            if peek_is('punct', ']'):
+                return items, start, take()[3]
+            if peek_is('punct', ','):
+                take()
+
+    if not peek_is('punct', '{'):
+        raise SnbtSpanError("SNBT 文本必须以 Compound 开头")
+    take()
+    root = parse_compound(tokens[index - 1][2])[0]
+    if tokens[index][0] is not None:
+        raise SnbtSpanError("Compound 结束后仍有多余内容")
+    return root
+
+
+class ChapterSpanPatcher:
+    """
+    基于源码区间的章节文件修补器：assign() 只记录需要替换的区间，render() 在原文本上拼接替换结果，
+    未修改的部分（包括格式）与原文件完全一致。需要新增键时抛出 SnbtSpanError。
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tree = parse_snbt_with_spans(text)
+        self.edits = {}
+
+    def assign(self, container, key, value):
+        span = getattr(container, 'spans', {}).get(key)
+        if span is None:
+            raise SnbtSpanError(f"需要新增键 {key!r}")
+        start = span[0]
+        line_start = self.text.rfind('\n', 0, start) + 1
+        line_prefix = self.text[line_start:start]
+        indent = line_prefix[:len(line_prefix) - len(line_prefix.lstrip(' \t'))]
+        self.edits[span] = format_snbt_text_value(value, indent)
+        container[key] = value
+
+    def render(self) -> str:
+        parts = []
+        last_end = 0
+        for (start, end), replacement in sorted(self.edits.items()):
+            parts.append(self.text[last_end:start])
+            parts.append(replacement)
+            last_end = end
+        parts.append(self.text[last_end:])
+        return ''.join(parts)
+
+
+def assign_snbt_tag(container, key, value):
+    """在 ftb_snbt_lib 标签树中写入字符串或字符串列表（含 ':' 的键名使用 String 以保证输出时带引号）。"""
+    tag_key = String(key) if ':' in key else key
+    container[tag_key] = List([String(line) for line in value]) if isinstance(value, list) else String(value)
+
+
+class AtomicFile:
+    """
+    以“临时文件 + 重命名”的方式写入文件。
+    临时文件与目标文件位于同一目录，commit() 时通过 os.replace 原子替换目标文件；
+    discard() 则删除临时文件，目标文件保持原样。
+    """
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.path = path
+        directory = os.path.dirname(path) or '.'
+        fd, self.tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+        self.file = os.fdopen(fd, 'w', encoding=encoding)
+
+    def commit(self, only_if_changed: bool = False) -> bool:
+        """
+        用临时文件替换目标文件，返回目标文件是否被改写。
+        only_if_changed 为 True 时，若内容与现有文件完全相同则丢弃临时文件，保留原文件及其 mtime。
+        """
+        self.file.close()
+        if only_if_changed and os.path.isfile(self.path) and filecmp.cmp(self.tmp_path, self.path, shallow=False):
+            self.discard()
+            profiler.count("files_unchanged")
+            return False
+        # mkstemp 创建的文件权限为 0600，这里沿用原文件权限（不存在时使用 0644）
+        mode = os.stat(self.path).st_mode & 0o777 if os.path.exists(self.path) else 0o644
+        os.chmod(self.tmp_path, mode)
+        if profiler.is_enabled():
+            profiler.count("files_written")
+            profiler.count("bytes_written", os.path.getsize(self.tmp_path))
+        os.replace(self.tmp_path, self.path)
+        return True
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def atomic_open(path: str, encoding: str = 'utf-8', only_if_changed: bool = False):
+    """
+    以原子方式写入文本文件的上下文管理器，出现异常时不会留下写了一半的文件。
+    only_if_changed 为 True 时，内容与现有文件相同则不替换（保留原文件的 mtime）。
+    """
+    atomic_file = AtomicFile(path, encoding)
+    try:
+        yield atomic_file.file
+    except BaseException:
+        atomic_file.discard()
+        raise
+    atomic_file.commit(only_if_changed)
+
+
+class JsonStreamWriter:
+    """
+    逐条写出 JSON 对象的流式写入器。
+    输出格式与 json.dump(data, f, ensure_ascii=False, indent=4) 完全一致，
+    但无需在内存中保留整个字典。目标文件在写入第一条条目时才会创建（原子写入），
+    因此没有任何条目时不会生成文件。
+    only_if_changed 为 True 时，内容未变化的文件不会被改写，changed 属性记录是否实际写入。
+    """
+
+    def __init__(self, path: str, only_if_changed: bool = False):
+        self.path = path
+        self.only_if_changed = only_if_changed
+        self.count = 0
+        self.changed = False
+        self._fp = None
+        self._atomic_file = None
+
+    def _open(self):
+        self._atomic_file = AtomicFile(self.path)
+        return self._atomic_file.file
+
+    def _commit(self, fp) -> bool:
+        atomic_file, self._atomic_file = self._atomic_file, None
+        return atomic_file.commit(self.only_if_changed)
+
+    def _discard(self):
+        atomic_file, self._atomic_file = self._atomic_file, None
+        atomic_file.discard()
+
+    def write(self, key: str, value):
+        if self._fp is None:
+            fp = self._fp = self._open()
+            fp.write('{\n    ')
+        else:
+            fp = self._fp
+            fp.write(',\n    ')
+        fp.write(json.dumps(key, ensure_ascii=False))
+        fp.write(': ')
+        # 嵌套结构需要额外缩进一级，字符串中的换行在 JSON 中已被转义，不受影响
+        fp.write(json.dumps(value, ensure_ascii=False, indent=4).replace('\n', '\n    '))
+        self.count += 1
+
+    def write_items(self, items):
+        for key, value in items:
+            self.write(key, value)
+
+    def close(self) -> bool:
+        """结束写入并原子替换目标文件。返回是否生成了文件。"""
+        if self._fp is None:
+            return False
+        fp, self._fp = self._fp, None
+        fp.write('\n}')
+        self.changed = self._commit(fp)
+        return True
+
+    def abort(self):
+        """放弃写入，删除临时文件，目标文件保持不变。"""
+        if self._fp is not None:
+            self._fp = None
+            self._discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+# 拆分结果在内存中的表示：文件名、输出路径与 UTF-8 编码的文件内容
+SplitBuffer = namedtuple('SplitBuffer', ['filename', 'path', 'data'])
+
+
+class JsonBufferWriter(JsonStreamWriter):
+    """
+    输出格式与 JsonStreamWriter 相同，但先写入内存缓冲区，
+    close() 时将结果作为 SplitBuffer 追加到 buffers 列表中。
+    persist 为 True 时同时以原子方式写入 path（only_if_changed 的语义不变，
+    内容未变化的文件不会加入 buffers）；为 False 时不写磁盘，only_if_changed 改为与
+    previous_sha256（上一次生成内容的摘要，记录在增量清单中）比较。sha256 属性记录本次内容的摘要。
+    """
+
+    def __init__(self, path: str, buffers: list, only_if_changed: bool = False, persist: bool = True,
+                 previous_sha256: str = None):
+        super().__init__(path, only_if_changed)
+        self.buffers = buffers
+        self.persist = persist
+        self.previous_sha256 = previous_sha256
+        self.data = None
+        self.sha256 = None
+
+    def _open(self):
+        return io.StringIO()
+
+    def _commit(self, fp) -> bool:
+        text = fp.getvalue()
+        self.data = text.encode('utf-8')
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        changed = True
+        if self.persist:
+            atomic_file = AtomicFile(self.path)
+            atomic_file.file.write(text)
+            changed = atomic_file.commit(self.only_if_changed)
+        elif self.only_if_changed:
+            changed = self.sha256 != self.previous_sha256
+        if changed:
+            self.buffers.append(SplitBuffer(os.path.basename(self.path), self.path, self.data))
+        return changed
+
+    def _discard(self):
+        pass
+
+
+def open_json_writer(path: str, only_if_changed: bool = False, buffers: list = None, persist: bool = True,
+                     previous_sha256: str = None):
+    """buffers 为 None 时返回直接写文件的 JsonStreamWriter，否则返回收集到 buffers 中的 JsonBufferWriter。"""
+    if buffers is None:
+        return JsonStreamWriter(path, only_if_changed)
+    return JsonBufferWriter(path, buffers, only_if_changed, persist, previous_sha256)
+
+
+def iter_flattened_lang_entries(snbt_data, flatten_single_lines: bool):
+    """
+    将 SNBT 语言数据逐条展平为 (key, value)：
+    列表按行拆分为带数字后缀的键，字符串进行反转义处理。
+    """
+    for key, value in snbt_data.items():
+        if isinstance(value, list):
+            # 根据命令行参数选择处理逻辑
+            if flatten_single_lines and len(value) == 1:
+                # 如果开启了展平功能，且列表只有一个元素，则不加数字后缀
+                yield key, unescape_string(str(value[0]))
+            else:
+                # 默认行为：为所有行（或当展平功能关闭时）添加数字后缀
+                for i, line in enumerate(value, 1):
+                    yield f"{key}{i}", unescape_string(str(line))
+        elif isinstance(value, str):
+            yield key, unescape_string(value)
+        else:
+            yield key, value
+
+
+# 展平后的源语言文件：原始 SNBT 条目数与 (key, value) 列表，供 InputCache 缓存
+FlattenedLang = namedtuple('FlattenedLang', ['raw_count', 'entries'])
+
+
+def load_flattened_lang_entries(path: str, flatten_single_lines: bool) -> FlattenedLang:
+    """读取并展平源语言文件。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        snbt_data = load_lang_snbt(f.read())
+    return FlattenedLang(len(snbt_data), list(iter_flattened_lang_entries(snbt_data, flatten_single_lines)))
+
+
+# 需要按章节归属拆分的条目前缀
+CHAPTER_OWNED_PREFIXES = ("chapter.", "quest.", "task.", "reward.")
+
+# 章节相关条目键的结构为 类型.ID[.后缀]，后缀末尾的数字是多行文本的行号，例如 quest.0123ABCD.quest_desc3
+LANG_KEY_KINDS = ("chapter", "quest", "task", "tasks", "reward", "rewards")
+_LANG_KEY_KIND_CODES = {kind: code for code, kind in enumerate(LANG_KEY_KINDS)}
+_LANG_KEY_PATTERN = re.compile(r'(chapter|quest|tasks?|rewards?)\.([^.]*)(?:\.(.*?)(\d*))?', re.DOTALL)
+_HEX_ID_PATTERN = re.compile(r'[0-9A-F]+')
+
+
+def parse_lang_key(key: str):
+    """
+    将章节相关条目的键解析为 (类型, ID, 后缀, 行号)，例如
+    quest.0123ABCD.quest_desc3 -> ("quest", "0123ABCD", "quest_desc", 3)；没有后缀或行号时分别为 "" 与 0。
+    ID 与后缀经过驻留（sys.intern），同一任务的所有条目共用同一个字符串对象。
+    其他键返回 None。
+    """
+    match = _LANG_KEY_PATTERN.fullmatch(key)
+    if not match:
+        return None
+    kind, owner_id, suffix, line = match.groups()
+    return kind, sys.intern(owner_id), sys.intern(suffix or ''), int(line) if line else 0
+
+
+class LangEntryStore:
+    """
+    章节相关语言条目的紧凑存储。每条条目只保存一次，以并行数组的形式保存键、值与键的解析结果
+    （见 parse_lang_key），不再为每条条目创建 (key, value) 元组。
+    按归属 (前缀, ID) 建立的视图只保存条目序号；章节取用视图后可释放其中的条目，内存占用随处理进度逐步下降。
+    """
+    __slots__ = ('keys', 'values', 'kinds', 'ids', 'suffixes', 'lines', 'views')
+
+    def __init__(self):
+        self.keys = []
+        self.values = []
+        self.kinds = array('B')
+        self.ids = []
+        self.suffixes = []
+        self.lines = []
+        self.views = {}
+
+    def add(self, key: str, value, parsed: tuple):
+        """添加一条条目，parsed 为 parse_lang_key(key) 的结果。"""
+        kind, owner_id, suffix, line = parsed
+        index = len(self.keys)
+        self.keys.append(key)
+        self.values.append(value)
+        self.kinds.append(_LANG_KEY_KIND_CODES[kind])
+        self.ids.append(owner_id)
+        self.suffixes.append(suffix)
+        self.lines.append(line)
+        view = self.views.get((f"{kind}.", owner_id))
+        if view is None:
+            view = self.views[(f"{kind}.", owner_id)] = array('L')
+        view.append(index)
+
+    def take(self, prefix: str, owner_id: str) -> array:
+        """取出（并移除）某个归属的视图，返回条目序号数组；没有条目时返回空数组。"""
+        return self.views.pop((prefix, owner_id), None) or array('L')
+
+    def items(self, view) -> list:
+        return [(self.keys[i], self.values[i]) for i in view]
+
+    def parsed(self, index: int) -> tuple:
+        return LANG_KEY_KINDS[self.kinds[index]], self.ids[index], self.suffixes[index], self.lines[index]
+
+    def release(self, view):
+        """释放视图中条目的键与值（序号保持不变）。"""
+        for i in view:
+            self.keys[i] = self.values[i] = None
+
+
+def split_and_process_all(source_lang_file, chapters_dir, chapter_groups_file, output_dir, flatten_single_lines: bool,
+                          incremental: bool = False, buffers: list = None, persist: bool = True,
+                          cache: InputCache = None, manifest_file: str = None, pending_manifest: dict = None):
     """
     一个完整的处理流程，现在会将 chapter.* 条目分发到对应的章节文件中。
     新增 flatten_single_lines 参数用于控制单行列表的处理方式。
+    incremental 为 True 时，依据输出目录中的清单 (SPLIT_MANIFEST_FILE) 只重新生成输入发生变化的章节，
+    未变化的 JSON 文件（包括其 mtime）保持不动。
+    返回本次实际写入（新建或内容变化）的文件路径列表；加载源文件失败时返回 None。
+
+    传入 buffers 列表时，生成的每个文件还会以 SplitBuffer（文件名、输出路径、内容）的形式追加到其中，
+    供调用方直接使用而无需重新读取磁盘；此时 persist 为 False 则完全不写入 output_dir。
+    manifest_file 为增量清单的路径，默认为输出目录中的 SPLIT_MANIFEST_FILE。persist 为 False 时
+    必须提供 manifest_file 才能增量拆分：清单中记录每个输出文件内容的摘要，内容未变化的文件不会加入 buffers。
+    提供 pending_manifest 字典时不立即保存清单，而是将其内容存入该字典，由调用方在使用完 buffers
+    （如全部上传成功）后通过 save_split_manifest 保存。
+    cache 为 watch 模式或 sync_pipeline.py 中共用的 InputCache，未变化的源语言文件与章节文件直接复用上次的读取结果。
     """
+    if not persist and buffers is None:
+        raise ValueError("persist=False 时必须提供 buffers")
+    if incremental and not persist and not manifest_file:
+        print("  -> 未写入磁盘且未指定清单文件时无法进行增量拆分，已关闭增量模式。")
+        incremental = False
     print(f"--- 1. 开始拆分和处理 {source_lang_file} ---")
     if flatten_single_lines:
         print("  -> 已启用【单行列表展平】模式。")
-    os.makedirs(output_dir, exist_ok=True)
-
-    # 1. 加载源语言文件
+    if incremental:
+        print("  -> 已启用【增量拆分】模式。")
+    if persist:
+        os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_file or os.path.join(output_dir, SPLIT_MANIFEST_FILE)
+    manifest_params = {'flatten_single_lines': flatten_single_lines}
+    previous_outputs = load_manifest(manifest_path, SPLIT_MANIFEST_VERSION, 'outputs',
+                                     **manifest_params) if incremental else {}
+
+    # 1. 加载源语言文件（watch 模式下缓存展平后的条目）
     try:
-        with open(source_lang_file, 'r', encoding='utf-8') as f:
-            snbt_data = snbtlib.loads(f.read())
-
-        lang_data = OrderedDict()
-        for key, value in snbt_data.items():
-            if isinstance(value, list):
-                # 根据命令行参数选择处理逻辑
-                if flatten_single_lines and len(value) == 1:
-                    # 如果开启了展平功能，且列表只有一个元素，则不加数字后缀
-                    processed_line = unescape_string(str(value[0]))
-                    lang_data[key] = processed_line
-                else:
-                    # 默认行为：为所有行（或当展平功能关闭时）添加数字后缀
-                    for i, line in enumerate(value, 1):
-                        new_key = f"{key}{i}"
-                        processed_line = unescape_string(str(line))
-                        lang_data[new_key] = processed_line
-            elif isinstance(value, str):
-                processed_value = unescape_string(value)
-                lang_data[key] = processed_value
+        with profiler.stage("split_load_lang"):
+            if cache is not None:
+                snbt_data = cache.get(source_lang_file,
+                                      lambda path: load_flattened_lang_entries(path, flatten_single_lines),
+                                      ("flattened", flatten_single_lines))
             else:
-                lang_data[key] = value
+                with open(source_lang_file, 'r', encoding='utf-8') as f:
+                    snbt_data = load_lang_snbt(f.read())
+    except Exception as e:
+        print(f"错误: 加载或解析 {source_lang_file} 失败: {e}")
+        return
+    raw_entry_count = snbt_data.raw_count if cache is not None else len(snbt_data)
+    flattened_entries = snbt_data.entries if cache is not None else iter_flattened_lang_entries(snbt_data,
+                                                                                                 flatten_single_lines)
+
+    # 2. 逐条分类：固定分类与其他条目直接流式写入文件，
+    #    章节相关条目按归属ID分桶，留待处理章节文件时使用
+    category_writers = {
+        filename: open_json_writer(os.path.join(output_dir, filename), incremental, buffers, persist,
+                                   previous_outputs.get(filename))
+        for filename in CATEGORIES_TO_FILES
+    }
+    other_writer = open_json_writer(os.path.join(output_dir, OTHER_ENTRIES_FILE), incremental, buffers, persist,
+                                    previous_outputs.get(OTHER_ENTRIES_FILE))
+    entry_store = LangEntryStore()
+    entry_count = 0
 
-        print(f"成功加载并处理了 {len(snbt_data)} 个原始SNBT条目，生成了 {len(lang_data)} 条扁平化语言条目。")
+    try:
+        with profiler.stage("split_categories"):
+            for key, value in flattened_entries:
+                entry_count += 1
+                parsed = parse_lang_key(key)
+                if parsed and f"{parsed[0]}." in CHAPTER_OWNED_PREFIXES:
+                    entry_store.add(key, value, parsed)
+                    continue
+                for filename, prefixes in CATEGORIES_TO_FILES.items():
+                    if key.startswith(tuple(prefixes)):
+                        category_writers[filename].write(key, value)
+                        break
+                else:
+                    other_writer.write(key, value)
     except Exception as e:
+        for writer in (*category_writers.values(), other_writer):
+            writer.abort()
         print(f"错误: 加载或解析 {source_lang_file} 失败: {e}")
         return
 
-    # 2. 预分类所有语言条目
-    categorized_data = {filename: OrderedDict() for filename in CATEGORIES_TO_FILES}
-    chapters_lang_data = OrderedDict()
-    quests_data = OrderedDict()
-    tasks_data = OrderedDict()
-    rewards_data = OrderedDict()
-    other_data = OrderedDict()
-
-    for key, value in lang_data.items():
-        assigned = False
-        if key.startswith("chapter."):
-            chapters_lang_data[key] = value
-            assigned = True
-        elif key.startswith("quest."):
-            quests_data[key] = value
-            assigned = True
-        elif key.startswith("task."):
-            tasks_data[key] = value
-            assigned = True
-        elif key.startswith("reward."):
-            rewards_data[key] = value
-            assigned = True
+    print(f"成功加载并处理了 {raw_entry_count} 个原始SNBT条目，生成了 {entry_count} 条扁平化语言条目。")
+    profiler.count("lang_entries", entry_count)
+    del snbt_data, flattened_entries
+
+    # 3. 完成固定的分类文件与其他条目文件
+    written_files = []
+    new_outputs = {}
+    for writer in (*category_writers.values(), other_writer):
+        if writer.close():
+            if getattr(writer, 'sha256', None):
+                new_outputs[os.path.basename(writer.path)] = writer.sha256
+            if writer.changed:
+                written_files.append(writer.path)
+                print(f"  -> 成功导出 {writer.count} 条条目到: {writer.path}")
+            else:
+                print(f"  -> {writer.path} 内容未变化，保持原文件不变。")
+
+    # 4. 处理章节文件，导出章节、任务、子任务和奖励的相关条目
+    manifest_entries = load_manifest(manifest_path, SPLIT_MANIFEST_VERSION,
+                                     **manifest_params) if incremental else None
+    with profiler.stage("split_chapters"):
+        chapter_files, new_manifest_entries = process_chapter_quests(chapters_dir, entry_store, output_dir,
+                                                                     manifest_entries, buffers, persist, cache)
+    written_files.extend(chapter_files)
+    if incremental:
+        manifest = {'path': manifest_path, 'entries': new_manifest_entries, 'outputs': new_outputs,
+                    'params': manifest_params}
+        if pending_manifest is None:
+            save_split_manifest(manifest)
         else:
-            for filename, prefixes in CATEGORIES_TO_FILES.items():
-                for prefix in prefixes:
-                    if key.startswith(prefix):
-                        categorized_data[filename][key] = value
-                        assigned = True
-                        break
-                if assigned:
-                    break
-        if not assigned:
-            other_data[key] = value
-
-    # 3. 写入固定的分类文件
-    for filename, data in categorized_data.items():
-        if data:
-            output_path = os.path.join(output_dir, filename)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            print(f"  -> 成功导出 {len(data)} 条条目到: {output_path}")
-
-    # 4. 写入其他条目文件
-    if other_data:
-        output_path = os.path.join(output_dir, OTHER_ENTRIES_FILE)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(other_data, f, ensure_ascii=False, indent=4)
-        print(f"  -> 成功导出 {len(other_data)} 条条目到: {output_path}")
-
-    # 5. 处理章节文件，导出章节、任务、子任务和奖励的相关条目
-    process_chapter_quests(chapters_dir, chapters_lang_data, quests_data, tasks_data, rewards_data, output_dir)
+            pending_manifest.update(manifest)
 
+    if persist:
+        print(f"本次共写入 {len(written_files)} 个文件。")
+    else:
+        print(f"本次共在内存中生成 {len(written_files)} 个文件（未写入磁盘）。")
     print("--- 拆分和处理完成 ---\n")
+    return written_files
 
 
 def sanitize_filename(name: str) -> str:
@@ -266,114 +917,252 @@ def create_sort_key(item, config, task_to_quest_map, reward_to_quest_map):
     return (is_chapter_key, quest_group_id, internal_type_priority, custom_priority, non_numeric_part, numeric_part)
 
 
-def process_item_list_for_components(item_list, list_key_name, output_dict):
+def create_parsed_sort_key(key, parsed, config, task_to_quest_map, reward_to_quest_map):
     """
-    扫描项目列表（如 'tasks' 或 'rewards'），为每个项目执行深度递归搜索，
-    以查找 'minecraft:custom_name' 和 'minecraft:lore'。
-    此函数可处理 'components' 块在项目数据结构中的任意嵌套。
+    与 create_sort_key 返回相同的排序元组，但直接使用 parse_lang_key 的解析结果，无需对键逐项匹配正则。
+    config 中的后缀与不含行号的后缀比较。ID 不是十六进制、键中含换行等少见情况回退到 create_sort_key。
     """
-    if not isinstance(item_list, list):
-        return
+    if parsed is None or '\n' in key or not _HEX_ID_PATTERN.fullmatch(parsed[1]):
+        return create_sort_key((key, None), config, task_to_quest_map, reward_to_quest_map)
+    kind, owner_id, suffix, line = parsed
 
-    def find_translatables_recursively(data, current_item_id):
-        """
-        在数据结构中递归搜索，携带父项的 ID。
-        """
-        if isinstance(data, dict):
-            # 检查当前字典是否包含 'components' 块
-            if 'components' in data and isinstance(data['components'], dict):
-                components = data['components']
+    key_prefix_for_config = ''
+    if kind == 'chapter':
+        head = (0, owner_id, 0)
+        if '.image.' not in key:  # 将 image.hover 排序在后
+            key_prefix_for_config = 'chapter.'
+    elif kind == 'quest':
+        head = (1, owner_id, 0)
+        key_prefix_for_config = 'quest.'
+    elif kind in ('task', 'tasks'):
+        head = (1, task_to_quest_map.get(owner_id, owner_id), 1)
+    else:
+        head = (1, reward_to_quest_map.get(owner_id, owner_id), 2)
 
-                # 提取 custom_name
-                if 'minecraft:custom_name' in components:
-                    name_val = components['minecraft:custom_name']
-                    try:
-                        name_val = name_val.replace(r'\\', '\\')
-                        name_val = name_val.replace(r'\"', '"')
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-                    lang_key = f"{list_key_name}.{current_item_id}.custom_name"
-                    output_dict[lang_key] = name_val
-
-                # 提取 lore
-                if 'minecraft:lore' in components:
-                    lore_list = components['minecraft:lore']
-                    if isinstance(lore_list, list):
-                        for i, lore_line in enumerate(lore_list, 1):
-                            try:
-                                lore_line = lore_line.replace(r'\\', '\\')
-                                lore_line = lore_line.replace(r'\"', '"')
-                            except (json.JSONDecodeError, TypeError):
-                                pass
-                            lang_key = f"{list_key_name}.{current_item_id}.lore{i}"
-                            output_dict[lang_key] = lore_line
-
-            # 无论是否找到 'components'，都继续向更深层递归
-            for value in data.values():
-                find_translatables_recursively(value, current_item_id)
+    custom_priority = 99
+    if key_prefix_for_config and key_prefix_for_config in config:
+        suffix_order = config[key_prefix_for_config]
+        custom_priority = len(suffix_order)
+        for i, ordered_suffix in enumerate(suffix_order):
+            if ('.' + suffix).startswith(ordered_suffix):
+                custom_priority = i
+                break
 
-        elif isinstance(data, list):
-            # 如果是列表，则对每个元素进行递归
-            for element in data:
-                find_translatables_recursively(element, current_item_id)
+    return (*head, custom_priority, suffix, line)
+
+
+def process_item_list_for_components(item_list, list_key_name, output_dict, chapter_index):
+    """
+    扫描项目列表（如 'tasks' 或 'rewards'），从每个项目下任意深度的 'components' 块中
+    提取 'minecraft:custom_name' 和 'minecraft:lore'。
+    各项目下的 components 直接取自章节索引（见 build_chapter_index），无需再次递归搜索项目结构。
+    """
+    if not isinstance(item_list, list):
+        return
 
-    # 遍历列表中的每一个顶层项目（如每个 task 或 reward）
     for item_dict in item_list:
         if not isinstance(item_dict, dict) or 'id' not in item_dict:
             continue
 
         item_id = item_dict['id']
-        # 对当前项目启动递归搜索，并将此项目的 ID 传递下去
-        find_translatables_recursively(item_dict, item_id)
+        entry = find_index_entry(chapter_index, item_dict)
+        for components in (entry['components'] if entry else ()):
+            # 提取 custom_name
+            if 'minecraft:custom_name' in components:
+                name_val = components['minecraft:custom_name']
+                try:
+                    name_val = name_val.replace(r'\\', '\\')
+                    name_val = name_val.replace(r'\"', '"')
+                except (json.JSONDecodeError, TypeError):
+                    pass
+                lang_key = f"{list_key_name}.{item_id}.custom_name"
+                output_dict[lang_key] = name_val
+
+            # 提取 lore
+            if 'minecraft:lore' in components:
+                lore_list = components['minecraft:lore']
+                if isinstance(lore_list, list):
+                    for i, lore_line in enumerate(lore_list, 1):
+                        try:
+                            lore_line = lore_line.replace(r'\\', '\\')
+                            lore_line = lore_line.replace(r'\"', '"')
+                        except (json.JSONDecodeError, TypeError):
+                            pass
+                        lang_key = f"{list_key_name}.{item_id}.lore{i}"
+                        output_dict[lang_key] = lore_line
+
+
+def scan_chapter_structure(chapter_data) -> dict:
+    """
+    提取章节的结构信息：章节ID、本章节拥有的语言条目归属列表，以及 task/reward 到 quest 的映射。
+    结果只包含可 JSON 序列化的数据，以便写入增量清单。
+    """
+    chapter_id = chapter_data.get('id')
+    owners = [["chapter.", str(chapter_id)]] if chapter_id else []
+    task_to_quest = {}
+    reward_to_quest = {}
+    for quest in chapter_data.get('quests', []):
+        quest_id = quest.get('id')
+        if not quest_id: continue
+        owners.append(["quest.", str(quest_id)])
+        for task in quest.get('tasks', []):
+            if task.get('id'):
+                task_to_quest[str(task['id'])] = str(quest_id)
+                owners.append(["task.", str(task['id'])])
+        for reward in quest.get('rewards', []):
+            if reward.get('id'):
+                reward_to_quest[str(reward['id'])] = str(quest_id)
+                owners.append(["reward.", str(reward['id'])])
+    return {
+        'chapter_id': str(chapter_id) if chapter_id else None,
+        'owners': owners,
+        'task_to_quest': task_to_quest,
+        'reward_to_quest': reward_to_quest,
+    }
+
+
+def hash_parts(*parts) -> str:
+    """计算若干可 JSON 序列化对象的组合 SHA-256 摘要。"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def load_manifest(path: str, version: int, section: str = 'entries', **params) -> dict:
+    """
+    读取增量处理清单，返回其中的 section 部分（默认为 entries）。
+    清单不存在、无法解析，或版本号/处理参数与本次不一致时返回空字典（即全部重新生成）。
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != version or any(manifest.get(k) != v for k, v in params.items()):
+        return {}
+    return manifest.get(section, {})
+
+
+def save_manifest(path: str, version: int, entries: dict, sections: dict = None, **params):
+    """以原子方式写入增量处理清单；sections 为 entries 之外的其他部分，读取时不参与参数比较。"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with atomic_open(path) as f:
+        json.dump({'version': version, **params, **(sections or {}), 'entries': entries}, f,
+                  ensure_ascii=False, indent=4, sort_keys=True)
+
+
+def save_split_manifest(manifest: dict, failed_outputs=()):
+    """
+    保存 split_and_process_all 通过 pending_manifest 返回的拆分清单。
+    failed_outputs 为未能使用（如上传失败）的输出文件名，清单中不记录它们的摘要及所属章节，
+    下次运行时会重新生成并再次出现在 buffers 中。
+    """
+    if not manifest:
+        return
+    failed_outputs = set(failed_outputs)
+    entries = {filename: info for filename, info in manifest['entries'].items()
+               if info.get('output') not in failed_outputs}
+    outputs = {filename: sha256 for filename, sha256 in manifest['outputs'].items()
+               if filename not in failed_outputs}
+    save_manifest(manifest['path'], SPLIT_MANIFEST_VERSION, entries, {'outputs': outputs}, **manifest['params'])
 
 
-def process_chapter_quests(chapters_dir, chapters_lang_data, quests_data, tasks_data, rewards_data, output_dir):
+def process_chapter_quests(chapters_dir, entry_store, output_dir, manifest_entries=None, buffers=None,
+                           persist=True, cache=None):
     """
     根据章节文件，将章节、任务、子任务、奖励的相关语言条目导出到对应的JSON文件。
+    entry_store 为章节相关语言条目的 LangEntryStore，每个归属的条目在被章节取用并导出后即释放，
+    内存占用随处理进度逐步下降；条目的键在拆分时已解析，排序时直接复用。
+
+    manifest_entries 为上一次运行的增量清单（None 表示非增量模式）。增量模式下，
+    章节 SNBT 与其对应语言条目均未变化的章节会被跳过，其 JSON 文件保持不变。
+    buffers、persist 与 cache 的含义同 split_and_process_all。
+    返回 (实际写入的文件列表, 本次的清单条目)。
     """
+    written_files = []
+    new_manifest_entries = {}
     if not os.path.isdir(chapters_dir):
-        return
+        return written_files, new_manifest_entries
+
+    incremental = manifest_entries is not None
+    previous_entries = manifest_entries or {}
 
     print("\n--- 开始处理章节文件以导出所有相关语言条目 ---")
 
-    # 构建 task/reward 到 quest 的映射表
+    # 构建 task/reward 到 quest 的映射表（增量模式下，未变化的章节直接复用清单中的结构信息）
     task_to_quest_map = {}
     reward_to_quest_map = {}
+    chapter_infos = {}
     print("正在构建任务和奖励的映射关系...")
     for filename in os.listdir(chapters_dir):
         if not filename.endswith('.snbt'): continue
         try:
-            with open(os.path.join(chapters_dir, filename), 'r', encoding='utf-8') as f:
-                chapter_data = snbtlib.loads(f.read())
-            for quest in chapter_data.get('quests', []):
-                quest_id = quest.get('id')
-                if not quest_id: continue
-                for task in quest.get('tasks', []):
-                    if task.get('id'): task_to_quest_map[task['id']] = quest_id
-                for reward in quest.get('rewards', []):
-                    if reward.get('id'): reward_to_quest_map[reward['id']] = quest_id
+            chapter_path = os.path.join(chapters_dir, filename)
+            if cache is not None:
+                source_sha256 = cache.get(chapter_path, text_file_sha256, "sha256")
+                chapter_text = None
+            else:
+                with open(chapter_path, 'r', encoding='utf-8') as f:
+                    chapter_text = f.read()
+                source_sha256 = hashlib.sha256(chapter_text.encode('utf-8')).hexdigest()
+            previous = previous_entries.get(filename)
+            if previous and previous.get('source_sha256') == source_sha256:
+                info = dict(previous)
+            else:
+                if chapter_text is None:
+                    with open(chapter_path, 'r', encoding='utf-8') as f:
+                        chapter_text = f.read()
+                info = scan_chapter_structure(snbtlib.loads(chapter_text))
+                info['source_sha256'] = source_sha256
+            chapter_infos[filename] = info
+            task_to_quest_map.update(info['task_to_quest'])
+            reward_to_quest_map.update(info['reward_to_quest'])
         except Exception as e:
             print(f"  -> 构建映射时警告：处理文件 {filename} 失败: {e}")
+            # 暂时无法解析的章节保留上一次的清单条目与输出文件，修复后按源文件哈希的变化重新处理
+            if filename in previous_entries:
+                new_manifest_entries[filename] = previous_entries[filename]
     print("映射关系构建完成。")
 
-    for filename in os.listdir(chapters_dir):
-        if not filename.endswith('.snbt'): continue
+    for filename, info in chapter_infos.items():
         chapter_path = os.path.join(chapters_dir, filename)
+        cleaned_filename = filename.removesuffix(".snbt")
+        output_filename = f"en_us_{cleaned_filename}.json"
+        output_path = os.path.join(output_dir, output_filename)
+        views = {}
 
         try:
+            chapter_id = info['chapter_id']
+            if not chapter_id: continue
+
+            # 取出本章节拥有的全部语言条目，并据此判断输入是否发生变化
+            for prefix, owner_id in info['owners']:
+                views.setdefault((prefix, owner_id), entry_store.take(prefix, owner_id))
+            slices = {owner: entry_store.items(view) for owner, view in views.items()}
+            info['input_sha256'] = hash_parts(info['source_sha256'], list(slices.values()))
+            new_manifest_entries[filename] = info
+
+            previous = previous_entries.get(filename, {})
+            if (incremental and previous.get('input_sha256') == info['input_sha256']
+                    and (not persist or not previous.get('output') or os.path.exists(output_path))):
+                info['output'] = previous.get('output')
+                info['output_sha256'] = previous.get('output_sha256')
+                print(f"  -> {filename} 的输入未变化，跳过生成。")
+                profiler.count("chapters_skipped")
+                continue
+            info['output'] = None
+            info['output_sha256'] = None
+
             with open(chapter_path, 'r', encoding='utf-8') as f:
                 chapter_data = snbtlib.loads(f.read())
-
-            chapter_id = chapter_data.get('id')
-            if not chapter_id: continue
+            chapter_index = build_chapter_index(chapter_data)
 
             chapter_output_content = OrderedDict()
 
             # 收集与本章节ID匹配的 chapter.* 语言条目
-            chapter_prefix = f"chapter.{chapter_id}"
-            for key, value in chapters_lang_data.items():
-                if key.startswith(chapter_prefix):
-                    chapter_output_content[key] = value
+            chapter_output_content.update(slices.get(("chapter.", chapter_id), ()))
 
             # 提取章节顶层的 images.hover
             if 'images' in chapter_data and isinstance(chapter_data['images'], list):
@@ -393,30 +1182,23 @@ def process_chapter_quests(chapters_dir, chapters_lang_data, quests_data, tasks_
                 quest_id = quest.get('id')
                 if not quest_id: continue
 
-                quest_prefix = f"quest.{quest_id}."
-                for key, value in quests_data.items():
-                    if key.startswith(quest_prefix):
-                        chapter_output_content[key] = value
+                chapter_output_content.update(slices.get(("quest.", quest_id), ()))
 
                 # 从任务和奖励中提取基于组件的翻译
-                process_item_list_for_components(quest.get('tasks', []), 'tasks', chapter_output_content)
-                process_item_list_for_components(quest.get('rewards', []), 'rewards', chapter_output_content)
+                process_item_list_for_components(quest.get('tasks', []), 'tasks', chapter_output_content,
+                                                 chapter_index)
+                process_item_list_for_components(quest.get('rewards', []), 'rewards', chapter_output_content,
+                                                 chapter_index)
 
                 for task in quest.get('tasks', []):
                     task_id = task.get('id')
                     if not task_id: continue
-                    task_prefix = f"task.{task_id}."
-                    for key, value in tasks_data.items():
-                        if key.startswith(task_prefix):
-                            chapter_output_content[key] = value
+                    chapter_output_content.update(slices.get(("task.", task_id), ()))
 
                 for reward in quest.get('rewards', []):
                     reward_id = reward.get('id')
                     if not reward_id: continue
-                    reward_prefix = f"reward.{reward_id}."
-                    for key, value in rewards_data.items():
-                        if key.startswith(reward_prefix):
-                            chapter_output_content[key] = value
+                    chapter_output_content.update(slices.get(("reward.", reward_id), ()))
                     # 提取 reward.feedback_message
                     if 'feedback_message' in reward:
                         feedback_value = reward['feedback_message']
@@ -430,30 +1212,161 @@ def process_chapter_quests(chapters_dir, chapters_lang_data, quests_data, tasks_
 
             if not chapter_output_content: continue
 
-            # 使用增强的排序逻辑对本章的所有条目进行排序
+            # 使用增强的排序逻辑对本章的所有条目进行排序；语言文件中的条目复用拆分时的解析结果，
+            # 从章节文件中提取的条目（components、hover 等）在此解析
+            parsed_keys = {entry_store.keys[i]: entry_store.parsed(i) for view in views.values() for i in view}
             sorted_items = sorted(
                 chapter_output_content.items(),
-                key=lambda item: create_sort_key(item, SORT_ORDER_CONFIG, task_to_quest_map, reward_to_quest_map)
+                key=lambda item: create_parsed_sort_key(
+                    item[0], parsed_keys[item[0]] if item[0] in parsed_keys else parse_lang_key(item[0]),
+                    SORT_ORDER_CONFIG, task_to_quest_map, reward_to_quest_map)
             )
-            chapter_output_content = OrderedDict(sorted_items)
-
-            cleaned_filename = filename.removesuffix(".snbt")
-            output_filename = f"en_us_{cleaned_filename}.json"
-
-            output_path = os.path.join(output_dir, output_filename)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(chapter_output_content, f, ensure_ascii=False, indent=4)
-            print(f"  -> 成功导出 {len(chapter_output_content)} 条已排序的语言条目到: {output_path}")
+            del chapter_output_content, parsed_keys, slices
+
+            with open_json_writer(output_path, incremental, buffers, persist,
+                                  previous.get('output_sha256')) as writer:
+                writer.write_items(sorted_items)
+            info['output'] = output_filename
+            info['output_sha256'] = getattr(writer, 'sha256', None)
+            profiler.count("chapters_exported")
+            if writer.changed:
+                written_files.append(output_path)
+                print(f"  -> 成功导出 {writer.count} 条已排序的语言条目到: {output_path}")
+            else:
+                print(f"  -> {output_path} 内容未变化，保持原文件不变。")
 
         except Exception as e:
+            # 出错的章节不写入清单，下次运行时会重新处理
+            new_manifest_entries.pop(filename, None)
             print(f"  -> 处理文件 {filename} 时发生错误: {e}")
+        finally:
+            for view in views.values():
+                entry_store.release(view)
+
+    # 增量模式下，章节文件已被删除的输出 JSON 一并删除，避免残留过期条目
+    # （只看章节文件是否存在：解析失败的章节不在 chapter_infos 中，但其输出仍需保留）
+    if incremental and persist:
+        for filename, previous in previous_entries.items():
+            if previous.get('output') and not os.path.exists(os.path.join(chapters_dir, filename)):
+                stale_path = os.path.join(output_dir, previous['output'])
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+                    print(f"  -> 章节 {filename} 已不存在，删除其输出文件: {stale_path}")
+
+    return written_files, new_manifest_entries
+
+
+def build_chapter_index(chapter_data) -> dict:
+    """
+    单次遍历章节数据，建立按ID直接定位节点的索引：
+      entries: 按先序遍历顺序排列的所有携带ID的字典节点，每项为
+               {'id': ID, 'node': 节点, 'holders': [...], 'components': [...]}，其中
+               holders 为该节点下最近一层的 components（回填时使用，不再深入 components 所在的字典），
+               components 为该节点下任意深度的 components 字典（拆分时使用）；
+      nodes:   {ID: [entry, ...]}。
+    """
+    entries = []
+    nodes = {}
+
+    def visit(data, active_entries, enclosing_entries):
+        if isinstance(data, dict):
+            item_id = data.get('id')
+            if item_id:
+                entry = {'id': item_id, 'node': data, 'holders': [], 'components': []}
+                entries.append(entry)
+                nodes.setdefault(item_id, []).append(entry)
+                active_entries = active_entries + (entry,)
+                enclosing_entries = enclosing_entries + (entry,)
+            if 'components' in data:
+                components = data['components']
+                for owner in active_entries:
+                    owner['holders'].append(components)
+                if isinstance(components, dict):
+                    for owner in enclosing_entries:
+                        owner['components'].append(components)
+                # 回填时 components 所在字典即为终点，其下的节点只会匹配自身的ID
+                active_entries = ()
+            for value in data.values():
+                visit(value, active_entries, enclosing_entries)
+        elif isinstance(data, list):
+            for element in data:
+                visit(element, active_entries, enclosing_entries)
+
+    visit(chapter_data, (), ())
+    return {'entries': entries, 'nodes': nodes}
+
+
+def find_index_entry(chapter_index: dict, node):
+    """返回章节索引中与给定节点对应的条目，未找到时返回 None。"""
+    for entry in chapter_index['nodes'].get(node.get('id'), ()):
+        if entry['node'] is node:
+            return entry
+    return None
+
+
+def collect_chapter_ids(chapter_index: dict) -> list:
+    """返回章节索引中所有节点的ID，用于判断哪些翻译条目与该章节相关。"""
+    return sorted({str(item_id) for item_id in chapter_index['nodes']})
 
 
-def update_chapter_files_with_components(component_data, input_chapters_dir, output_chapters_dir, snbt_replacements: dict):
+def apply_embedded_translations(chapter_data, mods_by_id, feedback_mods_by_id, hover_mods_by_chapter_id,
+                                multiline_keys: set, assign, updated_ids: set, chapter_index: dict = None) -> bool:
+    """
+    将内嵌文本（hover、feedback_message、components 中的 custom_name/lore）应用到一个章节的数据结构上。
+    实际写入通过 assign(container, key, value) 完成，value 为 str 或 list[str]，
+    因此同一套逻辑既可用于源码区间修补，也可用于 ftb_snbt_lib 的标签树。
+    multiline_keys 为需要始终以列表形式写回的原始键（如 'reward.<ID>.feedback_message'）。
+    需要修改的节点通过章节索引直接定位（未提供 chapter_index 时现场构建）。
+    返回该章节是否有内容被修改；找到 components 或 feedback_message 的ID会加入 updated_ids。
+    """
+    file_was_modified = False
+    chapter_id = chapter_data.get('id')
+    if chapter_index is None:
+        chapter_index = build_chapter_index(chapter_data)
+
+    # 更新 hover
+    if chapter_id in hover_mods_by_chapter_id:
+        images_list = chapter_data.get('images', [])
+        for img_idx, lines in hover_mods_by_chapter_id[chapter_id].items():
+            if 0 <= img_idx < len(images_list):
+                original_key = f'chapter.{chapter_id}.image.{img_idx}.hover'
+                is_multiline = original_key in multiline_keys
+                assign(images_list[img_idx], 'hover', lines if is_multiline or len(lines) > 1 else lines[0])
+                file_was_modified = True
+
+    # 按先序遍历顺序处理所有携带ID的节点：先更新 feedback_message，再更新其下的 components
+    for entry in chapter_index['entries']:
+        item_id = entry['id']
+        if item_id in feedback_mods_by_id:
+            lines = feedback_mods_by_id[item_id]
+            is_multiline = f'reward.{item_id}.feedback_message' in multiline_keys
+            assign(entry['node'], 'feedback_message', lines if is_multiline or len(lines) > 1 else lines[0])
+            file_was_modified = True
+            updated_ids.add(item_id)
+
+        if item_id in mods_by_id and entry['holders']:
+            modifications = mods_by_id[item_id]
+            for components in entry['holders']:
+                if 'name' in modifications:
+                    assign(components, 'minecraft:custom_name', modifications['name'])
+                    file_was_modified = True
+                if 'lore' in modifications:
+                    assign(components, 'minecraft:lore', modifications['lore'])
+                    file_was_modified = True
+            updated_ids.add(item_id)
+
+    return file_was_modified
+
+
+def update_chapter_files_with_components(component_data, input_chapters_dir, output_chapters_dir, snbt_replacements: dict,
+                                         manifest_file: str = None, cache: InputCache = None):
     """
     将来自JSON的翻译（components, hover, feedback_message）更新回其原始的章节SNBT文件。
     从 input_chapters_dir 读取，并写入到 output_chapters_dir。
     新增 snbt_replacements 参数用于在写入前执行批量文本替换。
+    提供 manifest_file 时启用增量模式：清单中记录每个章节的源文件摘要、所含ID以及相关翻译的摘要，
+    源文件与相关翻译均未变化的章节不会被重新解析和写入，输出文件保持原样。
+    增量模式下提供 cache 时，未变化的章节源文件连读取都会跳过。
     """
     if not component_data:
         return
@@ -468,6 +1381,8 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
     mods_by_id = {}
     feedback_mods_by_id = {}
     hover_mods_by_chapter_id = {}
+    # 按所属ID（物品/奖励ID或章节ID）记录原始条目，用于增量模式下计算各章节的翻译摘要
+    raw_entries_by_id = {}
 
     lore_pattern = re.compile(r'^(?:tasks|rewards)\.([0-9A-F]+)\.lore(\d+)$')
     name_pattern = re.compile(r'^(?:tasks|rewards)\.([0-9A-F]+)\.custom_name$')
@@ -480,11 +1395,13 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
         if name_match:
             item_id = name_match.group(1)
             mods_by_id.setdefault(item_id, {})['name'] = value
+            raw_entries_by_id.setdefault(item_id, []).append((key, value))
             continue
         lore_match = lore_pattern.match(key)
         if lore_match:
             item_id, lore_index = lore_match.groups()
             mods_by_id.setdefault(item_id, {}).setdefault('lore', []).append((int(lore_index), value))
+            raw_entries_by_id.setdefault(item_id, []).append((key, value))
             continue
 
         # feedback_message
@@ -492,6 +1409,7 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
         if feedback_match:
             item_id, num = feedback_match.groups()
             feedback_mods_by_id.setdefault(item_id, []).append((int(num) if num else 0, value))
+            raw_entries_by_id.setdefault(item_id, []).append((key, value))
             continue
 
         # hover
@@ -500,6 +1418,7 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
             chapter_id, image_index, num = hover_match.groups()
             hover_mods_by_chapter_id.setdefault(chapter_id, {}).setdefault(int(image_index), []).append(
                 (int(num) if num else 0, value))
+            raw_entries_by_id.setdefault(chapter_id, []).append((key, value))
 
     # 对多行文本进行排序
     for item_id in mods_by_id:
@@ -515,93 +1434,115 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
             hover_mods_by_chapter_id[chapter_id][image_index] = [v for _, v in
                                                                  hover_mods_by_chapter_id[chapter_id][image_index]]
 
+    # 预先确定哪些 hover/feedback_message 原本为多行（存在以 "<原始键>1" 开头的键），写回时保持列表形式
+    sorted_keys = sorted(component_data.keys())
+
+    def has_key_with_prefix(prefix):
+        position = bisect.bisect_left(sorted_keys, prefix)
+        return position < len(sorted_keys) and sorted_keys[position].startswith(prefix)
+
+    candidate_keys = [f'reward.{item_id}.feedback_message' for item_id in feedback_mods_by_id]
+    candidate_keys += [f'chapter.{chapter_id}.image.{image_index}.hover'
+                       for chapter_id, images in hover_mods_by_chapter_id.items() for image_index in images]
+    multiline_keys = {key for key in candidate_keys if has_key_with_prefix(key + '1')}
+    del sorted_keys
+
     # 2. 遍历章节文件，应用修改
     modified_files_count = 0
+    skipped_files_count = 0
     updated_ids = set()
 
+    incremental = bool(manifest_file)
+    manifest_params = {
+        'input_chapters_dir': os.path.normpath(input_chapters_dir),
+        'output_chapters_dir': os.path.normpath(output_chapters_dir),
+    }
+    previous_entries = load_manifest(manifest_file, MERGE_MANIFEST_VERSION, **manifest_params) if incremental else {}
+    new_manifest_entries = {}
+    replacements_digest = hash_parts(snbt_replacements)
+
     for filename in os.listdir(input_chapters_dir):
         if not filename.endswith('.snbt'): continue
 
         input_file_path = os.path.join(input_chapters_dir, filename)
+        output_file_path = os.path.join(output_chapters_dir, filename)
         try:
-            with open(input_file_path, 'r', encoding='utf-8') as f:
-                snbt_data = snbtlib.loads(f.read())
-
-            file_was_modified = [False]
-            chapter_id = snbt_data.get('id')
-
-            # 更新 hover
-            if chapter_id in hover_mods_by_chapter_id:
-                images_list = snbt_data.get('images', List())
-                for img_idx, lines in hover_mods_by_chapter_id[chapter_id].items():
-                    if 0 <= img_idx < len(images_list):
-                        original_key = f'chapter.{chapter_id}.image.{img_idx}.hover'
-                        is_multiline = any(k.startswith(original_key + '1') for k in component_data.keys())
-
-                        if is_multiline or len(lines) > 1:
-                            # 将 list[str] 转换为 List[String]
-                            images_list[img_idx]['hover'] = List([String(line) for line in lines])
-                        else:
-                            # 将 str 转换为 String
-                            images_list[img_idx]['hover'] = String(lines[0])
-                        file_was_modified[0] = True
-
-            def find_and_update_components_recursively(data, item_id, comp_mods):
-                if item_id not in comp_mods: return
-                modifications = comp_mods[item_id]
-
-                if isinstance(data, dict):
-                    if 'components' in data:
-                        if 'name' in modifications:
-                            # 将 str 转换为 String，无需手动转义
-                            data['components'][String('minecraft:custom_name')] = String(modifications['name'])
-                            file_was_modified[0] = True
-                        if 'lore' in modifications:
-                            # 将 list[str] 转换为 List[String]，无需手动转义
-                            data['components'][String('minecraft:lore')] = List(
-                                [String(line) for line in modifications['lore']])
-                            file_was_modified[0] = True
-                        updated_ids.add(item_id)
-                        return
-
-                    for v in data.values():
-                        find_and_update_components_recursively(v, item_id, comp_mods)
-                elif isinstance(data, list):
-                    for elem in data:
-                        find_and_update_components_recursively(elem, item_id, comp_mods)
-
-            def traverse_and_apply(data, comp_mods, feed_mods):
-                if isinstance(data, dict):
-                    item_id = data.get('id')
-                    if item_id:
-                        # 更新 feedback_message
-                        if item_id in feed_mods:
-                            lines = feed_mods[item_id]
-                            original_key = f'reward.{item_id}.feedback_message'
-                            is_multiline = any(k.startswith(original_key + '1') for k in component_data.keys())
-                            if is_multiline or len(lines) > 1:
-                                data['feedback_message'] = List([String(line) for line in lines])
-                            else:
-                                data['feedback_message'] = String(lines[0])
-                            file_was_modified[0] = True
-                            updated_ids.add(item_id)
-
-                        # 更新 components (在子项中递归搜索)
-                        if item_id in comp_mods:
-                            find_and_update_components_recursively(data, item_id, comp_mods)
-
-                    # 无论如何，继续遍历整个结构
-                    for value in data.values():
-                        traverse_and_apply(value, comp_mods, feed_mods)
-                elif isinstance(data, list):
-                    for item in data:
-                        traverse_and_apply(item, comp_mods, feed_mods)
-
-            traverse_and_apply(snbt_data, mods_by_id, feedback_mods_by_id)
-
-            if file_was_modified[0]:
-                snbt_output_string = snbtlib.dumps(snbt_data)
-                
+            chapter_text = None
+            if not (incremental and cache is not None):
+                with open(input_file_path, 'r', encoding='utf-8') as f:
+                    chapter_text = f.read()
+
+            patcher = None
+            chapter_index = None
+            previous = previous_entries.get(filename, {})
+            if incremental:
+                # 源文件未变化时直接复用清单中的ID列表，无需解析
+                if chapter_text is None:
+                    source_sha256 = cache.get(input_file_path, text_file_sha256, "sha256")
+                else:
+                    source_sha256 = hashlib.sha256(chapter_text.encode('utf-8')).hexdigest()
+                if previous.get('source_sha256') == source_sha256:
+                    chapter_ids = previous['ids']
+                else:
+                    if chapter_text is None:
+                        with open(input_file_path, 'r', encoding='utf-8') as f:
+                            chapter_text = f.read()
+                    try:
+                        patcher = ChapterSpanPatcher(chapter_text)
+                        chapter_index = build_chapter_index(patcher.tree)
+                        chapter_ids = collect_chapter_ids(chapter_index)
+                    except SnbtSpanError:
+                        chapter_ids = collect_chapter_ids(build_chapter_index(snbtlib.loads(chapter_text)))
+                translations_sha256 = hash_parts(
+                    source_sha256, replacements_digest,
+                    [raw_entries_by_id.get(item_id, []) for item_id in chapter_ids]
+                )
+                entry = {
+                    'source_sha256': source_sha256,
+                    'ids': chapter_ids,
+                    'translations_sha256': translations_sha256,
+                }
+                if (previous.get('translations_sha256') == translations_sha256
+                        and (not previous.get('written') or os.path.exists(output_file_path))):
+                    entry['written'] = previous.get('written', False)
+                    entry['updated_ids'] = previous.get('updated_ids', [])
+                    new_manifest_entries[filename] = entry
+                    updated_ids.update(entry['updated_ids'])
+                    skipped_files_count += 1
+                    profiler.count("chapters_skipped")
+                    continue
+
+            # 优先按源码区间修补：只替换被翻译的字符串节点，其余内容保持原样；
+            # 语法超出支持范围或需要新增键时，回退为完整解析并重新序列化
+            updated_ids_before = set(updated_ids)
+            snbt_output_string = None
+            if chapter_text is None:
+                with open(input_file_path, 'r', encoding='utf-8') as f:
+                    chapter_text = f.read()
+            try:
+                if patcher is None:
+                    patcher = ChapterSpanPatcher(chapter_text)
+                file_was_modified = apply_embedded_translations(
+                    patcher.tree, mods_by_id, feedback_mods_by_id, hover_mods_by_chapter_id, multiline_keys,
+                    patcher.assign, updated_ids, chapter_index
+                )
+                if file_was_modified:
+                    snbt_output_string = patcher.render()
+            except SnbtSpanError as e:
+                print(f"  -> {filename} 无法按区间修补（{e}），改为完整解析并重新序列化。")
+                profiler.count("chapters_redumped")
+                updated_ids.clear()
+                updated_ids.update(updated_ids_before)
+                snbt_data = snbtlib.loads(chapter_text)
+                file_was_modified = apply_embedded_translations(
+                    snbt_data, mods_by_id, feedback_mods_by_id, hover_mods_by_chapter_id, multiline_keys,
+                    assign_snbt_tag, updated_ids
+                )
+                if file_was_modified:
+                    snbt_output_string = snbtlib.dumps(snbt_data)
+            del chapter_text, patcher, chapter_index
+
+            if file_was_modified:
                 # --- 新增：在这里应用批量文本替换 ---
                 if snbt_replacements:
                     replacements_applied_count = 0
@@ -615,16 +1556,24 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
                         print(f"    -> 在 {filename} 中应用了 {replacements_applied_count} 次文本替换。")
                 # --- 替换逻辑结束 ---
 
-                output_file_path = os.path.join(output_chapters_dir, filename)
-                with open(output_file_path, 'w', encoding='utf-8') as f:
+                with atomic_open(output_file_path, only_if_changed=incremental) as f:
                     f.write(snbt_output_string)
                 print(f"  -> 已将更新后的 {filename} 写入到: {output_file_path}")
                 modified_files_count += 1
+                profiler.count("chapters_updated")
+
+            if incremental:
+                entry['written'] = file_was_modified
+                entry['updated_ids'] = sorted(updated_ids - updated_ids_before)
+                new_manifest_entries[filename] = entry
         except Exception as e:
             import traceback
             print(f"  -> 更新文件 {filename} 时出错: {e}")
             traceback.print_exc()
 
+    if incremental:
+        save_manifest(manifest_file, MERGE_MANIFEST_VERSION, new_manifest_entries, **manifest_params)
+        print(f"增量模式：{skipped_files_count} 个章节文件的翻译未变化，已跳过。")
     print(f"更新完成。共修改了 {modified_files_count} 个文件。")
     all_updated_ids = updated_ids.union(set(feedback_mods_by_id.keys()))
     all_ids_to_update = set(mods_by_id.keys()).union(set(feedback_mods_by_id.keys()))
@@ -633,20 +1582,55 @@ def update_chapter_files_with_components(component_data, input_chapters_dir, out
         print(f"警告：在任何章节文件中都找不到以下 {len(remaining_ids)} 个物品ID：{', '.join(remaining_ids)}")
 
 
-def merge_all_to_snbt(json_dir: str, output_snbt_file: str, chapters_dir: str, output_chapters_dir: str):
+def merge_all_to_snbt(json_dir: str, output_snbt_file: str, chapters_dir: str, output_chapters_dir: str,
+                      manifest_file: str = None, cache: InputCache = None):
     """
     合并所有JSON文件为单个SNBT文件。
     如果提供了chapters_dir，则会将内嵌文本更新回原始章节文件，
     并从最终的语言文件中排除这些条目。
+    提供 manifest_file 时启用增量合并：只重写翻译发生变化的章节文件，
+    内容未变化的输出文件（包括 SNBT 语言文件）保持原样。
+    cache 为 watch 模式或 sync_pipeline.py 中共用的 InputCache，未变化的 JSON 文件与章节文件直接复用上次的读取结果。
     """
     print(f"--- 2. 开始从 {json_dir} 合并所有 JSON 文件到 SNBT ---")
     if not os.path.isdir(json_dir):
         print(f"错误：JSON目录 '{json_dir}' 不存在。无法合并。")
         return
 
+    combined_data = OrderedDict()
+    json_files = sorted([f for f in os.listdir(json_dir) if f.endswith('.json') and not f.startswith('.')])
+    for filename in json_files:
+        filepath = os.path.join(json_dir, filename)
+        try:
+            with profiler.stage("merge_load_json"):
+                data = cache.get(filepath, load_json_file, "json") if cache is not None else load_json_file(filepath)
+                combined_data.update(data)
+                profiler.count("json_files_loaded")
+                profiler.count("json_keys_loaded", len(data))
+                print(f"  -> 已加载 {len(data)} 条条目从: {filename}")
+        except Exception as e:
+            print(f"  -> 警告：读取或解析 {filepath} 失败: {e}")
+
+    merge_translations_to_snbt(combined_data, output_snbt_file, chapters_dir, output_chapters_dir, manifest_file,
+                               cache)
+
+
+def load_json_file(path: str) -> OrderedDict:
+    """按原始顺序读取一个 JSON 语言文件（兼容 BOM）。"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def merge_translations_to_snbt(combined_data: dict, output_snbt_file: str, chapters_dir: str,
+                               output_chapters_dir: str, manifest_file: str = None, cache: InputCache = None):
+    """
+    将已合并的翻译映射（键 -> 值，与拆分出的 JSON 文件中的条目相同）写入 SNBT 语言文件与章节文件。
+    merge_all_to_snbt 从 JSON 目录读取后调用本函数；para2github 等调用方也可以直接传入内存中的翻译，
+    省去写出、读回再删除 JSON 文件的过程。其余参数与 merge_all_to_snbt 相同。
+    """
     # --- 新增：加载 SNBT 文本替换规则 ---
     snbt_replacements = {}
-    replacements_file = ".github/configs/replace_rule.json"
+    replacements_file = REPLACE_RULES_FILE
     if os.path.exists(replacements_file):
         try:
             with open(replacements_file, 'r', encoding='utf-8') as f:
@@ -661,18 +1645,6 @@ def merge_all_to_snbt(json_dir: str, output_snbt_file: str, chapters_dir: str, o
         print("  -> 未找到 snbt_replacements.json 文件，跳过 SNBT 文本替换步骤。")
     # --- 加载逻辑结束 ---
 
-    combined_data = OrderedDict()
-    json_files = sorted([f for f in os.listdir(json_dir) if f.endswith('.json')])
-    for filename in json_files:
-        filepath = os.path.join(json_dir, filename)
-        try:
-            with open(filepath, 'r', encoding='utf-8-sig') as f:
-                data = json.load(f, object_pairs_hook=OrderedDict)
-                combined_data.update(data)
-                print(f"  -> 已加载 {len(data)} 条条目从: {filename}")
-        except Exception as e:
-            print(f"  -> 警告：读取或解析 {filepath} 失败: {e}")
-
     if not combined_data:
         print("错误：没有加载到任何数据，无法生成 SNBT 文件。")
         return
@@ -695,7 +1667,9 @@ def merge_all_to_snbt(json_dir: str, output_snbt_file: str, chapters_dir: str, o
     # 更新章节 SNBT 文件（如果需要）
     if chapters_dir and embedded_data:
         # 将加载的替换规则传递下去
-        update_chapter_files_with_components(embedded_data, chapters_dir, output_chapters_dir, snbt_replacements)
+        with profiler.stage("merge_update_chapters"):
+            update_chapter_files_with_components(embedded_data, chapters_dir, output_chapters_dir, snbt_replacements,
+                                                 manifest_file, cache)
 
     print("\n开始重构多行文本条目...")
 
@@ -730,37 +1704,16 @@ def merge_all_to_snbt(json_dir: str, output_snbt_file: str, chapters_dir: str, o
     sorted_items = sorted(reconstructed_data.items())
     print(f"\n总共合并了 {len(sorted_items)} 条最终条目，并已按键名排序。")
 
-    snbt_ready_data = Compound()  # 使用 Compound 而不是 dict
-    for key, value in sorted_items:
-        if isinstance(value, list):
-            # 将 list[str] 转换为 List[String]
-            # 无需手动转义
-            snbt_ready_data[key] = List([String(str(line)) for line in value])
-        elif isinstance(value, str):
-            # 将 str 转换为 String
-            # 无需手动转义
-            snbt_ready_data[key] = String(value)
-        else:
-            snbt_ready_data[key] = String(str(value))
-
     try:
-        # 现在 snbt_ready_data 是一个 Compound 对象，dumps 可以正确处理
-        snbt_output_string = snbtlib.dumps(snbt_ready_data)
-        
-        # 注意：这里的批量替换只影响章节文件，不影响最终的 lang/zh_cn.snbt 文件。
-        # 如果也需要替换 lang 文件，需要在此处添加类似上面的替换逻辑。
-        # 目前根据需求，只在章节文件层面替换。
-
-        if not snbt_output_string.strip() or snbt_output_string.strip() == "{}":
-            print("警告：snbtlib.dumps 返回了空或空的 Compound 字符串。检查 reconstructed_data 是否为空。")
-            if not reconstructed_data: return
-
+        # 直接流式写出 SNBT 文本，格式与 snbtlib.dumps 完全一致，无需构建 Compound 标签树
+        # 注意：批量文本替换只影响章节文件，不影响最终的 lang/zh_cn.snbt 文件。
         output_dir = os.path.dirname(output_snbt_file)
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
-            
-        with open(output_snbt_file, 'w', encoding='utf-8') as f:
-            f.write(snbt_output_string)
+
+        with profiler.stage("merge_write_lang"), atomic_open(output_snbt_file,
+                                                             only_if_changed=bool(manifest_file)) as f:
+            write_flat_lang_snbt(f, sorted_items)
         print(f"成功将所有条目合并并写入到: {output_snbt_file}")
     except Exception as e:
         import traceback
@@ -770,6 +1723,69 @@ def merge_all_to_snbt(json_dir: str, output_snbt_file: str, chapters_dir: str, o
     print("--- 合并完成 ---")
 
 
+# --- 监视模式 ---
+def text_file_sha256(path: str) -> str:
+    """以文本方式读取文件并计算 SHA-256（与增量清单中 source_sha256 的算法相同）。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return hashlib.sha256(f.read().encode('utf-8')).hexdigest()
+
+
+def snapshot_inputs(files, dirs) -> dict:
+    """
+    返回被监视输入的快照 {路径: (mtime, 大小)}。
+    files 为单个文件路径；dirs 为 (目录, 后缀) 对，只记录目录中（不含子目录）以该后缀结尾、不以 "." 开头的文件。
+    不存在的路径不计入快照，其出现或消失同样会被视为变化。
+    """
+    snapshot = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+    for directory, suffix in dirs:
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.endswith(suffix) and not entry.name.startswith('.') and entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+    return snapshot
+
+
+def watch_inputs(run, files, dirs, interval: float = 0.5):
+    """
+    轮询输入文件，启动时与每次检测到变化时调用 run(cache)，直到按下 Ctrl+C。
+    cache 为整个监视期间共用的 InputCache。检测到变化后等待快照稳定（编辑器可能分多次写入）再处理。
+    """
+    cache = InputCache()
+    previous = None
+    try:
+        while True:
+            snapshot = snapshot_inputs(files, dirs)
+            if snapshot != previous:
+                if previous is not None:
+                    # 等待写入完成：连续两次快照一致才开始处理
+                    time.sleep(interval)
+                    settled = snapshot_inputs(files, dirs)
+                    if settled != snapshot:
+                        continue
+                    changed = sorted(path for path in snapshot.keys() | previous.keys()
+                                     if snapshot.get(path) != previous.get(path))
+                    print(f"\n检测到 {len(changed)} 个文件变化: {', '.join(os.path.basename(p) for p in changed[:5])}"
+                          f"{' 等' if len(changed) > 5 else ''}")
+                start = time.perf_counter()
+                run(cache)
+                profiler.count("watch_rebuilds")
+                print(f"处理完成，耗时 {time.perf_counter() - start:.2f}s。继续监视中（Ctrl+C 退出）...")
+                previous = snapshot
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n已停止监视。")
+
+
 if __name__ == "__main__":
     def main_cli():
         """主函数，用于解析命令行参数并执行相应任务。"""
@@ -780,39 +1796,72 @@ if __name__ == "__main__":
         DEFAULT_JSON_OUTPUT_DIR = "output_json"
         DEFAULT_MERGED_SNBT_FILE = "lang/zh_cn.snbt"
         DEFAULT_MODIFIED_CHAPTERS_DIR = "modified_chapters"
+        DEFAULT_WATCH_INTERVAL = 0.5
+
+        def add_split_arguments(parser_split, watch=False):
+            parser_split.add_argument('--source-lang', default=DEFAULT_SOURCE_LANG_FILE,
+                                      help=f'指定源语言 SNBT 文件的路径。默认: {DEFAULT_SOURCE_LANG_FILE}')
+            parser_split.add_argument('--chapters-dir', default=DEFAULT_CHAPTERS_DIR,
+                                      help=f'指定包含章节定义的 SNBT 文件的目录。默认: {DEFAULT_CHAPTERS_DIR}')
+            parser_split.add_argument('--chapter-groups', default=DEFAULT_CHAPTER_GROUPS_FILE,
+                                      help=f'指定章节组定义文件的路径。默认: {DEFAULT_CHAPTER_GROUPS_FILE}')
+            parser_split.add_argument('--output-dir', default=DEFAULT_JSON_OUTPUT_DIR,
+                                      help=f'指定输出 JSON 文件的目录。默认: {DEFAULT_JSON_OUTPUT_DIR}')
+            parser_split.add_argument(
+                '--flatten-single-lines',
+                action='store_true',
+                help='当 SNBT 列表只有一个元素时，将其展平为不带数字后缀的键值对。'
+            )
+            if not watch:
+                parser_split.add_argument(
+                    '--incremental',
+                    action='store_true',
+                    help=f'增量拆分：只重新生成输入发生变化的章节 JSON 文件（清单保存在输出目录的 {SPLIT_MANIFEST_FILE} 中）。'
+                )
+
+        def add_merge_arguments(parser_merge, watch=False):
+            parser_merge.add_argument('--json-dir', default=DEFAULT_JSON_OUTPUT_DIR,
+                                      help=f'指定包含 JSON 文件的目录。默认: {DEFAULT_JSON_OUTPUT_DIR}')
+            parser_merge.add_argument('--output-snbt', default=DEFAULT_MERGED_SNBT_FILE,
+                                      help=f'指定最终输出的 SNBT 文件的路径。默认: {DEFAULT_MERGED_SNBT_FILE}')
+            parser_merge.add_argument('--chapters-dir', default=DEFAULT_CHAPTERS_DIR,
+                                      help=f'指定用于更新的输入章节 SNBT 目录。如果提供此项，将启用 component 更新功能。默认: {DEFAULT_CHAPTERS_DIR}')
+            parser_merge.add_argument('--output-chapters-dir', default=DEFAULT_MODIFIED_CHAPTERS_DIR,
+                                      help=f'指定更新后的章节 SNBT 文件的输出目录。默认: {DEFAULT_MODIFIED_CHAPTERS_DIR}')
+            parser_merge.add_argument('--manifest', default=None,
+                                      help='指定增量合并清单文件的路径。提供此项时只重写翻译发生变化的章节文件。'
+                                           + ('监视模式下未指定时使用临时清单。' if watch else ''))
+
+        def add_watch_arguments(parser_watch_task):
+            parser_watch_task.add_argument('--interval', type=float, default=DEFAULT_WATCH_INTERVAL,
+                                           help=f'轮询输入文件的间隔（秒）。默认: {DEFAULT_WATCH_INTERVAL}')
 
         parser = argparse.ArgumentParser(description="FTB Quests 语言文件拆分与合并工具。")
         subparsers = parser.add_subparsers(dest='task', required=True,
-                                           help='选择要执行的任务: split (拆分), merge (合并)')
+                                           help='选择要执行的任务: split (拆分), merge (合并), watch (监视并自动处理)')
 
         # --- 拆分任务的参数 ---
         parser_split = subparsers.add_parser('split', help='将源 SNBT 语言文件拆分为多个 JSON 文件。')
-        parser_split.add_argument('--source-lang', default=DEFAULT_SOURCE_LANG_FILE,
-                                  help=f'指定源语言 SNBT 文件的路径。默认: {DEFAULT_SOURCE_LANG_FILE}')
-        parser_split.add_argument('--chapters-dir', default=DEFAULT_CHAPTERS_DIR,
-                                  help=f'指定包含章节定义的 SNBT 文件的目录。默认: {DEFAULT_CHAPTERS_DIR}')
-        parser_split.add_argument('--chapter-groups', default=DEFAULT_CHAPTER_GROUPS_FILE,
-                                  help=f'指定章节组定义文件的路径。默认: {DEFAULT_CHAPTER_GROUPS_FILE}')
-        parser_split.add_argument('--output-dir', default=DEFAULT_JSON_OUTPUT_DIR,
-                                  help=f'指定输出 JSON 文件的目录。默认: {DEFAULT_JSON_OUTPUT_DIR}')
-        parser_split.add_argument(
-            '--flatten-single-lines',
-            action='store_true',
-            help='当 SNBT 列表只有一个元素时，将其展平为不带数字后缀的键值对。'
-        )
+        add_split_arguments(parser_split)
 
         # --- 合并任务的参数 (标准逻辑) ---
         parser_merge = subparsers.add_parser('merge', help='将多个 JSON 文件合并为一个 SNBT 语言文件。')
-        parser_merge.add_argument('--json-dir', default=DEFAULT_JSON_OUTPUT_DIR,
-                                  help=f'指定包含 JSON 文件的目录。默认: {DEFAULT_JSON_OUTPUT_DIR}')
-        parser_merge.add_argument('--output-snbt', default=DEFAULT_MERGED_SNBT_FILE,
-                                  help=f'指定最终输出的 SNBT 文件的路径。默认: {DEFAULT_MERGED_SNBT_FILE}')
-        parser_merge.add_argument('--chapters-dir', default=DEFAULT_CHAPTERS_DIR,
-                                  help=f'指定用于更新的输入章节 SNBT 目录。如果提供此项，将启用 component 更新功能。默认: {DEFAULT_CHAPTERS_DIR}')
-        parser_merge.add_argument('--output-chapters-dir', default=DEFAULT_MODIFIED_CHAPTERS_DIR,
-                                  help=f'指定更新后的章节 SNBT 文件的输出目录。默认: {DEFAULT_MODIFIED_CHAPTERS_DIR}')
+        add_merge_arguments(parser_merge)
+
+        # --- 监视模式的参数：常驻内存，输入变化时增量执行 split 或 merge ---
+        parser_watch = subparsers.add_parser('watch', help='监视输入文件，变化时自动增量拆分或合并。')
+        watch_subparsers = parser_watch.add_subparsers(dest='watch_task', required=True,
+                                                       help='选择要自动执行的任务: split (拆分), merge (合并)')
+        parser_watch_split = watch_subparsers.add_parser('split', help='源语言文件或章节文件变化时增量拆分。')
+        add_split_arguments(parser_watch_split, watch=True)
+        add_watch_arguments(parser_watch_split)
+        parser_watch_merge = watch_subparsers.add_parser('merge', help='JSON 文件或章节文件变化时增量合并。')
+        add_merge_arguments(parser_watch_merge, watch=True)
+        add_watch_arguments(parser_watch_merge)
+        profiler.add_profile_arguments(parser)
 
         args = parser.parse_args()
+        profiler.configure("LangSpliter", args)
 
         # --- 根据任务分派 ---
         if args.task == 'split':
@@ -821,15 +1870,55 @@ if __name__ == "__main__":
                 chapters_dir=args.chapters_dir,
                 chapter_groups_file=args.chapter_groups,
                 output_dir=args.output_dir,
-                flatten_single_lines=args.flatten_single_lines
+                flatten_single_lines=args.flatten_single_lines,
+                incremental=args.incremental
             )
         elif args.task == 'merge':
             merge_all_to_snbt(
                 json_dir=args.json_dir,
                 output_snbt_file=args.output_snbt,
                 chapters_dir=args.chapters_dir,
-                output_chapters_dir=args.output_chapters_dir
+                output_chapters_dir=args.output_chapters_dir,
+                manifest_file=args.manifest
+            )
+        elif args.watch_task == 'split':
+            print(f"正在监视 {args.source_lang} 与 {args.chapters_dir}，变化时增量拆分到 {args.output_dir}...")
+            watch_inputs(
+                lambda cache: split_and_process_all(
+                    source_lang_file=args.source_lang,
+                    chapters_dir=args.chapters_dir,
+                    chapter_groups_file=args.chapter_groups,
+                    output_dir=args.output_dir,
+                    flatten_single_lines=args.flatten_single_lines,
+                    incremental=True,
+                    cache=cache
+                ),
+                files=[args.source_lang, args.chapter_groups],
+                dirs=[(args.chapters_dir, '.snbt')],
+                interval=args.interval
             )
+        elif args.watch_task == 'merge':
+            # 增量合并依赖清单；未指定时使用仅在本次监视期间存在的临时清单
+            manifest_dir = None if args.manifest else tempfile.mkdtemp(prefix="langspliter_watch_")
+            manifest_file = args.manifest or os.path.join(manifest_dir, "merge_manifest.json")
+            print(f"正在监视 {args.json_dir} 与 {args.chapters_dir}，变化时增量合并到 {args.output_snbt}...")
+            try:
+                watch_inputs(
+                    lambda cache: merge_all_to_snbt(
+                        json_dir=args.json_dir,
+                        output_snbt_file=args.output_snbt,
+                        chapters_dir=args.chapters_dir,
+                        output_chapters_dir=args.output_chapters_dir,
+                        manifest_file=manifest_file,
+                        cache=cache
+                    ),
+                    files=[REPLACE_RULES_FILE],
+                    dirs=[(args.json_dir, '.json'), (args.chapters_dir, '.snbt')],
+                    interval=args.interval
+                )
+            finally:
+                if manifest_dir:
+                    shutil.rmtree(manifest_dir, ignore_errors=True)
 
 
     main_cli()
\ No newline at end of file
@@ -1,14 +1,16 @@
 import argparse
 import json
+import mmap
 import os
 import re
 import html
 import sys
 from collections.abc import Generator
 from dataclasses import dataclass
-from pathlib import Path
 from typing import Union
 
+from file_discovery import InputCache, iter_files, load_rules, read_text_file
+
 
 @dataclass
 class ErrorRecord:
@@ -35,10 +37,43 @@ def check_line_for_errors(
         yield ErrorRecord(file_path, key, line.strip(), "行尾包含非法字符 '&'")
 
 
-def check_json(file_path: str) -> Generator[ErrorRecord, None, None]:
+# 颜色代码错误都与 '&' 有关；JSON 中的 '&' 也可能以 \u0026 转义形式出现
+AMPERSAND_PATTERNS = (b"&", b"\\u0026")
+
+
+def may_contain_ampersand(file_path: str) -> bool:
+    """以内存映射方式在原始字节中查找 '&'，不解码、不解析 JSON"""
+    with open(file_path, "rb") as file:
+        try:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return any(data.find(pattern) != -1 for pattern in AMPERSAND_PATTERNS)
+        except ValueError:
+            # 空文件无法映射，其中也不可能有 '&'
+            return False
+
+
+def check_json(
+    file_path: str, text: Union[str, bytes] = None, strict_json: bool = False
+) -> Generator[ErrorRecord, None, None]:
+    """
+    检查一个 JSON 文件；提供 text 时直接检查该内容（如内存中的拆分结果或已缓存的文件），不再读取磁盘。
+    没有 '&' 的文件不解码也不解析；strict_json 为 True 时仍会解析这些文件以报告 JSON 格式错误。
+    """
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            json_data = json.load(file)
+        if text is None:
+            has_ampersand = may_contain_ampersand(file_path)
+            if not has_ampersand and not strict_json:
+                return
+            with open(file_path, "rb") as file:
+                text = file.read()
+        else:
+            patterns = AMPERSAND_PATTERNS if isinstance(text, bytes) else ("&", "\\u0026")
+            has_ampersand = any(pattern in text for pattern in patterns)
+            if not has_ampersand and not strict_json:
+                return
+        json_data = json.loads(text)
+        if not has_ampersand:
+            return
 
         def process_value(value: Union[str, list, dict], parent_key: str = ""):
             if isinstance(value, str):
@@ -65,15 +100,33 @@ def check_json(file_path: str) -> Generator[ErrorRecord, None, None]:
         yield ErrorRecord(file_path, "-", "-", f"打开或读取文件时出错：{str(e)}")
 
 
-def check_directory(dir_path: str) -> Generator[ErrorRecord, None, None]:
-    """递归检查指定目录下的所有 JSON 文件"""
+def check_file(
+    file_path: str, cache: InputCache = None, strict_json: bool = False
+) -> Generator[ErrorRecord, None, None]:
+    """检查一个 JSON 文件；提供 cache 时文件内容从中读取，同一进程内已读取或刚写入的文件无需再次访问磁盘"""
+    if cache is None:
+        yield from check_json(file_path, strict_json=strict_json)
+        return
+    try:
+        text = cache.get(file_path, read_text_file, "text")
+    except (OSError, UnicodeDecodeError):
+        # 交给 check_json 按原有方式读取并报告错误
+        text = None
+    yield from check_json(file_path, text, strict_json)
+
+
+def check_directory(
+    dir_path: str, cache: InputCache = None, strict_json: bool = False
+) -> Generator[ErrorRecord, None, None]:
+    """
+    递归检查指定目录下的所有 JSON 文件（规则见 modpack.json 中 fileDiscovery 的 colorCheck）。
+    cache 与 strict_json 的含义同 check_file 与 check_json。
+    """
     print(f"正在检查目录: {dir_path}")
     json_files_found = 0
-    for entry in Path(dir_path).rglob("*.json"):
-        if "patchouli_books" in entry.parts or "productivemetalworks" in entry.parts:
-            continue
+    for entry in iter_files(dir_path, load_rules("colorCheck")):
         json_files_found += 1
-        yield from check_json(str(entry))
+        yield from check_file(os.path.normpath(entry.path), cache, strict_json)
     if json_files_found == 0:
         print(f"在目录 {dir_path} 中未找到任何 .json 文件。")
 
@@ -185,6 +238,11 @@ def main():
         default="error_report.html",
         type=str,
     )
+    parser.add_argument(
+        "--strict-json",
+        help="同时解析不含 '&' 的文件以报告 JSON 格式错误（默认跳过这些文件）",
+        action="store_true",
+    )
 
     args = parser.parse_args()
     check_path = args.path
@@ -197,9 +255,9 @@ def main():
     errors: list[ErrorRecord] = []
 
     if os.path.isdir(check_path):
-        errors.extend(check_directory(check_path))
+        errors.extend(check_directory(check_path, strict_json=args.strict_json))
     elif os.path.isfile(check_path) and check_path.lower().endswith(".json"):
-        errors.extend(check_json(check_path))
+        errors.extend(check_json(check_path, strict_json=args.strict_json))
     else:
         print(
             f"错误: 无效的路径类型或文件格式 -> {check_path} (需要 .json 文件或目录)",
@@ -0,0 +1,247 @@
+"""
+共用的文件发现模块，供 github2para.py、check_ftb_colors.py、compare_archives.py 与 update_checker.py 使用。
+
+基于 os.scandir 遍历目录，规则来自 .github/configs/modpack.json 的 fileDiscovery（按用途配置）：
+    include     文件需匹配其中任一模式（为空表示全部文件）
+    exclude     按顺序匹配，最后一个匹配的模式生效；以 "!" 开头的模式表示重新包含
+                （与 exclusionPatterns 的语义相同）。被排除的目录直接剪枝、不再进入，
+                除非其后还有 "!" 模式（此时仍需进入目录逐个判断文件）
+
+模式语法: "*"、"?"、"[...]" 只匹配单个路径段内的字符，"**" 匹配任意层级的目录；
+默认从相对路径的右侧开始匹配（与 Path.match 相同，不含 "/" 的模式只匹配文件名），
+anchored=True 时需匹配从根目录开始的完整相对路径（与 glob 相同），
+此时 include 模式不可能命中的目录同样会被剪枝。
+
+遍历时取得的 stat 结果随 FileEntry 一同返回，调用方直接使用，无需再次访问文件系统。
+InputCache 在同一进程的多个处理阶段之间（如 sync_pipeline.py、LangSpliter 的 watch 模式）共享文件内容与解析结果。
+
+用法示例:
+    for entry in iter_files("./Source", load_rules("upload")):
+        print(entry.rel_path, entry.stat.st_size)
+"""
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import pipeline_profiler as profiler
+
+MODPACK_CONFIG = ".github/configs/modpack.json"
+
+# modpack.json 中没有对应用途的配置时使用的默认规则，与 modpack.json 相同
+DEFAULT_FILE_DISCOVERY = {
+    "upload": {"include": ["*en_us*.json"]},
+    "colorCheck": {"include": ["*.json"], "exclude": ["patchouli_books", "productivemetalworks"]},
+    "compare": {},
+    "update": {"exclude": [".DS_Store"]},
+}
+
+# path 为可直接打开的路径，rel_path 为相对于遍历根目录、以 "/" 分隔的路径
+FileEntry = namedtuple('FileEntry', ['path', 'rel_path', 'stat'])
+
+
+def _translate_segment(segment: str) -> str:
+    """将单个路径段的通配模式转换为正则表达式（通配符不跨越 "/"）。"""
+    regex = []
+    i, n = 0, len(segment)
+    while i < n:
+        char = segment[i]
+        i += 1
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = segment.find(']', i + 1 if i < n and segment[i] in '!]' else i)
+            if end < 0:
+                regex.append(re.escape(char))
+                continue
+            body = segment[i:end].replace('\\', '\\\\')
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            regex.append(f'[{body}]')
+            i = end + 1
+        else:
+            regex.append(re.escape(char))
+    return ''.join(regex)
+
+
+class _Pattern:
+    """编译后的单个路径模式。"""
+
+    def __init__(self, pattern: str, anchored: bool):
+        self.negated = pattern.startswith('!')
+        self.segments = (pattern[1:] if self.negated else pattern).strip('/').split('/')
+        regex = []
+        for i, segment in enumerate(self.segments):
+            last = i == len(self.segments) - 1
+            if segment == '**':
+                regex.append('[^/]+(?:/[^/]+)*' if last else '(?:[^/]+/)*')
+            else:
+                regex.append(_translate_segment(segment) + ('' if last else '/'))
+        prefix = '' if anchored else '(?:.*/)?'
+        self.regex = re.compile(prefix + ''.join(regex), re.DOTALL)
+        self.segment_regexes = [None if segment == '**' else re.compile(_translate_segment(segment), re.DOTALL)
+                                for segment in self.segments]
+
+    def match(self, rel_path: str) -> bool:
+        return self.regex.fullmatch(rel_path) is not None
+
+    def could_match_below(self, dir_parts: list) -> bool:
+        """（仅用于 anchored 模式）判断该目录下是否可能存在匹配本模式的文件。"""
+        for i, part in enumerate(dir_parts):
+            if i >= len(self.segments) - 1:
+                return False
+            segment_regex = self.segment_regexes[i]
+            if segment_regex is None:
+                return True
+            if not segment_regex.fullmatch(part):
+                return False
+        return True
+
+
+class DiscoveryRules:
+    """编译后的 include/exclude 规则。"""
+
+    def __init__(self, include=None, exclude=None, anchored: bool = False):
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.anchored = anchored
+        self._include = [_Pattern(p, anchored) for p in self.include]
+        self._exclude = [_Pattern(p, anchored) for p in self.exclude]
+        # 第 i 个模式之后是否还有 "!" 模式；有则被第 i 个模式排除的目录不能剪枝
+        self._negation_after = [any(p.negated for p in self._exclude[i + 1:]) for i in range(len(self._exclude))]
+
+    def with_exclude(self, *patterns) -> "DiscoveryRules":
+        """返回追加了 exclude 模式的新规则。"""
+        return DiscoveryRules(self.include, [*self.exclude, *patterns], self.anchored)
+
+    def _last_exclude_match(self, rel_path: str):
+        """返回最后一个匹配的 exclude 模式的序号，没有匹配时返回 None。"""
+        for i in range(len(self._exclude) - 1, -1, -1):
+            if self._exclude[i].match(rel_path):
+                return i
+        return None
+
+    def is_excluded(self, rel_path: str) -> bool:
+        index = self._last_exclude_match(rel_path)
+        return index is not None and not self._exclude[index].negated
+
+    def is_included(self, rel_path: str) -> bool:
+        """判断文件（相对路径，以 "/" 分隔）是否符合规则。"""
+        if self._include and not any(p.match(rel_path) for p in self._include):
+            return False
+        return not self.is_excluded(rel_path)
+
+    def is_pruned(self, rel_dir: str) -> bool:
+        """判断目录（相对路径，以 "/" 分隔）是否可以整体跳过。"""
+        index = self._last_exclude_match(rel_dir)
+        if index is not None and not self._exclude[index].negated and not self._negation_after[index]:
+            return True
+        if self.anchored and self._include:
+            parts = rel_dir.split('/')
+            return not any(p.could_match_below(parts) for p in self._include)
+        return False
+
+
+@lru_cache(maxsize=None)
+def _load_config(config_path: str) -> dict:
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_modpack_config(config_path: str = MODPACK_CONFIG) -> dict:
+    """读取 modpack.json（同一进程内只读取一次）；文件不存在时返回空字典。"""
+    return _load_config(config_path)
+
+
+def load_rules(purpose: str, config_path: str = MODPACK_CONFIG, anchored: bool = False) -> DiscoveryRules:
+    """按用途读取 modpack.json 中 fileDiscovery 的规则；没有配置时使用 DEFAULT_FILE_DISCOVERY。"""
+    sections = load_modpack_config(config_path).get('fileDiscovery', {})
+    section = sections.get(purpose, DEFAULT_FILE_DISCOVERY.get(purpose, {}))
+    return DiscoveryRules(section.get('include'), section.get('exclude'), anchored)
+
+
+def iter_files(root, rules: DiscoveryRules = None, dirs: set = None):
+    """
+    深度优先遍历 root 下符合规则的文件（同一目录内按名称排序），逐个返回 FileEntry。
+    被剪枝的目录不会进入；符号链接指向的目录不会跟随（与 os.walk 的默认行为相同）。
+    传入 dirs 集合时，所有进入过的子目录的相对路径（包括空目录）会被加入其中。
+    """
+    rules = rules or DiscoveryRules()
+    stack = [(os.fspath(root), "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = rel_dir + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if rules.is_pruned(rel_path):
+                    profiler.count("dirs_pruned")
+                else:
+                    subdirs.append((entry.path, rel_path + "/"))
+                    if dirs is not None:
+                        dirs.add(rel_path)
+            elif entry.is_file() and rules.is_included(rel_path):
+                stat = entry.stat()
+                profiler.count("files_discovered")
+                yield FileEntry(entry.path, rel_path, stat)
+        stack.extend(reversed(subdirs))
+
+
+def scan_files(root, rules: DiscoveryRules = None, dirs: set = None) -> dict:
+    """返回 {相对路径: FileEntry}，包含 root 下所有符合规则的文件。dirs 的含义同 iter_files。"""
+    return {entry.rel_path: entry for entry in iter_files(root, rules, dirs)}
+
+
+def read_text_file(path) -> str:
+    """以 UTF-8 读取文本文件，可作为 InputCache.get 的 loader。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class InputCache:
+    """
+    进程内共享的输入缓存：以文件的 (mtime, 大小) 判断是否变化，
+    未变化的文件直接返回上次 loader 的结果（文件内容、解析后的 JSON / SNBT 等），无需重新读取和解析。
+    可在多个线程中同时使用。
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path, loader, variant=None):
+        """返回 loader(path) 的结果；variant 用于区分同一文件的不同读取方式（如 "text" 或展平参数）。"""
+        key = (os.path.abspath(path), variant)
+        signature = self._signature(path)
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is not None and cached[0] == signature:
+            profiler.count("input_cache_hits")
+            return cached[1]
+        value = loader(path)
+        with self._lock:
+            self._entries[key] = (signature, value)
+        return value
+
+    def put(self, path, value, variant=None):
+        """记录刚写入的文件的内容，之后的阶段读取该文件时直接使用，无需再次访问磁盘。"""
+        key = (os.path.abspath(path), variant)
+        signature = self._signature(path)
+        with self._lock:
+            self._entries[key] = (signature, value)
@@ -1,111 +1,224 @@
 import asyncio
 import os
 import json
+import re
+import sys
 from pprint import pprint
 import paratranz_client
 from pydantic import ValidationError
-from LangSpliter import split_and_process_all
+from LangSpliter import save_split_manifest, split_and_process_all
+from file_discovery import iter_files, load_rules
+import pipeline_profiler as profiler
+from request_scheduler import AsyncRequestScheduler, get_error_status
 
-configuration = paratranz_client.Configuration(host="https://paratranz.cn/api")
+# 可通过 PARATRANZ_API_URL 指向本地模拟服务器（见 benchmarks/mock_paratranz.py）
+configuration = paratranz_client.Configuration(host=os.environ.get("PARATRANZ_API_URL", "https://paratranz.cn/api"))
 configuration.api_key["Token"] = os.environ["API_TOKEN"]
+# 所有上传请求共用的限流与重试调度器，替代无上限的并发
+scheduler = AsyncRequestScheduler.from_env()
+
+# FTB Quests 语言文件拆分结果在 Paratranz 中的路径，与 para2github.py 中的 QUESTS_JSON_PATH 一致
+QUESTS_JSON_PATH = "kubejs/assets/quests/lang/"
+# 拆分的源文件，与 para2github.py 中的 QUESTS_SOURCE_SNBT 一致
+QUESTS_SOURCE_SNBT = "Source/config/ftbquests/quests/lang/en_us.snbt"
+# 拆分结果默认只保存在内存中直接上传；设置此环境变量时同时写入该目录
+SPLIT_OUTPUT_DIR = os.environ.get("SPLIT_OUTPUT_DIR", "")
+# 增量拆分清单，与 para2github.py 中的 MERGE_MANIFEST_FILE 同样保存在 .github/cache 下；
+# 输入未变化的章节不再重新生成，也不再重复上传
+SPLIT_MANIFEST_FILE = ".github/cache/split_manifest.json"
+# 新建文件时文件已存在的错误信息（HTTP 400），据此改为更新该文件
+FILE_EXISTS_MESSAGE = re.compile(r"File (.+) exists")
+
+
+def get_existing_file_name(error: Exception):
+    """文件已存在导致新建失败时返回其在 Paratranz 中的路径，其他错误返回 None。"""
+    status, _ = get_error_status(error)
+    if status != 400:
+        return None
+    try:
+        match = FILE_EXISTS_MESSAGE.fullmatch(json.loads(error.__dict__.get("body"))["message"])
+    except (TypeError, json.JSONDecodeError, KeyError):
+        return None
+    return match.group(1) if match else None
+
+
+async def upload_file(path, file) -> bool:
+    """
+    上传或更新一个文件。
 
-
-async def upload_file(path, file):
+    :param path: Paratranz 中的目录路径（以 '/' 结尾，根目录为空字符串）
+    :param file: 本地文件路径，或 (文件名, 文件内容 bytes) 形式的内存文件
+    :return: 是否上传成功；失败原因（包括调度器重试耗尽后的 429/5xx）已输出
+    """
+    if isinstance(file, tuple):
+        file_name, upload_size = file[0], len(file[1])
+    else:
+        file_name, upload_size = os.path.basename(file), os.path.getsize(file)
     async with paratranz_client.ApiClient(configuration) as api_client:
         api_instance = paratranz_client.FilesApi(api_client)
         project_id = int(os.environ["PROJECT_ID"])
-        files_response = await api_instance.get_files(project_id)
         try:
+            files_response = await scheduler.call(lambda: api_instance.get_files(project_id))
+            profiler.count("http_calls")
             # 第一次创建文件
-            api_response = await api_instance.create_file(
-                project_id, file=file, path=path
+            profiler.count("http_calls")
+            profiler.count("upload_bytes", upload_size)
+            # 新建文件不是幂等操作，调度器只在 429（请求未被处理）时重试
+            api_response = await scheduler.call(
+                lambda: api_instance.create_file(project_id, file=file, path=path), idempotent=False
             )
             pprint(api_response)
+            return True
         except ValidationError as error:
-            print(f"文件上传成功{path}{os.path.basename(file)}")
+            print(f"文件上传成功{path}{file_name}")
+            return True
         except Exception as e:
-            try:
-                # 尝试解析错误信息以更新文件
-                filePath: str = json.loads(e.__dict__.get("body"))["message"].split(" ")[1]
-                for fileName in files_response:
-                    if fileName.name == filePath:
-                        await api_instance.update_file(project_id, file_id=fileName.id, file=file)
-                        print(f"文件已更新！文件路径为：{fileName.name}")
-            except (json.JSONDecodeError, KeyError, IndexError):
-                # 如果错误信息不是预期的格式，打印原始错误
-                print(f"上传文件 {file} 时发生未知错误: {e}")
-
-
-def get_filelist(dir):
-    filelist = []
-    for root, _, files in os.walk(dir):
-        for file in files:
-            if "en_us" in file and file.endswith(".json"):
-                filelist.append(os.path.join(root, file))
-    return filelist
-
-
-def handle_ftb_quests_snbt():
+            existing_name = get_existing_file_name(e)
+            if existing_name is None:
+                status, _ = get_error_status(e)
+                print(f"上传文件 {path}{file_name} 失败（HTTP {status if status is not None else '-'}）: {e}")
+                profiler.count("uploads_failed")
+                return False
+        # 文件已存在，改为更新该文件
+        for fileName in files_response:
+            if fileName.name == existing_name:
+                try:
+                    profiler.count("http_calls")
+                    await scheduler.call(
+                        lambda: api_instance.update_file(project_id, file_id=fileName.id, file=file))
+                except Exception as e:
+                    status, _ = get_error_status(e)
+                    print(f"更新文件 {fileName.name} 失败（HTTP {status if status is not None else '-'}）: {e}")
+                    profiler.count("uploads_failed")
+                    return False
+                print(f"文件已更新！文件路径为：{fileName.name}")
+                return True
+        print(f"上传文件 {path}{file_name} 失败：文件 {existing_name} 已存在，但不在文件列表中")
+        profiler.count("uploads_failed")
+        return False
+
+
+def get_filelist(dir, *exclude):
+    """
+    返回 dir 下所有待上传的文件（规则见 modpack.json 中 fileDiscovery 的 upload）。
+    exclude 为额外排除的模式（相对于 dir），例如已在内存中生成并上传的拆分结果目录，该目录不会被遍历。
+    """
+    rules = load_rules("upload").with_exclude(*exclude)
+    return [entry.path for entry in iter_files(dir, rules)]
+
+
+def handle_ftb_quests_snbt(cache=None, pending_manifest=None):
     """
     检查是否存在 FTB Quests 的 en_us.snbt 文件。
-    如果存在，则使用 LangSpliter 将其拆分为多个 JSON 文件，以便上传。
+    如果存在，则使用 LangSpliter 将其拆分为多个 JSON 文件，拆分结果以内存缓冲区的形式返回，
+    不再写入 Source 目录。拆分依据 SPLIT_MANIFEST_FILE 增量进行，只返回新建或内容变化的文件；
+    设置了 SPLIT_OUTPUT_DIR 时同时写入该目录。
+
+    :param cache: 与其他处理阶段共用的 InputCache（见 sync_pipeline.py），可选
+    :param pending_manifest: 提供字典时拆分清单暂不保存，而是存入其中，由 upload_all 在上传结束后保存
+    :return: SplitBuffer（文件名、输出路径、内容）列表；未拆分时返回 None
     """
-    snbt_file = "Source/config/ftbquests/quests/lang/en_us.snbt"
+    snbt_file = QUESTS_SOURCE_SNBT
     chapters_dir = "Source/config/ftbquests/quests/chapters"
     chapter_groups_file = "Source/config/ftbquests/quests/chapter_groups.snbt"
-    # 定义拆分后的JSON文件输出目录，与para2github.py的逻辑保持一致
-    output_json_dir = "Source/kubejs/assets/quests/lang"
-
-    if os.path.exists(snbt_file):
-        print(f"检测到 SNBT 文件: {snbt_file}，将进行自动拆分...")
-
-        # 确保输出目录存在
-        os.makedirs(output_json_dir, exist_ok=True)
-
-        # 调用 LangSpliter 的拆分函数
-        # flatten_single_lines=False 是为了让多行文本在Paratranz中成为多个独立的词条，便于翻译
-        split_and_process_all(
-            source_lang_file=snbt_file,
-            chapters_dir=chapters_dir,
-            chapter_groups_file=chapter_groups_file,
-            output_dir=output_json_dir,
-            flatten_single_lines=False
-        )
-        print("SNBT 文件已成功拆分为 JSON，准备上传。")
-    else:
-        print("未检测到 FTB Quests 的 en_us.snbt 文件，跳过拆分步骤。")
 
+    if not os.path.exists(snbt_file):
+        print("未检测到 FTB Quests 的 en_us.snbt 文件，跳过拆分步骤。")
+        return None
+
+    print(f"检测到 SNBT 文件: {snbt_file}，将进行自动拆分...")
+    buffers = []
+    # flatten_single_lines=False 是为了让多行文本在Paratranz中成为多个独立的词条，便于翻译
+    # 增量拆分：输入未变化的章节不再生成，内容未变化的文件不会出现在待上传的缓冲区中
+    written_files = split_and_process_all(
+        source_lang_file=snbt_file,
+        chapters_dir=chapters_dir,
+        chapter_groups_file=chapter_groups_file,
+        output_dir=SPLIT_OUTPUT_DIR or QUESTS_JSON_PATH,
+        flatten_single_lines=False,
+        incremental=True,
+        buffers=buffers,
+        persist=bool(SPLIT_OUTPUT_DIR),
+        cache=cache,
+        manifest_file=SPLIT_MANIFEST_FILE,
+        pending_manifest=pending_manifest
+    )
+    if written_files is None:
+        return None
+    print(f"SNBT 文件已成功拆分为 {len(buffers)} 个待上传的 JSON 文件。")
+    return buffers
+
+
+def get_upload_path(file):
+    """返回 Source 目录下的文件在 Paratranz 中的目录路径（以 '/' 结尾，根目录为空字符串）。"""
+    # 使用 os.path.relpath 获取相对于 'Source' 目录的正确路径
+    path = os.path.relpath(os.path.dirname(file), "./Source")
+
+    # 如果文件直接位于 Source 目录下，relpath 会返回 "."，我们将其转换为空路径
+    if path == ".":
+        path = ""
+
+    # 统一路径分隔符为 '/'
+    path = path.replace("\\", "/")
+
+    # 如果路径非空（不是根目录），确保它以 '/' 结尾
+    if path:
+        path += "/"
+    return path
+
+
+async def upload_all(files, split_buffers, split_manifest=None) -> list:
+    """
+    并发上传 Source 中的文件与内存中的拆分结果。
 
-async def main():
-    handle_ftb_quests_snbt()
-
-    files = get_filelist("./Source")
-    tasks = []
+    :param files: get_filelist 返回的本地文件路径列表
+    :param split_buffers: handle_ftb_quests_snbt 的返回值
+    :param split_manifest: handle_ftb_quests_snbt 存入 pending_manifest 的拆分清单；上传结束后保存，
+                           上传失败的拆分结果不记入清单，下次运行时会再次上传
+    :return: 上传失败的文件（本地路径或拆分结果的文件名）列表
+    """
+    names, tasks = [], []
+    for file in files:
+        path = get_upload_path(file)
+        print(f"准备上传 {file} 到 Paratranz 路径: '{path}'")
+        names.append(file)
+        tasks.append(upload_file(path=path, file=file))
 
-    if not files:
-        print("在 'Source' 目录中未找到任何 'en_us.json' 文件。请检查文件是否存在。")
-        return
+    for buffer in split_buffers or ():
+        print(f"准备上传拆分结果 {buffer.filename} 到 Paratranz 路径: '{QUESTS_JSON_PATH}'")
+        names.append(buffer.filename)
+        tasks.append(upload_file(path=QUESTS_JSON_PATH, file=(buffer.filename, buffer.data)))
 
-    for file in files:
-        # 使用 os.path.relpath 获取相对于 'Source' 目录的正确路径
-        path = os.path.relpath(os.path.dirname(file), "./Source")
+    # 上传协程在同一线程内交替执行，因此只统计整体耗时，不为单个文件划分阶段
+    profiler.count("files_uploaded", len(tasks))
+    with profiler.stage("upload"):
+        results = await asyncio.gather(*tasks)
+    failed = [name for name, uploaded in zip(names, results) if not uploaded]
+    save_split_manifest(split_manifest, failed)
+    return failed
 
-        # 如果文件直接位于 Source 目录下，relpath 会返回 "."，我们将其转换为空路径
-        if path == ".":
-            path = ""
 
-        # 统一路径分隔符为 '/'
-        path = path.replace("\\", "/")
+async def main():
+    split_manifest = {}
+    with profiler.stage("split"):
+        split_buffers = handle_ftb_quests_snbt(pending_manifest=split_manifest)
 
-        # 如果路径非空（不是根目录），确保它以 '/' 结尾
-        if path:
-            path += "/"
+    with profiler.stage("scan_files"):
+        # 拆分结果已在内存中，不再上传 Source 中可能残留的旧拆分文件
+        files = get_filelist("./Source", *([QUESTS_JSON_PATH] if split_buffers is not None else []))
 
-        print(f"准备上传 {file} 到 Paratranz 路径: '{path}'")
-        tasks.append(upload_file(path=path, file=file))
+    if not files and not split_buffers:
+        print("在 'Source' 目录中未找到任何 'en_us.json' 文件。请检查文件是否存在。")
+        save_split_manifest(split_manifest)
+        return
 
-    await asyncio.gather(*tasks)
+    failed = await upload_all(files, split_buffers, split_manifest)
+    print(scheduler.report())
+    if failed:
+        print(f"共有 {len(failed)} 个文件上传失败：{', '.join(failed)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
+    profiler.configure("github2para")
     asyncio.run(main())
\ No newline at end of file
@@ -1,17 +1,45 @@
+import codecs
 import json
 import os
 import re
-import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, Iterable, Iterator, Tuple
 from collections import OrderedDict
 import requests
-from LangSpliter import merge_all_to_snbt
+from LangSpliter import atomic_open, merge_translations_to_snbt
+from file_discovery import InputCache
+import pipeline_profiler as profiler
+from request_scheduler import RequestScheduler
+from translation_transforms import TransformPipeline, load_transform_pipeline
 
 TOKEN: str = os.getenv("API_TOKEN", "")
 GH_TOKEN: str = os.getenv("GH_TOKEN", "")
 PROJECT_ID: str = os.getenv("PROJECT_ID", "")
-FILE_URL: str = f"https://paratranz.cn/api/projects/{PROJECT_ID}/files/"
+# 可通过 PARATRANZ_API_URL 指向本地模拟服务器（见 benchmarks/mock_paratranz.py）
+API_BASE_URL: str = os.getenv("PARATRANZ_API_URL", "https://paratranz.cn/api").rstrip("/")
+FILE_URL: str = f"{API_BASE_URL}/projects/{PROJECT_ID}/files/"
+ARTIFACT_URL: str = f"{API_BASE_URL}/projects/{PROJECT_ID}/artifacts"
+# 默认通过项目导出包一次性下载全部译文；设为 0 时逐个文件请求（导出失败时也会自动回退）
+BULK_EXPORT: bool = os.getenv("PARATRANZ_BULK_EXPORT", "1").strip().lower() not in {"0", "false", "no", "off"}
+# 等待导出包生成的最长时间（秒）
+ARTIFACT_TIMEOUT: float = 300.0
+# 导出包中以 Paratranz 词条格式保存各文件译文的目录
+ARTIFACT_MEMBER_PREFIX: str = "utf8/"
+# 增量合并清单：随同步结果一起提交，使下次运行只重写翻译发生变化的章节文件
+MERGE_MANIFEST_FILE: str = ".github/cache/merge_manifest.json"
+# 由 github2para.py 从 FTB Quests 语言文件拆分出的 JSON 所在的 Paratranz 路径，以及拆分的源文件
+QUESTS_JSON_PATH: str = "kubejs/assets/quests/lang/"
+QUESTS_SOURCE_SNBT: str = "Source/config/ftbquests/quests/lang/en_us.snbt"
+# 单个请求的超时时间（秒），超时后由调度器重试
+REQUEST_TIMEOUT: float = 60.0
+# 流式读取响应与导出包成员时每次读取的字节数
+STREAM_CHUNK_SIZE: int = 64 * 1024
+# 同时处理（下载、替换、写入）的文件数；请求速率仍由调度器统一控制
+DOWNLOAD_WORKERS: int = max(1, int(os.getenv("PARATRANZ_DOWNLOAD_WORKERS", "4")))
 
 if not TOKEN or not PROJECT_ID:
     raise EnvironmentError("环境变量 API_TOKEN 或 PROJECT_ID 未设置。")
@@ -19,37 +47,208 @@ if not TOKEN or not PROJECT_ID:
 # 初始化列表
 file_id_list: list[int] = []
 file_path_list: list[str] = []
+# 所有 Paratranz 请求共用的限流与重试调度器
+scheduler = RequestScheduler.from_env()
+# 译文后处理规则，首次使用时从 .github/configs/translation_transforms.json 加载并编译
+_transform_pipeline: TransformPipeline | None = None
+
+
+def api_request(method: str, url: str, headers: dict[str, str], **kwargs) -> requests.Response:
+    """通过调度器发出请求并读取完整响应；遇到 429、5xx 或网络错误时退避重试。"""
+    def send() -> requests.Response:
+        with profiler.stage(f"http_{method.lower()}"):
+            response = requests.request(method, url, headers=headers, timeout=REQUEST_TIMEOUT, **kwargs)
+        profiler.count("http_calls")
+        profiler.count("http_bytes", len(response.content))
+        response.raise_for_status()
+        return response
+
+    return scheduler.call(send)
 
 
 def fetch_json(url: str, headers: dict[str, str]) -> list[dict[str, str]]:
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return api_request("GET", url, headers).json()
 
 
-def translate(file_id: int) -> Tuple[list[str], list[str]]:
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator:
     """
-    获取指定文件的翻译内容并返回键值对列表
+    增量解析 UTF-8 编码的 JSON 数组，逐个生成数组元素。
+    只在内存中保留尚未解析完的一小段文本，而不是先把整个响应解析成列表。
 
-    :param file_id: 文件ID
-    :return: 包含键和值的元组列表
+    :param chunks: 字节块的迭代器（如 response.iter_content()）
     """
-    url = f"https://paratranz.cn/api/projects/{PROJECT_ID}/files/{file_id}/translation"
-    headers = {"Authorization": TOKEN, "accept": "*/*"}
-    translations = fetch_json(url, headers)
-
-    keys, values = [], []
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    chunks = iter(chunks)
+    buffer, pos, exhausted = "", 0, False
+    state = "start"  # start: 等待 "["；first: 第一个元素或 "]"；value: 下一个元素；separator: "," 或 "]"
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+
+        need_more = pos >= len(buffer)
+        if not need_more:
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("响应不是 JSON 数组")
+                pos += 1
+                state = "first"
+            elif state == "separator" or (state == "first" and char == "]"):
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError(f"JSON 数组中出现意外的字符: {char!r}")
+                pos += 1
+                state = "value"
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                    end = None
+                # 元素不完整（或是恰好位于缓冲区末尾、可能被截断的数字）时，读入更多数据后重新解析
+                need_more = end is None or (end == len(buffer) and not exhausted)
+                if not need_more:
+                    pos = end
+                    state = "separator"
+                    yield item
+
+        if need_more:
+            if exhausted:
+                raise ValueError("JSON 数组不完整")
+            chunk = next(chunks, None)
+            exhausted = chunk is None
+            buffer = buffer[pos:] + text_decoder.decode(chunk or b"", final=exhausted)
+            pos = 0
+
+
+def translation_pairs(translations: Iterable[dict]) -> Iterator[Tuple[str, str]]:
+    """
+    逐个词条选择译文或原文，生成 (键, 值)
 
+    :param translations: 词条迭代器（每项包含 key、original、translation、stage）
+    """
     for item in translations:
-        keys.append(item["key"])
         translation = item.get("translation", "")
         original = item.get("original", "")
         # 优先使用翻译内容，缺失时根据 stage 使用原文
-        values.append(
+        yield item["key"], (
             original if item["stage"] in [0, -1, 2] or not translation else translation
         )
 
-    return keys, values
+
+def count_bytes(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    for chunk in chunks:
+        profiler.count("http_bytes", len(chunk))
+        yield chunk
+
+
+def open_stream(url: str, headers: dict[str, str]) -> requests.Response:
+    """发出流式 GET 请求，在响应头到达后返回（HTTP 错误时关闭连接并抛出异常），响应体由调用方读取"""
+    with profiler.stage("http_get"):
+        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+    profiler.count("http_calls")
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+
+def translate(file_id: int, consume: Callable[[Iterator[Tuple[str, str]]], None]) -> None:
+    """
+    流式获取指定文件的翻译内容，将 (键, 值) 迭代器交给 consume 处理。
+    请求失败重试时会重新调用 consume，因此 consume 必须可以重复执行（如写入同一个字典）。
+
+    :param file_id: 文件ID
+    :param consume: 处理 (键, 值) 迭代器的函数
+    """
+    url = f"{API_BASE_URL}/projects/{PROJECT_ID}/files/{file_id}/translation"
+    headers = {"Authorization": TOKEN, "accept": "*/*"}
+
+    def receive(response: requests.Response) -> None:
+        # 响应体的读取与解析在调度器的延迟统计之外进行，只有响应头的到达时间用于调整并发
+        with profiler.stage("http_read"), response:
+            consume(translation_pairs(iter_json_array(count_bytes(response.iter_content(STREAM_CHUNK_SIZE)))))
+
+    scheduler.call(lambda: open_stream(url, headers), then=receive)
+
+
+def download_to_file(url: str, headers: dict[str, str], fp) -> int:
+    """通过调度器流式下载响应体并写入二进制文件 fp（重试时从头重新写入），返回写入的字节数"""
+    def receive(response: requests.Response) -> int:
+        fp.seek(0)
+        fp.truncate()
+        with profiler.stage("http_read"), response:
+            for chunk in count_bytes(response.iter_content(STREAM_CHUNK_SIZE)):
+                fp.write(chunk)
+        return fp.tell()
+
+    return scheduler.call(lambda: open_stream(url, headers), then=receive)
+
+
+def get_artifact_info(headers: dict[str, str]) -> dict | None:
+    """获取最近一次导出的信息，项目尚未导出过时返回 None"""
+    try:
+        return fetch_json(ARTIFACT_URL, headers)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None
+        raise
+
+
+def download_artifact() -> zipfile.ZipFile | None:
+    """
+    触发项目导出并下载导出包（包含所有文件译文的 zip），流式写入临时文件后直接打开而不解压，
+    内存占用不随项目大小增长（临时文件在关闭后自动删除）。
+    导出失败、超时或无权限时返回 None，由调用方回退到逐个文件下载。
+    """
+    headers = {"Authorization": TOKEN, "accept": "*/*"}
+    try:
+        previous = get_artifact_info(headers)
+        api_request("POST", ARTIFACT_URL, headers)
+
+        # 等待新的导出包生成（createdAt 发生变化）
+        deadline = time.monotonic() + ARTIFACT_TIMEOUT
+        poll_interval = 0.5
+        while True:
+            info = get_artifact_info(headers)
+            if info and (previous is None or info.get("createdAt") != previous.get("createdAt")):
+                break
+            if time.monotonic() > deadline:
+                print(f"等待项目导出超时（{ARTIFACT_TIMEOUT:.0f}s），改为逐个文件下载译文。")
+                return None
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 1.5, 5.0)
+
+        artifact_file = tempfile.TemporaryFile()
+        try:
+            profiler.count("artifact_bytes", download_to_file(f"{ARTIFACT_URL}/download", headers, artifact_file))
+            return zipfile.ZipFile(artifact_file)
+        except BaseException:
+            artifact_file.close()
+            raise
+    except (requests.RequestException, zipfile.BadZipFile) as e:
+        print(f"下载项目导出包失败，改为逐个文件下载译文：{e}")
+        return None
+
+
+def read_artifact_member(artifact: zipfile.ZipFile, path_str: str) -> Iterator[dict] | None:
+    """流式读取导出包中指定文件的词条，导出包中没有该文件时返回 None"""
+    try:
+        member = artifact.getinfo(ARTIFACT_MEMBER_PREFIX + path_str)
+    except KeyError:
+        return None
+
+    def read_chunks() -> Iterator[bytes]:
+        with artifact.open(member) as f:
+            yield from iter(lambda: f.read(STREAM_CHUNK_SIZE), b"")
+
+    return iter_json_array(read_chunks())
 
 
 def get_files() -> None:
@@ -64,13 +263,34 @@ def get_files() -> None:
         file_path_list.append(file["name"])
 
 
-def save_translation(zh_cn_dict: dict[str, str], path: Path) -> None:
+def load_source(path: Path) -> Tuple[str, dict] | None:
+    """
+    读取并解析 Source/ 下的原文文件，供 process_translation 与 save_translation 共用，
+    使每个文件只读取、解析一次
+
+    :param path: 原始文件路径
+    :return: (原始文本, 按原顺序解析的内容)；文件不存在或无法读取时返回 None
+    """
+    try:
+        with open(Path("Source") / path, "r", encoding="UTF-8") as f:
+            source_content = f.read()
+    except (IOError, FileNotFoundError):
+        return None
+    # dict 同样保持键的原始顺序，且比 OrderedDict 占用更少内存
+    return source_content, json.loads(source_content)
+
+
+def save_translation(zh_cn_dict: dict[str, str], path: Path, source: Tuple[str, dict] = None,
+                     cache: InputCache = None) -> None:
     """
     保存翻译内容到指定的 JSON 文件，并保持与源文件完全相同的格式。
     （已修复 \n 等转义字符被错误解析的问题）
+    输出文件以原子方式写入，内容未变化时保持原文件不变。
 
     :param zh_cn_dict: 翻译内容的字典
     :param path: 原始文件路径
+    :param source: load_source 的返回值；未提供时自动读取
+    :param cache: 提供时记录写出的内容，供之后的颜色检查等阶段直接使用（见 sync_pipeline.py）
     """
     dir_path = Path("CNPack") / path.parent
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -78,132 +298,189 @@ def save_translation(zh_cn_dict: dict[str, str], path: Path) -> None:
     file_path = dir_path / zh_cn_filename
     source_path = Path("Source") / path
 
-    try:
-        with open(source_path, "r", encoding="UTF-8") as f1:
-            source_content = f1.read()
-            source_json = json.loads(source_content, object_pairs_hook=OrderedDict)
-
-        for key, original_value in source_json.items():
-            if key in zh_cn_dict:
-                translated_value = zh_cn_dict[key]
-
-                original_value_str = json.dumps(original_value, ensure_ascii=False)
-                translated_value_str = json.dumps(translated_value, ensure_ascii=False)
-
-                key_pattern = re.escape(json.dumps(key, ensure_ascii=False))
-                value_pattern = re.escape(original_value_str)
-                
-                pattern = re.compile(f"({key_pattern}\\s*:\\s*){value_pattern}")
-                
-                # BUGFIX: 对替换字符串中的反斜杠进行转义。
-                # re.sub 会处理替换字符串中的反斜杠，因此我们需要将单个 '\' 变成 '\\'
-                # 以确保像 "\\n" 这样的字符串被当作字面量插入，而不是被解析成换行符。
-                safe_replacement_value = translated_value_str.replace('\\', '\\\\')
-
-                replacement = f"\\1{safe_replacement_value}"
-                
-                source_content, num_replacements = pattern.subn(replacement, source_content, count=1)
-        
-        with open(file_path, "w", encoding="UTF-8") as f:
-            f.write(source_content)
-
-    except (IOError, FileNotFoundError):
+    if source is None:
+        source = load_source(path)
+    if source is None:
         print(f"{source_path} 路径不存在，文件按首字母排序！")
-        with open(file_path, "w", encoding="UTF-8") as f:
+        with atomic_open(str(file_path), encoding="UTF-8") as f:
             json.dump(zh_cn_dict, f, ensure_ascii=False, indent=4, separators=(",", ":"), sort_keys=True)
+        return
+
+    source_content, source_json = source
+    for key, original_value in source_json.items():
+        if key in zh_cn_dict:
+            translated_value = zh_cn_dict[key]
 
+            original_value_str = json.dumps(original_value, ensure_ascii=False)
+            translated_value_str = json.dumps(translated_value, ensure_ascii=False)
 
-def process_translation(file_id: int, path: Path) -> dict[str, str]:
+            key_pattern = re.escape(json.dumps(key, ensure_ascii=False))
+            value_pattern = re.escape(original_value_str)
+            
+            pattern = re.compile(f"({key_pattern}\\s*:\\s*){value_pattern}")
+            
+            # BUGFIX: 对替换字符串中的反斜杠进行转义。
+            # re.sub 会处理替换字符串中的反斜杠，因此我们需要将单个 '\' 变成 '\\'
+            # 以确保像 "\\n" 这样的字符串被当作字面量插入，而不是被解析成换行符。
+            safe_replacement_value = translated_value_str.replace('\\', '\\\\')
+
+            replacement = f"\\1{safe_replacement_value}"
+            
+            source_content, num_replacements = pattern.subn(replacement, source_content, count=1)
+
+    with atomic_open(str(file_path), encoding="UTF-8", only_if_changed=True) as f:
+        f.write(source_content)
+    if cache is not None:
+        cache.put(str(file_path), source_content, "text")
+
+
+def get_transform_pipeline() -> TransformPipeline:
+    global _transform_pipeline
+    if _transform_pipeline is None:
+        _transform_pipeline = load_transform_pipeline()
+    return _transform_pipeline
+
+
+def process_translation(file_id: int, path: Path, translations: Iterable[dict] = None,
+                        source: Tuple[str, dict] = None) -> dict[str, str]:
     """
     处理单个文件的翻译，返回翻译字典
 
     :param file_id: 文件ID
     :param path: 文件路径
+    :param translations: 从导出包中读取的词条迭代器；为 None 时通过 API 流式获取
+    :param source: load_source 的返回值；未提供时自动读取
     :return: 翻译内容字典
     """
-    keys, values = translate(file_id)
-
     # 手动处理文本的替换，避免反斜杠被转义
-    try:
-        with open("Source/" + str(path), "r", encoding="UTF-8") as f:
-            zh_cn_dict = json.load(f)
-    except IOError:
-        zh_cn_dict = {}
-
-    # 检查路径是否包含quests
-    is_quest_file = "quests" in str(path)
-
-    for key, value in zip(keys, values):
-        # 确保替换 \\u00A0 和 \\n
-        value = re.sub(r'\\"', '\"', value)
-
-        # 对quest文件进行特殊处理
-        if is_quest_file and "image" not in value and not value.startswith("[\"") and "\"color\": " not in value:
-            value = value.replace(" ", "\u00A0")
-
-        # 保存替换后的值
-        zh_cn_dict[key] = value
+    if source is None:
+        source = load_source(path)
+    zh_cn_dict = dict(source[1]) if source is not None else {}
+
+    def update(pairs: Iterator[Tuple[str, str]]) -> None:
+        # 词条读入时逐条执行适用于该文件的后处理规则（如引号还原、任务文本的不换行空格），直接写入译文字典
+        pipeline = get_transform_pipeline()
+        path_str = str(path)
+        for key, value in pairs:
+            zh_cn_dict[key] = pipeline.apply_value(path_str, value)
+
+    if translations is None:
+        translate(file_id, update)
+    else:
+        update(translation_pairs(translations))
 
     return zh_cn_dict
 
 
 
-def main() -> None:
-    get_files()
-    ftb_quests_lang_dir = None # 用于记录FTB Quests语言文件所在的目录
+def download_translations(cache: InputCache = None) -> list[Tuple[str, dict[str, str]]]:
+    """
+    下载全部文件的译文：普通文件直接写入 CNPack，FTB Quests 拆分文件的译文只保留在内存中。
 
-    for file_id, path_str in zip(file_id_list, file_path_list):
-        if "TM" in path_str:  # 跳过 TM 文件
-            continue
+    :param cache: 提供时记录写入 CNPack 的文件内容（见 save_translation）
+    :return: 按输出文件名排序的 [(文件名, 译文)]，交给 merge_quest_translations 合并回 SNBT
+    """
+    with profiler.stage("get_files"):
+        get_files()
 
-        path = Path(path_str)
-        zh_cn_dict = process_translation(file_id, path)
+    # 一次下载整个项目的导出包，代替逐个文件请求译文
+    artifact = None
+    if BULK_EXPORT:
+        with profiler.stage("download_artifact"):
+            artifact = download_artifact()
 
-        save_translation(zh_cn_dict, path)
+    # 存在 FTB Quests 源语言文件时，拆分出的 JSON 译文只保留在内存中，直接合并回 SNBT
+    merge_quests = os.path.exists(QUESTS_SOURCE_SNBT)
 
+    def sync_file(file_id: int, path_str: str) -> dict[str, str] | None:
+        """下载并处理单个文件；FTB Quests 拆分文件返回其译文（不写入仓库），其他文件返回 None"""
+        path = Path(path_str)
+        translations = None
+        if artifact is not None:
+            translations = read_artifact_member(artifact, path_str)
+            if translations is None:
+                print(f"导出包中没有 {path_str}，改为单独下载该文件的译文。")
+            else:
+                profiler.count("files_from_artifact")
+
+        # 原文只读取、解析一次，同时用于生成译文字典和按原格式写出
+        with profiler.stage("load_source"):
+            source = load_source(path)
+        with profiler.stage("process_translation"):
+            zh_cn_dict = process_translation(file_id, path, translations, source)
+
+        profiler.count("files_downloaded")
+        profiler.count("keys_downloaded", len(zh_cn_dict))
         # 打印日志时，文件名也相应地从 en_us 变为 zh_cn
         log_path = re.sub('en_us', 'zh_cn', path_str)
+
+        if merge_quests and QUESTS_JSON_PATH in path_str:
+            print(f"已从Paratranz下载（待合并到 SNBT）：{log_path}")
+            # 与 save_translation 写出的文件内容一致：只包含原文中存在的键，并保持原文顺序
+            if source is None:
+                return zh_cn_dict
+            return {key: zh_cn_dict[key] for key in source[1]}
+
+        with profiler.stage("save_translation"):
+            save_translation(zh_cn_dict, path, source, cache)
         print(f"已从Paratranz下载到仓库：{log_path}")
+        return None
 
-        # 检查是否为 FTB Quests 的语言文件，并记录其输出目录
-        if "kubejs/assets/quests/lang/" in path_str and os.path.exists("Source/config/ftbquests/quests/lang/en_us.snbt"):
-            ftb_quests_lang_dir = Path("CNPack") / path.parent
+    files = [(file_id, path_str) for file_id, path_str in zip(file_id_list, file_path_list)
+             if "TM" not in path_str]  # 跳过 TM 文件
+    # 多个文件并行处理，网络请求的速率与并发由调度器统一控制；任一文件失败时抛出异常
+    get_transform_pipeline()  # 在启动工作线程前加载后处理规则
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = [executor.submit(sync_file, file_id, path_str) for file_id, path_str in files]
+        results = [(path_str, future.result()) for (_, path_str), future in zip(files, futures)]
 
+    # 按 merge_all_to_snbt 读取 JSON 目录时的顺序（输出文件名排序）合并各文件的译文
+    return sorted(((Path(path_str).name.replace("en_us", "zh_cn"), translations)
+                   for path_str, translations in results if translations is not None),
+                  key=lambda item: item[0])
+
+
+def merge_quest_translations(quest_translations: list[Tuple[str, dict[str, str]]], cache: InputCache = None) -> None:
+    """
+    将 download_translations 返回的 FTB Quests 译文合并回 SNBT 语言文件与章节文件
+
+    :param quest_translations: download_translations 的返回值
+    :param cache: 与其他处理阶段共用的 InputCache，可选
+    """
     # 在所有文件处理完毕后，如果检测到了 FTB Quests 文件，则执行合并
-    if ftb_quests_lang_dir and ftb_quests_lang_dir.exists():
+    if quest_translations:
         print(f"\n检测到 FTB Quests 翻译文件，开始调用 LangSpliter 合并 SNBT 文件...")
+        combined_data = OrderedDict()
+        for filename, translations in quest_translations:
+            combined_data.update(translations)
+            print(f"  -> 已加载 {len(translations)} 条条目从: {filename}")
 
-        # 定义输入和输出路径
-        json_dir = str(ftb_quests_lang_dir)
+        # 定义输出路径
         output_snbt_file = 'CNPack/config/ftbquests/quests/lang/zh_cn.snbt'
 
         # 新增 chapters 目录的定义
         source_chapters_dir = 'Source/config/ftbquests/quests/chapters'
         output_chapters_dir = 'CNPack/config/ftbquests/quests/chapters'
 
-        # 直接调用从 LangSpliter 导入的函数，并传入所有必需的参数
+        # 直接调用从 LangSpliter 导入的函数，译文在内存中传递，无需写出临时 JSON 文件
         if os.path.isdir(source_chapters_dir):
             print(f"检测到章节目录，将启用 custom_name/lore 更新功能...")
-            merge_all_to_snbt(json_dir, output_snbt_file, source_chapters_dir, output_chapters_dir)
+            merge_translations_to_snbt(combined_data, output_snbt_file, source_chapters_dir, output_chapters_dir,
+                                       manifest_file=MERGE_MANIFEST_FILE, cache=cache)
         else:
             print(f"未检测到章节目录 {source_chapters_dir}，将禁用 custom_name/lore 更新功能...")
 
             # 如果源目录不存在，传入空字符串或None来禁用功能
-            merge_all_to_snbt(json_dir, output_snbt_file, "", "")
+            merge_translations_to_snbt(combined_data, output_snbt_file, "", "", manifest_file=MERGE_MANIFEST_FILE,
+                                       cache=cache)
 
-       # 合并完成后，清除已合并的临时JSON文件所在的父目录
-        cleanup_dir = ftb_quests_lang_dir.parent
+        print(f"SNBT 合并完成，文件已生成于: {output_snbt_file}")
 
-        if cleanup_dir.exists() and cleanup_dir.is_dir():
-            try:
-                shutil.rmtree(cleanup_dir)
-                print(f"已成功清除临时文件夹及其内容：{cleanup_dir}")
-            except OSError as e:
-                print(f"错误：清除文件夹 {cleanup_dir} 时失败: {e}")
-        else:
-            print(f"警告：找不到要清理的目录 {cleanup_dir}。")
 
-        print(f"SNBT 合并完成，文件已生成于: {output_snbt_file}")
+def main() -> None:
+    merge_quest_translations(download_translations())
+    print(scheduler.report())
 
 if __name__ == "__main__":
+    profiler.configure("para2github")
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+流水线脚本共用的轻量级性能记录模块。
+
+提供阶段计时（stage）、计数器（count）以及可选的 tracemalloc 峰值内存与 cProfile 记录，
+在脚本退出时输出一份 JSON 摘要。未启用时所有接口都直接返回，几乎没有额外开销。
+
+启用方式（任选其一）：
+    命令行参数:  --profile  [--profile-output 文件]  [--profile-memory]  [--profile-cprofile 文件]
+    环境变量:    PIPELINE_PROFILE=1 （或直接设为输出文件路径）
+                 PIPELINE_PROFILE_MEMORY=1
+                 PIPELINE_PROFILE_CPROFILE=文件
+
+用法示例:
+    import pipeline_profiler as profiler
+
+    profiler.configure("para2github")            # 读取环境变量与 sys.argv 中的 --profile 参数
+    with profiler.stage("下载翻译"):
+        ...
+        profiler.count("http_calls")
+        profiler.count("http_bytes", len(response.content))
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+PROFILE_ENV_VAR = "PIPELINE_PROFILE"
+PROFILE_MEMORY_ENV_VAR = "PIPELINE_PROFILE_MEMORY"
+PROFILE_CPROFILE_ENV_VAR = "PIPELINE_PROFILE_CPROFILE"
+
+_NULL_CONTEXT = nullcontext()
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+_enabled = False
+_script_name = None
+_output_path = None
+_track_memory = False
+_cprofile_output = None
+_cprofile = None
+_start_time = None
+_stages = {}
+_counters = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(script_name: str, output_path: str = None, track_memory: bool = False, cprofile_output: str = None):
+    """启用记录。output_path 默认为当前目录下的 <script_name>_profile.json；退出时自动写出摘要。"""
+    global _enabled, _script_name, _output_path, _track_memory, _cprofile_output, _cprofile, _start_time
+    if _enabled:
+        return
+    _enabled = True
+    _script_name = script_name
+    _output_path = output_path or f"{script_name}_profile.json"
+    _track_memory = track_memory
+    _cprofile_output = cprofile_output
+    _start_time = time.perf_counter()
+    if track_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if cprofile_output:
+        import cProfile
+        _cprofile = cProfile.Profile()
+        _cprofile.enable()
+    atexit.register(finish)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """为已有的命令行解析器添加 --profile 系列参数。"""
+    group = parser.add_argument_group("性能记录")
+    group.add_argument("--profile", action="store_true", help="记录各阶段耗时与计数，退出时写出 JSON 摘要")
+    group.add_argument("--profile-output", metavar="文件", help="JSON 摘要的输出路径（默认 <脚本名>_profile.json）")
+    group.add_argument("--profile-memory", action="store_true", help="同时记录各阶段的峰值内存（tracemalloc）")
+    group.add_argument("--profile-cprofile", metavar="文件", help="同时将 cProfile 统计写入该文件")
+
+
+def configure(script_name: str, args: argparse.Namespace = None, argv: list = None):
+    """
+    根据命令行参数与环境变量决定是否启用记录。
+    args 为已包含 add_profile_arguments 参数的解析结果；未提供时从 argv（默认 sys.argv[1:]）中
+    单独解析 --profile 系列参数，且不影响脚本自身的参数。
+    """
+    if args is None:
+        parser = argparse.ArgumentParser(add_help=False)
+        add_profile_arguments(parser)
+        args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    env_value = os.environ.get(PROFILE_ENV_VAR, "").strip()
+    env_enabled = bool(env_value) and env_value.lower() not in {"0", "false", "no", "off"}
+    if not args.profile and not env_enabled:
+        return
+
+    output_path = args.profile_output or (env_value if env_enabled and env_value.lower() not in _TRUE_VALUES else None)
+    track_memory = args.profile_memory or os.environ.get(PROFILE_MEMORY_ENV_VAR, "").lower() in _TRUE_VALUES
+    cprofile_output = args.profile_cprofile or os.environ.get(PROFILE_CPROFILE_ENV_VAR) or None
+    enable(script_name, output_path, track_memory, cprofile_output)
+
+
+def stage(name: str):
+    """
+    阶段计时上下文。同名阶段多次进入时累计耗时与次数；嵌套阶段以 "外层/内层" 命名。
+    启用内存记录时，同时记录该阶段（含嵌套阶段）期间的 tracemalloc 峰值。
+    """
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _stage(name)
+
+
+@contextmanager
+def _stage(name: str):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    full_name = f"{stack[-1]['name']}/{name}" if stack else name
+    frame = {'name': full_name, 'child_peak': 0}
+
+    tracemalloc = None
+    if _track_memory and threading.current_thread() is threading.main_thread():
+        import tracemalloc
+        # 重置峰值前先把当前峰值记入外层阶段，以免丢失
+        if stack:
+            stack[-1]['child_peak'] = max(stack[-1]['child_peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        peak = None
+        if tracemalloc is not None:
+            peak = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+            if stack:
+                stack[-1]['child_peak'] = max(stack[-1]['child_peak'], peak)
+        with _lock:
+            record = _stages.setdefault(full_name, {'calls': 0, 'seconds': 0.0})
+            record['calls'] += 1
+            record['seconds'] += elapsed
+            if peak is not None:
+                record['peak_memory_bytes'] = max(record.get('peak_memory_bytes', 0), peak)
+
+
+def count(name: str, amount: int = 1):
+    """累加计数器（文件数、键数、字节数、HTTP 调用、重试次数等）。"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def summary() -> dict:
+    """返回当前的记录摘要。"""
+    with _lock:
+        result = {
+            'script': _script_name,
+            'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - _start_time, 6) if _start_time is not None else 0.0,
+            'stages': {name: dict(record, seconds=round(record['seconds'], 6)) for name, record in _stages.items()},
+            'counters': dict(_counters),
+        }
+    if _track_memory:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            result['peak_memory_bytes'] = max(
+                [tracemalloc.get_traced_memory()[1]]
+                + [record.get('peak_memory_bytes', 0) for record in result['stages'].values()])
+    return result
+
+
+def finish():
+    """写出 JSON 摘要（以及 cProfile 统计）。脚本退出时自动调用，重复调用无副作用。"""
+    global _enabled, _cprofile
+    if not _enabled:
+        return
+    if _cprofile is not None:
+        _cprofile.disable()
+        _cprofile.dump_stats(_cprofile_output)
+        _cprofile = None
+    result = summary()
+    _enabled = False
+
+    output_dir = os.path.dirname(_output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(_output_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=4)
+    print(f"性能记录已写入: {_output_path}（总耗时 {result['total_seconds']:.2f}s）", file=sys.stderr)
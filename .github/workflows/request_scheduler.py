@@ -0,0 +1,350 @@
+"""
+Paratranz 请求调度模块，供 para2github.py（同步 requests）与 github2para.py（异步 paratranz_client）共用。
+
+所有请求都经过同一套流量控制：
+    令牌桶:      限制每秒发出的请求数（允许一定突发）
+    并发上限:    自适应（AIMD）：请求顺利时逐步加一；遇到 429/503 或延迟明显升高时减半/减一
+    Retry-After: 收到 429/503 时按响应头暂停全部请求，而不是只让出错的请求等待
+    重试:        对可重试的错误（429、5xx、连接错误、超时）使用带随机抖动的指数退避；
+                 非幂等请求（如新建文件）只在 429 时重试，因为此时服务器明确没有处理该请求
+
+等待令牌、并发名额与 Retry-After 的时间计为“限流等待”，退避时间单独统计（均为所有请求的累计值），
+不再重试、最终以 429/5xx 或网络错误失败的请求计为“最终失败”，可通过 stats() 获取，
+并同时记入 pipeline_profiler 的 throttled_ms / backoff_ms / retries / request_failures 计数器。
+
+可通过环境变量调整（均为可选）：
+    PARATRANZ_RATE_LIMIT        每秒请求数（默认 10，0 表示不限制）
+    PARATRANZ_BURST             令牌桶容量（默认与每秒请求数相同）
+    PARATRANZ_CONCURRENCY       初始并发上限（默认 4）
+    PARATRANZ_MAX_CONCURRENCY   并发上限的最大值（默认 16）
+    PARATRANZ_MAX_RETRIES       单个请求的最大重试次数（默认 5）
+
+用法示例:
+    scheduler = RequestScheduler.from_env()
+    response = scheduler.call(lambda: fetch(url))                    # 同步
+    scheduler.call(lambda: open_stream(url), then=read_body)         # 同步，延迟只计到响应头到达
+    result = await async_scheduler.call(lambda: api.create_file(...), idempotent=False)  # 异步
+"""
+import asyncio
+import email.utils
+import math
+import os
+import random
+import threading
+import time
+
+import pipeline_profiler as profiler
+
+# 可重试的 HTTP 状态码；其中 429/503 表示服务器要求降低请求速率
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+
+def get_error_status(error: Exception):
+    """
+    从异常中取出 HTTP 状态码与响应头。兼容 requests.HTTPError（error.response）
+    与 paratranz_client.ApiException（error.status / error.headers）。
+    返回 (状态码, 响应头)；不是 HTTP 错误时状态码为 None。
+    """
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return response.status_code, response.headers or {}
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status, getattr(error, "headers", None) or {}
+    return None, {}
+
+
+def is_transient_error(error: Exception) -> bool:
+    """判断异常是否为连接中断、超时等暂时性网络错误（不包括 HTTP 错误响应）。"""
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    try:
+        import requests
+    except ImportError:
+        requests = None
+    if requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout,
+                                                   requests.exceptions.ChunkedEncodingError)):
+        return True
+    try:
+        import aiohttp
+    except ImportError:
+        aiohttp = None
+    return aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError)
+
+
+def parse_retry_after(headers) -> float:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），无法解析时返回 None。"""
+    value = None
+    if headers:
+        value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_time.timestamp() - time.time())
+
+
+def _env_number(name: str, default, cast=float):
+    value = os.environ.get(name, "").strip()
+    return cast(value) if value else default
+
+
+class _SchedulerState:
+    """
+    同步与异步调度器共用的状态与决策逻辑（令牌桶、AIMD 并发上限、退避时间、统计），
+    不包含任何等待操作。所有方法都在调用方持有锁时执行。
+    """
+
+    def __init__(self, rate_limit: float = 10.0, burst: int = None, concurrency: int = 4,
+                 max_concurrency: int = 16, max_retries: int = 5, backoff_base: float = 0.5,
+                 backoff_cap: float = 30.0, latency_factor: float = 3.0, seed: int = None):
+        self.rate_limit = rate_limit
+        self.burst = burst or max(1, math.ceil(rate_limit))
+        self.limit = max(1, concurrency)
+        self.max_concurrency = max(self.limit, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # 延迟超过已观察到的最低延迟的 latency_factor 倍时视为服务器过载
+        self.latency_factor = latency_factor
+        self.random = random.Random(seed)
+
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.in_flight = 0
+        self.successes = 0
+        self.best_latency = None
+        self.paused_until = 0.0
+
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+        self.backoff_seconds = 0.0
+        self.status_counts = {}
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """按 PARATRANZ_* 环境变量创建调度器，overrides 中的参数优先。"""
+        rate_limit = _env_number("PARATRANZ_RATE_LIMIT", 10.0)
+        params = {
+            'rate_limit': rate_limit,
+            'burst': _env_number("PARATRANZ_BURST", None, int),
+            'concurrency': _env_number("PARATRANZ_CONCURRENCY", 4, int),
+            'max_concurrency': _env_number("PARATRANZ_MAX_CONCURRENCY", 16, int),
+            'max_retries': _env_number("PARATRANZ_MAX_RETRIES", 5, int),
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    # --- 流量控制 ---
+    def _wait_time(self) -> float:
+        """尝试占用一个并发名额和一个令牌；成功返回 0，否则返回建议的等待秒数（并发已满时返回 None）。"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= self.limit:
+            return None
+        if self.rate_limit:
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate_limit)
+            self.last_refill = now
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate_limit
+            self.tokens -= 1
+        self.in_flight += 1
+        self.requests += 1
+        return 0.0
+
+    def _on_success(self, latency: float):
+        self.in_flight -= 1
+        self._count_status(200)
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        if latency > self.best_latency * self.latency_factor and latency > 0.05:
+            # 延迟明显升高：减小并发，避免把服务器推向 429
+            self.limit = max(1, self.limit - 1)
+            self.successes = 0
+            return
+        self.successes += 1
+        if self.successes >= self.limit:
+            self.limit = min(self.max_concurrency, self.limit + 1)
+            self.successes = 0
+
+    def _on_failure(self, status, retry_after: float):
+        self.in_flight -= 1
+        self._count_status(status)
+        self.successes = 0
+        if status in THROTTLE_STATUSES:
+            self.limit = max(1, self.limit // 2)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def _count_status(self, status):
+        key = str(status) if status is not None else "error"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool):
+        """返回重试前的退避秒数；不应重试时返回 None。"""
+        status, headers = get_error_status(error)
+        if status is None:
+            retryable = idempotent and is_transient_error(error)
+        else:
+            retryable = status == 429 or (idempotent and status in RETRYABLE_STATUSES)
+        if not retryable or attempt >= self.max_retries:
+            return None
+        # 指数退避加完全随机抖动；Retry-After 已通过 paused_until 统一处理
+        return self.random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _record_failure(self, status):
+        # 只统计服务器或网络导致的失败；其他 4xx（如新建时文件已存在）由调用方按业务逻辑处理
+        if status is None or status in RETRYABLE_STATUSES:
+            self.failures += 1
+            profiler.count("request_failures")
+
+    def _record_wait(self, seconds: float):
+        self.throttled_seconds += seconds
+        profiler.count("throttled_ms", round(seconds * 1000))
+
+    def _record_retry(self, delay: float):
+        self.retries += 1
+        self.backoff_seconds += delay
+        profiler.count("retries")
+        profiler.count("backoff_ms", round(delay * 1000))
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'throttled_seconds': round(self.throttled_seconds, 3),
+            'backoff_seconds': round(self.backoff_seconds, 3),
+            'concurrency_limit': self.limit,
+            'responses_by_status': dict(self.status_counts),
+        }
+
+    def report(self) -> str:
+        return (f"请求调度：共 {self.requests} 次请求，重试 {self.retries} 次，最终失败 {self.failures} 次，"
+                f"累计限流等待 {self.throttled_seconds:.2f}s，累计退避等待 {self.backoff_seconds:.2f}s，"
+                f"最终并发上限 {self.limit}")
+
+
+class RequestScheduler(_SchedulerState):
+    """线程安全的同步调度器。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = threading.Condition()
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                start = time.monotonic()
+                wait = self._wait_time()
+                if wait == 0.0:
+                    return
+                self._condition.wait(wait)
+                self._record_wait(time.monotonic() - start)
+
+    def call(self, func, idempotent: bool = True, then=None):
+        """
+        通过调度器执行 func()（发出一次请求的无参可调用对象），失败时按规则重试。
+        func 应在 HTTP 错误时抛出异常（如调用 response.raise_for_status()）。
+        提供 then 时返回 then(func() 的结果)：流式响应可由 func 在响应头到达后返回，由 then 读取响应体。
+        then 的耗时不计入用于调整并发上限的延迟（大文件的读取与解析不代表服务器变慢），
+        但仍占用并发名额，出错时与 func 一样重试（重新执行 func 与 then）。
+        """
+        attempt = 0
+        while True:
+            self._acquire()
+            start = time.monotonic()
+            try:
+                result = func()
+                latency = time.monotonic() - start
+                if then is not None:
+                    result = then(result)
+            except Exception as error:
+                status, headers = get_error_status(error)
+                with self._condition:
+                    self._on_failure(status, parse_retry_after(headers))
+                    delay = self._retry_delay(error, attempt, idempotent)
+                    if delay is None:
+                        self._record_failure(status)
+                    self._condition.notify_all()
+                if delay is None:
+                    raise
+                self._record_retry(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            with self._condition:
+                self._on_success(latency)
+                self._condition.notify_all()
+            return result
+
+
+class AsyncRequestScheduler(_SchedulerState):
+    """asyncio 调度器，需在同一事件循环中使用。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        # 延迟到事件循环中创建，以便在模块级别实例化调度器
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def _acquire(self):
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                start = time.monotonic()
+                wait = self._wait_time()
+                if wait == 0.0:
+                    return
+                try:
+                    await asyncio.wait_for(condition.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                self._record_wait(time.monotonic() - start)
+
+    async def _release(self, callback, *args):
+        condition = self._get_condition()
+        async with condition:
+            result = callback(*args)
+            condition.notify_all()
+        return result
+
+    async def call(self, coroutine_factory, idempotent: bool = True):
+        """
+        通过调度器执行 await coroutine_factory()。每次重试都会重新调用 coroutine_factory
+        创建新的协程，因此必须传入函数而不是协程对象。
+        """
+        attempt = 0
+        while True:
+            await self._acquire()
+            start = time.monotonic()
+            try:
+                result = await coroutine_factory()
+            except Exception as error:
+                status, headers = get_error_status(error)
+                retry_after = parse_retry_after(headers)
+                await self._release(self._on_failure, status, retry_after)
+                delay = self._retry_delay(error, attempt, idempotent)
+                if delay is None:
+                    self._record_failure(status)
+                    raise
+                self._record_retry(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            await self._release(self._on_success, time.monotonic() - start)
+            return result
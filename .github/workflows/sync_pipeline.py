@@ -0,0 +1,238 @@
+"""
+单进程同步流水线：将原先分散在多个工作流步骤中的脚本作为同一进程内的阶段运行。
+
+各阶段按依赖关系组成阶段图，互不依赖的阶段在线程池中并行执行；所有阶段共用一个 InputCache，
+同一文件的内容、解析后的 JSON / SNBT 只读取和解析一次，刚写入的文件也无需再次从磁盘读取。
+
+    upload:    [update →] scan  ─┬→ validate（颜色检查）
+                          split ─┴→ upload（上传到 Paratranz）
+    download:  download ─┬→ merge（将 FTB Quests 译文合并回 SNBT）
+                         └→ validate（检查 CNPack 中的颜色代码）
+
+--with-update 供本地一次性运行完整流程使用。check_updates.yml 仍单独运行 update_checker.py：
+更新后的 Source 先以 PR 的形式提交审核，合并后才由 upload2paratranz.yml 上传，
+不能在检查更新的同一次运行中直接上传；该任务也没有 Paratranz 的凭据。
+
+download 流水线中的 validate 只检查 para2github 写入 CNPack 的 JSON 文件，merge 只改写 SNBT 文件，
+两者的输入输出互不重叠，因此 validate 与 merge 并列、都只依赖 download。
+
+颜色检查默认只生成报告、不影响同步（与原先工作流中的 continue-on-error 相同）；
+指定 --fail-on-errors 时发现错误即视为失败，upload 流水线此时在检查通过后才开始上传。
+
+用法:
+    python sync_pipeline.py upload [--with-update] [--fail-on-errors] [--report-output error_report.html]
+    python sync_pipeline.py download [--fail-on-errors] [--report-output error_report.html]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from check_ftb_colors import check_directory, check_file, check_json, generate_html_report
+from file_discovery import InputCache, load_rules
+import pipeline_profiler as profiler
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+SOURCE_DIR = "./Source"
+OUTPUT_DIR = "./CNPack"
+# 同时运行的阶段数上限（阶段内部的网络请求并发仍由各脚本的调度器控制）
+DEFAULT_STAGE_WORKERS = 4
+
+# run(context) 的返回值保存在 context.results[name] 中，供依赖它的阶段使用
+Stage = namedtuple('Stage', ['name', 'deps', 'run'])
+
+
+class PipelineContext:
+    """在各阶段之间共享的状态：命令行参数、输入缓存与已完成阶段的结果。"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.cache = InputCache()
+        self.results = {}
+        # split 阶段暂不保存的拆分清单，upload 阶段在上传结束后保存（见 github2para.upload_all）
+        self.split_manifest = {}
+
+
+def _run_stage(stage: Stage, context: PipelineContext):
+    print(f"[{stage.name}] 开始")
+    start = time.perf_counter()
+    with profiler.stage(stage.name):
+        result = stage.run(context)
+    print(f"[{stage.name}] 完成，用时 {time.perf_counter() - start:.2f}s")
+    return result
+
+
+def run_stage_graph(stages: list, context: PipelineContext, max_workers: int = DEFAULT_STAGE_WORKERS) -> dict:
+    """
+    按依赖关系运行各阶段：依赖全部完成的阶段立即在线程池中启动，互不依赖的阶段并行执行。
+    任一阶段失败时不再启动新的阶段，等待已启动的阶段结束后重新抛出该异常。
+
+    :return: context.results
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = [dep for dep in stage.deps if dep not in names]
+        if unknown:
+            raise ValueError(f"阶段 {stage.name} 依赖了不存在的阶段: {', '.join(unknown)}")
+
+    pending = list(stages)
+    running = {}
+    error = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            if error is None:
+                for stage in [s for s in pending if all(dep in context.results for dep in s.deps)]:
+                    pending.remove(stage)
+                    running[executor.submit(_run_stage, stage, context)] = stage
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    context.results[stage.name] = future.result()
+                except Exception as e:
+                    print(f"[{stage.name}] 失败: {e}", file=sys.stderr)
+                    if error is None:
+                        error = e
+
+    if error is not None:
+        raise error
+    if pending:
+        raise ValueError(f"阶段之间存在循环依赖: {', '.join(stage.name for stage in pending)}")
+    return context.results
+
+
+def report_color_errors(errors: list, context: PipelineContext) -> list:
+    """输出颜色检查结果并生成 HTML 报告；指定了 --fail-on-errors 且存在错误时抛出 RuntimeError。"""
+    print(f"\n检查完成。总共发现 {len(errors)} 个错误。")
+    if errors:
+        generated_report_path = generate_html_report(errors, context.args.report_output)
+        if generated_report_path:
+            print(f"详细错误报告请查看文件: {generated_report_path}")
+        if context.args.fail_on_errors:
+            raise RuntimeError(f"颜色检查发现 {len(errors)} 个错误")
+    return errors
+
+
+# --- upload: Source → Paratranz ---
+def run_update(context: PipelineContext):
+    """检查整合包更新并同步 Source 目录（update_checker.py）。"""
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    import update_checker
+    try:
+        update_checker.main()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"update_checker 失败: {e.code}") from e
+
+
+def run_scan(context: PipelineContext) -> list:
+    import github2para
+    # 拆分结果在内存中生成并上传，不再上传 Source 中可能残留的旧拆分文件（拆分失败时见 upload_inputs）
+    return github2para.get_filelist(SOURCE_DIR, github2para.QUESTS_JSON_PATH)
+
+
+def run_split(context: PipelineContext):
+    import github2para
+    return github2para.handle_ftb_quests_snbt(context.cache, context.split_manifest)
+
+
+def upload_inputs(context: PipelineContext):
+    """返回 (待上传的文件列表, 拆分结果)，与 github2para.main 的选择相同。"""
+    import github2para
+    files, split_buffers = context.results["scan"], context.results["split"]
+    if split_buffers is None:
+        # 未拆分时与单独运行 github2para.py 相同，Source 中已有的拆分文件照常上传
+        files = github2para.get_filelist(SOURCE_DIR)
+    return files, split_buffers
+
+
+def run_upload_validate(context: PipelineContext) -> list:
+    files, split_buffers = upload_inputs(context)
+    rules = load_rules("colorCheck")
+    errors = []
+    for file in files:
+        if rules.is_included(os.path.relpath(file, SOURCE_DIR).replace(os.sep, "/")):
+            errors.extend(check_file(os.path.normpath(file), context.cache))
+    for buffer in split_buffers or ():
+        errors.extend(check_json(buffer.path, buffer.data))
+    return report_color_errors(errors, context)
+
+
+def run_upload(context: PipelineContext):
+    import github2para
+    files, split_buffers = upload_inputs(context)
+    if not files and not split_buffers:
+        print("在 'Source' 目录中未找到任何 'en_us.json' 文件。请检查文件是否存在。")
+        github2para.save_split_manifest(context.split_manifest)
+        return
+    failed = asyncio.run(github2para.upload_all(files, split_buffers, context.split_manifest))
+    print(github2para.scheduler.report())
+    if failed:
+        raise RuntimeError(f"共有 {len(failed)} 个文件上传失败：{', '.join(failed)}")
+
+
+def upload_stages(args: argparse.Namespace) -> list:
+    first = ("update",) if args.with_update else ()
+    stages = [
+        Stage("scan", first, run_scan),
+        Stage("split", first, run_split),
+        Stage("validate", ("scan", "split"), run_upload_validate),
+        Stage("upload", ("scan", "split", "validate") if args.fail_on_errors else ("scan", "split"), run_upload),
+    ]
+    if args.with_update:
+        stages.insert(0, Stage("update", (), run_update))
+    return stages
+
+
+# --- download: Paratranz → CNPack ---
+def run_download(context: PipelineContext) -> list:
+    import para2github
+    return para2github.download_translations(context.cache)
+
+
+def run_merge(context: PipelineContext):
+    import para2github
+    para2github.merge_quest_translations(context.results["download"], context.cache)
+    print(para2github.scheduler.report())
+
+
+def run_download_validate(context: PipelineContext) -> list:
+    # 合并只写出 SNBT 文件，与这里检查的 JSON 文件互不影响，因此两者可以并行
+    return report_color_errors(list(check_directory(OUTPUT_DIR, context.cache)), context)
+
+
+def download_stages(args: argparse.Namespace) -> list:
+    return [
+        Stage("download", (), run_download),
+        Stage("merge", ("download",), run_merge),
+        Stage("validate", ("download",), run_download_validate),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在同一进程中运行同步流水线的各个阶段。")
+    parser.add_argument('command', choices=['upload', 'download'],
+                        help='upload: Source → Paratranz；download: Paratranz → CNPack')
+    parser.add_argument('--with-update', action='store_true',
+                        help='（upload）上传前先检查整合包更新并同步 Source 目录')
+    parser.add_argument('--fail-on-errors', action='store_true', help='颜色检查发现错误时以失败退出')
+    parser.add_argument('--report-output', default='error_report.html',
+                        help='HTML 错误报告的输出路径 (默认为 error_report.html)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_STAGE_WORKERS, help='同时运行的阶段数上限')
+    profiler.add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler.configure("sync_pipeline", args)
+
+    stages = upload_stages(args) if args.command == 'upload' else download_stages(args)
+    run_stage_graph(stages, PipelineContext(args), args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+下载译文后的文本后处理规则。
+
+规则定义在 .github/configs/translation_transforms.json 中，按顺序执行，每条规则包含：
+    name                 规则名称
+    paths                适用的 Paratranz 文件路径（glob，如 "*quests*"；"*" 表示全部文件）
+    type                 "replace"（字面替换 old -> new）或 "regex"（正则替换 pattern -> replacement）
+    skip_if_contains     可选，值包含其中任一子串时跳过
+    skip_if_startswith   可选，值以其中任一前缀开头时跳过
+
+每次运行只编译一次规则（正则、前缀元组），按文件路径选出的规则列表会被缓存，
+之后每个值只经过适用于该文件的规则，而不是对每个值依次判断全部规则。
+
+用法示例:
+    pipeline = load_transform_pipeline()
+    for key, value in pairs:    # 译文流式读入时逐条处理
+        values[key] = pipeline.apply_value(path_str, value)
+"""
+import json
+import os
+import re
+from fnmatch import fnmatchcase
+
+TRANSFORMS_FILE = ".github/configs/translation_transforms.json"
+
+# 配置文件不存在时使用的默认规则，与 translation_transforms.json 相同
+DEFAULT_TRANSFORMS = [
+    {'name': "unescape_quotes", 'paths': ["*"], 'type': "replace", 'old': '\\"', 'new': '"'},
+    {'name': "quest_nbsp", 'paths': ["*quests*"], 'type': "replace", 'old': " ", 'new': "\u00A0",
+     'skip_if_contains': ["image", '"color": '], 'skip_if_startswith': ['["']},
+]
+
+
+def _compile_skip(rule: dict):
+    """将跳过条件编译为一个判断函数；没有跳过条件时返回 None。"""
+    contains = rule.get('skip_if_contains') or []
+    prefixes = tuple(rule.get('skip_if_startswith') or ())
+    contains_pattern = re.compile("|".join(map(re.escape, contains))) if contains else None
+
+    if contains_pattern and prefixes:
+        return lambda value: value.startswith(prefixes) or contains_pattern.search(value) is not None
+    if contains_pattern:
+        return lambda value: contains_pattern.search(value) is not None
+    if prefixes:
+        return lambda value: value.startswith(prefixes)
+    return None
+
+
+def compile_transform(rule: dict):
+    """将一条规则编译为处理单个值的函数（值 -> 新值）。"""
+    skip = _compile_skip(rule)
+    rule_type = rule.get('type', "replace")
+
+    if rule_type == "replace":
+        old, new = rule['old'], rule['new']
+
+        def transform(value: str) -> str:
+            # 先用 in 快速排除不需要替换的值，再判断跳过条件
+            if old in value and not (skip and skip(value)):
+                return value.replace(old, new)
+            return value
+    elif rule_type == "regex":
+        pattern = re.compile(rule['pattern'])
+        replacement = rule.get('replacement', "")
+
+        def transform(value: str) -> str:
+            if pattern.search(value) and not (skip and skip(value)):
+                return pattern.sub(replacement, value)
+            return value
+    else:
+        raise ValueError(f"未知的规则类型 {rule_type!r}（规则 {rule.get('name')}）")
+
+    transform.__name__ = rule.get('name', rule_type)
+    return transform
+
+
+class TransformPipeline:
+    """编译后的后处理规则。按文件路径选出的规则列表会被缓存。"""
+
+    def __init__(self, rules: list):
+        self.rules = [(tuple(rule.get('paths') or ["*"]), compile_transform(rule)) for rule in rules]
+        self._selected = {}
+
+    def for_path(self, path_str: str) -> list:
+        """返回适用于该文件路径的已编译规则（按配置顺序）。"""
+        selected = self._selected.get(path_str)
+        if selected is None:
+            normalized = path_str.replace("\\", "/")
+            selected = [transform for patterns, transform in self.rules
+                        if any(fnmatchcase(normalized, pattern) for pattern in patterns)]
+            self._selected[path_str] = selected
+        return selected
+
+    def apply_value(self, path_str: str, value: str) -> str:
+        """对单个值依次执行适用于该文件路径的规则，返回处理后的值。"""
+        for transform in self.for_path(path_str):
+            value = transform(value)
+        return value
+
+
+def load_transform_pipeline(transforms_file: str = TRANSFORMS_FILE) -> TransformPipeline:
+    """读取并编译后处理规则；配置文件不存在时使用默认规则。"""
+    if not os.path.exists(transforms_file):
+        return TransformPipeline(DEFAULT_TRANSFORMS)
+    with open(transforms_file, 'r', encoding='utf-8') as f:
+        rules = json.load(f).get('transforms', [])
+    print(f"已加载 {len(rules)} 条译文后处理规则：{transforms_file}")
+    return TransformPipeline(rules)
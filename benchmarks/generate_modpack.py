@@ -0,0 +1,231 @@
+"""
+合成整合包数据生成器。
+
+生成与 FTB Quests 实际导出格式一致的任务树（章节 SNBT、lang/en_us.snbt、chapter_groups.snbt），
+以及若干 kubejs/assets/<模组>/lang/en_us.json 语言文件，供 run_benchmarks.py 离线测试使用。
+相同的参数与随机种子总是生成完全相同的文件。
+
+用法:
+    python benchmarks/generate_modpack.py OUTPUT_DIR [--chapters N] [--quests N] [--tasks N] [--rewards N]
+                                          [--lore-lines N] [--image-hovers N] [--lang-files N] [--lang-entries N]
+                                          [--seed N]
+
+生成的目录结构:
+    OUTPUT_DIR/config/ftbquests/quests/chapters/*.snbt
+    OUTPUT_DIR/config/ftbquests/quests/chapter_groups.snbt
+    OUTPUT_DIR/config/ftbquests/quests/lang/en_us.snbt
+    OUTPUT_DIR/kubejs/assets/<模组>/lang/en_us.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+from collections import OrderedDict
+
+import ftb_snbt_lib as snbtlib
+from ftb_snbt_lib.tag import Compound, Double, Integer, List, String
+
+QUESTS_DIR = os.path.join("config", "ftbquests", "quests")
+KUBEJS_ASSETS_DIR = os.path.join("kubejs", "assets")
+
+# 生成的文本中刻意包含颜色代码、引号、反斜杠和换行转义，以覆盖各处的转义处理
+_WORDS = ["iron", "gold", "&aemerald", "&lquartz", "machine", "\"core\"", "cable", "C:\\path", "energy", "fluid",
+          "storage", "&r", "\\n", "portal", "sky", "island"]
+
+
+def _hex_id(rng: random.Random) -> str:
+    return "".join(rng.choice("0123456789ABCDEF") for _ in range(16))
+
+
+def _sentence(rng: random.Random, min_words: int = 2, max_words: int = 8) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _item(rng: random.Random, item_id: str, lore_lines: int) -> Compound:
+    item = Compound({'id': String(item_id), 'count': Integer(1)})
+    if lore_lines and rng.random() < 0.5:
+        components = Compound()
+        components[String('minecraft:custom_name')] = String(json.dumps({"text": _sentence(rng)}))
+        components[String('minecraft:lore')] = List(
+            [String(json.dumps({"text": _sentence(rng)})) for _ in range(rng.randint(1, lore_lines))])
+        item['components'] = components
+    return item
+
+
+def generate_quests(root: str, chapters: int = 20, quests: int = 30, tasks: int = 3, rewards: int = 2,
+                    lore_lines: int = 3, image_hovers: int = 2, seed: int = 1) -> dict:
+    """
+    在 root 下生成 FTB Quests 任务树。tasks/rewards/lore_lines/image_hovers 为每个任务、物品、章节的上限，
+    实际数量在 [1, 上限] 内随机（rewards 与 image_hovers 可为 0）。返回各类条目的数量统计。
+    """
+    rng = random.Random(seed)
+    quests_dir = os.path.join(root, QUESTS_DIR)
+    os.makedirs(os.path.join(quests_dir, "chapters"), exist_ok=True)
+    os.makedirs(os.path.join(quests_dir, "lang"), exist_ok=True)
+
+    lang = OrderedDict()
+    stats = {'chapters': chapters, 'quests': 0, 'tasks': 0, 'rewards': 0}
+    group_ids = [_hex_id(rng) for _ in range(max(1, chapters // 5))]
+    for group_id in group_ids:
+        lang[f'chapter_group.{group_id}.title'] = String(_sentence(rng))
+
+    for chapter_index in range(chapters):
+        chapter_id = _hex_id(rng)
+        lang[f'chapter.{chapter_id}.title'] = String(_sentence(rng))
+        if rng.random() < 0.5:
+            lang[f'chapter.{chapter_id}.chapter_subtitle'] = List(
+                [String(_sentence(rng)) for _ in range(rng.randint(1, 3))])
+
+        quest_list = []
+        for _ in range(quests):
+            quest_id = _hex_id(rng)
+            lang[f'quest.{quest_id}.title'] = String(_sentence(rng))
+            if rng.random() < 0.4:
+                lang[f'quest.{quest_id}.quest_subtitle'] = String(_sentence(rng))
+            lang[f'quest.{quest_id}.quest_desc'] = List(
+                [String(_sentence(rng, 0, 12)) for _ in range(rng.randint(1, 10))])
+
+            task_list = []
+            for _ in range(rng.randint(1, max(1, tasks))):
+                task_id = _hex_id(rng)
+                task_list.append(Compound({
+                    'id': String(task_id),
+                    'type': String('item'),
+                    'item': _item(rng, 'minecraft:iron_ingot', lore_lines),
+                }))
+                if rng.random() < 0.3:
+                    lang[f'task.{task_id}.title'] = String(_sentence(rng))
+
+            reward_list = []
+            for _ in range(rng.randint(0, rewards)):
+                reward_id = _hex_id(rng)
+                reward = Compound({'id': String(reward_id), 'type': String('item'),
+                                   'item': _item(rng, 'minecraft:diamond', lore_lines)})
+                if rng.random() < 0.2:
+                    reward['feedback_message'] = (List([String(_sentence(rng)) for _ in range(2)])
+                                                  if rng.random() < 0.3 else String(_sentence(rng)))
+                reward_list.append(reward)
+                if rng.random() < 0.2:
+                    lang[f'reward.{reward_id}.title'] = String(_sentence(rng))
+
+            quest_list.append(Compound({
+                'id': String(quest_id),
+                'x': Double(rng.randint(-20, 20) / 2),
+                'y': Double(rng.randint(-20, 20) / 2),
+                'tasks': List(task_list),
+                'rewards': List(reward_list),
+            }))
+            stats['quests'] += 1
+            stats['tasks'] += len(task_list)
+            stats['rewards'] += len(reward_list)
+
+        chapter = Compound({
+            'id': String(chapter_id),
+            'filename': String(f'chapter_{chapter_index}'),
+            'group': String(rng.choice(group_ids)),
+            'order_index': Integer(chapter_index),
+            'quests': List(quest_list),
+        })
+        hover_count = rng.randint(0, image_hovers)
+        if hover_count:
+            chapter['images'] = List([Compound({
+                'image': String('minecraft:textures/item/diamond.png'),
+                'hover': (List([String(_sentence(rng)) for _ in range(rng.randint(2, 3))])
+                          if rng.random() < 0.5 else String(_sentence(rng))),
+            }) for _ in range(hover_count)])
+
+        with open(os.path.join(quests_dir, "chapters", f"chapter_{chapter_index}.snbt"), "w", encoding="utf-8") as f:
+            f.write(snbtlib.dumps(chapter))
+
+    lang[f'reward_table.{_hex_id(rng)}.title'] = String(_sentence(rng))
+    lang[f'file.{_hex_id(rng)}.title'] = String(_sentence(rng))
+    with open(os.path.join(quests_dir, "lang", "en_us.snbt"), "w", encoding="utf-8") as f:
+        f.write(snbtlib.dumps(Compound(lang)))
+    with open(os.path.join(quests_dir, "chapter_groups.snbt"), "w", encoding="utf-8") as f:
+        f.write(snbtlib.dumps(Compound({'chapter_groups': List(
+            [Compound({'id': String(group_id)}) for group_id in group_ids])})))
+
+    stats['lang_entries'] = len(lang)
+    return stats
+
+
+def generate_kubejs_lang(root: str, files: int = 10, entries: int = 500, seed: int = 1) -> list:
+    """在 root 下生成 files 个 kubejs 语言文件，每个包含 entries 条目。返回相对于 root 的文件路径列表。"""
+    rng = random.Random(seed)
+    paths = []
+    for file_index in range(files):
+        mod_name = f"mod_{file_index}"
+        relative_path = os.path.join(KUBEJS_ASSETS_DIR, mod_name, "lang", "en_us.json")
+        data = OrderedDict()
+        for entry_index in range(entries):
+            data[f"item.{mod_name}.entry_{entry_index}"] = _sentence(rng, 1, 12)
+        os.makedirs(os.path.dirname(os.path.join(root, relative_path)), exist_ok=True)
+        with open(os.path.join(root, relative_path), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        paths.append(relative_path)
+    return paths
+
+
+def derive_next_version(source_root: str, target_root: str, change_ratio: float = 0.1, seed: int = 2) -> dict:
+    """
+    以 source_root 为旧版本，复制出 target_root 作为新版本，并按 change_ratio 随机修改、删除和新增文件，
+    用于比较类功能的测试。返回修改/删除/新增的文件数量。
+    """
+    rng = random.Random(seed)
+    shutil.rmtree(target_root, ignore_errors=True)
+    shutil.copytree(source_root, target_root)
+    stats = {'modified': 0, 'removed': 0, 'added': 0}
+    for dir_path, _, filenames in sorted(os.walk(target_root)):
+        for filename in sorted(filenames):
+            file_path = os.path.join(dir_path, filename)
+            roll = rng.random()
+            if roll < change_ratio:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    lines = f.read().split("\n")
+                position = rng.randrange(len(lines))
+                lines.insert(position, lines[position].replace("iron", "steel"))
+                with open(file_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines))
+                stats['modified'] += 1
+            elif roll < change_ratio * 1.2:
+                os.remove(file_path)
+                stats['removed'] += 1
+            elif roll < change_ratio * 1.4:
+                with open(file_path + ".new", "w", encoding="utf-8") as f:
+                    f.write(_sentence(rng, 5, 40))
+                stats['added'] += 1
+    return stats
+
+
+def generate_modpack(root: str, chapters: int = 20, quests: int = 30, tasks: int = 3, rewards: int = 2,
+                     lore_lines: int = 3, image_hovers: int = 2, lang_files: int = 10, lang_entries: int = 500,
+                     seed: int = 1) -> dict:
+    """生成完整的合成整合包（任务树 + kubejs 语言文件），返回统计信息。"""
+    stats = generate_quests(root, chapters, quests, tasks, rewards, lore_lines, image_hovers, seed)
+    stats['lang_files'] = generate_kubejs_lang(root, lang_files, lang_entries, seed)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成用于性能测试的合成 FTB Quests 整合包数据。")
+    parser.add_argument("output_dir", help="输出目录（相当于整合包的 overrides 根目录）")
+    parser.add_argument("--chapters", type=int, default=20, help="章节数量")
+    parser.add_argument("--quests", type=int, default=30, help="每个章节的任务数量")
+    parser.add_argument("--tasks", type=int, default=3, help="每个任务的子任务数量上限")
+    parser.add_argument("--rewards", type=int, default=2, help="每个任务的奖励数量上限")
+    parser.add_argument("--lore-lines", type=int, default=3, help="物品 lore 行数上限（0 表示不生成 components）")
+    parser.add_argument("--image-hovers", type=int, default=2, help="每个章节带 hover 的图片数量上限")
+    parser.add_argument("--lang-files", type=int, default=10, help="kubejs 语言文件数量")
+    parser.add_argument("--lang-entries", type=int, default=500, help="每个 kubejs 语言文件的条目数量")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args()
+
+    stats = generate_modpack(args.output_dir, args.chapters, args.quests, args.tasks, args.rewards,
+                             args.lore_lines, args.image_hovers, args.lang_files, args.lang_entries, args.seed)
+    stats['lang_files'] = len(stats['lang_files'])
+    print(f"已生成合成整合包数据到 {args.output_dir}: {json.dumps(stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+"""
+本地 Paratranz 模拟服务器。
+
+实现同步脚本用到的接口（路径与返回格式与 https://paratranz.cn/api 一致）：
+    GET  /api/projects/{项目ID}/files                         文件列表
+    POST /api/projects/{项目ID}/files                         上传新文件（multipart: file, path）
+    POST /api/projects/{项目ID}/files/{文件ID}                 更新已有文件（multipart: file）
+    GET  /api/projects/{项目ID}/files/{文件ID}/translation     获取文件的词条与译文
+    POST /api/projects/{项目ID}/artifacts                     触发项目导出
+    GET  /api/projects/{项目ID}/artifacts                     最近一次导出的信息
+    GET  /api/projects/{项目ID}/artifacts/download            下载导出包（zip，utf8/ 下为各文件的词条列表）
+
+并可配置响应延迟、速率限制（超出时返回 429 与 Retry-After）和随机错误注入（500/502/503）。
+额外提供 GET /__stats（请求统计）与 POST /__reset（清空统计）供测试脚本使用。
+将 PARATRANZ_API_URL 设为 http://<地址>:<端口>/api 即可让 para2github.py / github2para.py 连接本服务器。
+
+用法:
+    python benchmarks/mock_paratranz.py [--port 8765] [--seed-dir Source] [--latency-ms 50] [--jitter-ms 20]
+                                        [--rate-limit 10] [--burst 20] [--error-rate 0.01]
+                                        [--artifact-build-seconds 2] [--artifact-zip FIXTURE.zip]
+"""
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_FILES_PATH = re.compile(r'^/api/projects/(\d+)/files/?$')
+_FILE_PATH = re.compile(r'^/api/projects/(\d+)/files/(\d+)/?$')
+_TRANSLATION_PATH = re.compile(r'^/api/projects/(\d+)/files/(\d+)/translation/?$')
+_ARTIFACTS_PATH = re.compile(r'^/api/projects/(\d+)/artifacts/?$')
+_ARTIFACT_DOWNLOAD_PATH = re.compile(r'^/api/projects/(\d+)/artifacts/download/?$')
+
+
+@dataclass
+class MockOptions:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    rate_limit: float = 0.0  # 每秒允许的请求数，0 表示不限制
+    burst: int = 0  # 令牌桶容量，0 表示与 rate_limit 相同
+    error_rate: float = 0.0
+    translated_ratio: float = 0.8  # 新上传文件中视为“已翻译”的词条比例
+    seed: int = 1
+    artifact_build_seconds: float = 0.0  # 触发导出后到导出包可下载之间的时间
+    artifact_zip: str = None  # 以该 zip 文件作为导出包（测试夹具），不根据项目数据生成
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class MockParatranzState:
+    """模拟服务器的全部状态：项目文件、词条以及请求统计。所有方法均线程安全。"""
+
+    def __init__(self, options: MockOptions):
+        self.options = options
+        self.lock = threading.Lock()
+        self.random = random.Random(options.seed)
+        self.files = {}  # 文件ID -> 文件信息
+        self.strings = {}  # 文件ID -> 词条列表
+        self.next_file_id = 1
+        self.next_string_id = 1
+        self.artifact = None  # 最近一次已完成的导出: (信息, zip 字节)
+        self.pending_artifact = None  # 正在生成的导出: (完成时间, 信息, zip 字节)
+        self.next_artifact_id = 1
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.reset_stats()
+
+    @property
+    def burst(self) -> int:
+        return self.options.burst or max(1, math.ceil(self.options.rate_limit))
+
+    def reset_stats(self):
+        with self.lock:
+            self.started_at = time.monotonic()
+            self.request_counts = {}
+            self.status_counts = {}
+            self.latencies = []
+            self.bytes_sent = 0
+            self.bytes_received = 0
+
+    # --- 请求统计与流量控制 ---
+    def record(self, endpoint: str, status: int, seconds: float, sent: int, received: int):
+        with self.lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+            self.latencies.append(seconds)
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def stats(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            elapsed = time.monotonic() - self.started_at
+            return {
+                'elapsed_seconds': round(elapsed, 3),
+                'requests': sum(self.request_counts.values()),
+                'requests_by_endpoint': dict(self.request_counts),
+                'responses_by_status': dict(self.status_counts),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'latency_ms': {
+                    'p50': round(_percentile(latencies, 0.50) * 1000, 2),
+                    'p90': round(_percentile(latencies, 0.90) * 1000, 2),
+                    'p99': round(_percentile(latencies, 0.99) * 1000, 2),
+                    'max': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                },
+            }
+
+    def take_token(self) -> float:
+        """从令牌桶中取一个令牌；成功返回 0，否则返回需要等待的秒数。"""
+        if not self.options.rate_limit:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.options.rate_limit)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.options.rate_limit
+
+    def injected_error(self):
+        """按 error_rate 随机返回一个错误状态码，不注入时返回 None。"""
+        if not self.options.error_rate:
+            return None
+        with self.lock:
+            if self.random.random() < self.options.error_rate:
+                return self.random.choice((500, 502, 503))
+        return None
+
+    def delay(self) -> float:
+        with self.lock:
+            jitter = self.random.uniform(0, self.options.jitter_ms) if self.options.jitter_ms else 0.0
+        return (self.options.latency_ms + jitter) / 1000
+
+    # --- 项目数据 ---
+    def _build_strings(self, content: bytes, previous: list = None) -> list:
+        data = json.loads(content.decode('utf-8-sig'))
+        old_by_key = {item['key']: item for item in previous or ()}
+        strings = []
+        for key, value in data.items():
+            original = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+            old = old_by_key.get(key)
+            if old is not None and old['original'] == original:
+                strings.append(old)
+                continue
+            translated = self.random.random() < self.options.translated_ratio
+            strings.append({
+                'id': self.next_string_id,
+                'key': key,
+                'original': original,
+                'translation': f"译:{original}" if translated else "",
+                'stage': 1 if translated else 0,
+                'context': "",
+            })
+            self.next_string_id += 1
+        return strings
+
+    def _file_info(self, file_id: int, name: str, content: bytes, strings: list) -> dict:
+        translated = sum(1 for item in strings if item['stage'] > 0)
+        now = _now()
+        return {
+            'id': file_id,
+            'createdAt': self.files.get(file_id, {}).get('createdAt', now),
+            'updatedAt': now,
+            'modifiedAt': now,
+            'name': name,
+            'project': 0,
+            'format': 'json',
+            'total': len(strings),
+            'translated': translated,
+            'disputed': 0,
+            'checked': 0,
+            'reviewed': 0,
+            'hidden': 0,
+            'locked': 0,
+            'words': sum(len(item['original'].split()) for item in strings),
+            'hash': hashlib.md5(content).hexdigest(),
+            'folder': os.path.dirname(name),
+            'progress': translated / len(strings) if strings else 0,
+            'extra': None,
+        }
+
+    def list_files(self) -> list:
+        with self.lock:
+            return sorted(self.files.values(), key=lambda info: info['id'])
+
+    def create_file(self, name: str, content: bytes):
+        """新建文件；同名文件已存在时返回 None。"""
+        with self.lock:
+            if any(info['name'] == name for info in self.files.values()):
+                return None
+            file_id = self.next_file_id
+            self.next_file_id += 1
+            strings = self._build_strings(content)
+            self.strings[file_id] = strings
+            self.files[file_id] = self._file_info(file_id, name, content, strings)
+            return self.files[file_id]
+
+    def update_file(self, file_id: int, content: bytes):
+        with self.lock:
+            if file_id not in self.files:
+                return None
+            strings = self._build_strings(content, self.strings[file_id])
+            self.strings[file_id] = strings
+            self.files[file_id] = self._file_info(file_id, self.files[file_id]['name'], content, strings)
+            return self.files[file_id]
+
+    def translation(self, file_id: int):
+        with self.lock:
+            return list(self.strings[file_id]) if file_id in self.strings else None
+
+    # --- 项目导出 ---
+    def _build_artifact_zip(self) -> bytes:
+        if self.options.artifact_zip:
+            with open(self.options.artifact_zip, 'rb') as f:
+                return f.read()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for file_id, info in sorted(self.files.items()):
+                archive.writestr(f"utf8/{info['name']}", json.dumps(self.strings[file_id], ensure_ascii=False))
+        return buffer.getvalue()
+
+    def trigger_artifact(self) -> dict:
+        """按当前项目数据生成导出包，artifact_build_seconds 秒后才可获取。"""
+        with self.lock:
+            strings = [item for items in self.strings.values() for item in items]
+            info = {
+                'id': self.next_artifact_id,
+                'createdAt': _now(),
+                'project': 0,
+                'total': len(strings),
+                'translated': sum(1 for item in strings if item['stage'] > 0),
+                'disputed': 0,
+                'reviewed': 0,
+                'hidden': 0,
+                'duration': self.options.artifact_build_seconds,
+            }
+            self.next_artifact_id += 1
+            self.pending_artifact = (time.monotonic() + self.options.artifact_build_seconds, info,
+                                     self._build_artifact_zip())
+            return info
+
+    def current_artifact(self):
+        """返回最近一次已完成的导出 (信息, zip 字节)，尚未导出过时返回 None。"""
+        with self.lock:
+            if self.pending_artifact is not None and time.monotonic() >= self.pending_artifact[0]:
+                self.artifact = self.pending_artifact[1:]
+                self.pending_artifact = None
+            return self.artifact
+
+    def seed_from_directory(self, source_dir: str) -> int:
+        """将 source_dir 下所有 en_us*.json 以相对路径为文件名加入项目，返回文件数量。"""
+        count = 0
+        for root, _, files in os.walk(source_dir):
+            for filename in sorted(files):
+                if "en_us" in filename and filename.endswith(".json"):
+                    path = os.path.join(root, filename)
+                    name = os.path.relpath(path, source_dir).replace(os.sep, "/")
+                    with open(path, 'rb') as f:
+                        if self.create_file(name, f.read()) is not None:
+                            count += 1
+        return count
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    """解析 multipart/form-data，返回 {字段名: (文件名或 None, 内容字节)}。"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+class MockParatranzHandler(BaseHTTPRequestHandler):
+    server_version = "MockParatranz/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> MockParatranzState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload, headers: dict = None) -> int:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        return self._send_body(status, body, "application/json; charset=utf-8", headers)
+
+    def _send_body(self, status: int, body: bytes, content_type: str, headers: dict = None) -> int:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self, method: str):
+        start = time.perf_counter()
+        path = self.path.split("?", 1)[0]
+        body = self._read_body()
+
+        if path == "/__stats" and method == "GET":
+            self._send_json(200, self.state.stats())
+            return
+        if path == "/__reset" and method == "POST":
+            self.state.reset_stats()
+            self._send_json(200, {'ok': True})
+            return
+
+        endpoint, status, sent = self._dispatch(method, path, body)
+        self.state.record(endpoint, status, time.perf_counter() - start, sent, len(body))
+
+    def _dispatch(self, method: str, path: str, body: bytes):
+        endpoint = f"{method} {self._endpoint_name(path)}"
+        if not self.headers.get("Authorization"):
+            return endpoint, 401, self._send_json(401, {'message': "Unauthorized"})
+
+        wait = self.state.take_token()
+        if wait:
+            retry_after = str(max(1, math.ceil(wait)))
+            return endpoint, 429, self._send_json(429, {'message': "Too Many Requests"}, {"Retry-After": retry_after})
+
+        time.sleep(self.state.delay())
+        error_status = self.state.injected_error()
+        if error_status:
+            return endpoint, error_status, self._send_json(error_status, {'message': "Injected error"})
+
+        match = _TRANSLATION_PATH.match(path)
+        if match and method == "GET":
+            strings = self.state.translation(int(match.group(2)))
+            if strings is None:
+                return endpoint, 404, self._send_json(404, {'message': "File not found"})
+            return endpoint, 200, self._send_json(200, strings)
+
+        if _ARTIFACTS_PATH.match(path):
+            if method == "POST":
+                return endpoint, 200, self._send_json(200, self.state.trigger_artifact())
+            artifact = self.state.current_artifact()
+            if artifact is None:
+                return endpoint, 404, self._send_json(404, {'message': "Artifact not found"})
+            return endpoint, 200, self._send_json(200, artifact[0])
+
+        if _ARTIFACT_DOWNLOAD_PATH.match(path) and method == "GET":
+            artifact = self.state.current_artifact()
+            if artifact is None:
+                return endpoint, 404, self._send_json(404, {'message': "Artifact not found"})
+            return endpoint, 200, self._send_body(200, artifact[1], "application/zip")
+
+        match = _FILES_PATH.match(path)
+        if match and method == "GET":
+            return endpoint, 200, self._send_json(200, self.state.list_files())
+        if match and method == "POST":
+            fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+            if "file" not in fields:
+                return endpoint, 400, self._send_json(400, {'message': "Missing file"})
+            filename, content = fields["file"]
+            folder = fields.get("path", (None, b""))[1].decode('utf-8')
+            name = folder + os.path.basename(filename or "")
+            try:
+                info = self.state.create_file(name, content)
+            except ValueError:
+                return endpoint, 400, self._send_json(400, {'message': "Invalid JSON file"})
+            if info is None:
+                return endpoint, 400, self._send_json(400, {'message': f"File {name} exists"})
+            return endpoint, 200, self._send_json(200, {'file': info, 'revision': {'id': info['id']}})
+
+        match = _FILE_PATH.match(path)
+        if match and method == "POST":
+            fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+            if "file" not in fields:
+                return endpoint, 400, self._send_json(400, {'message': "Missing file"})
+            try:
+                info = self.state.update_file(int(match.group(2)), fields["file"][1])
+            except ValueError:
+                return endpoint, 400, self._send_json(400, {'message': "Invalid JSON file"})
+            if info is None:
+                return endpoint, 404, self._send_json(404, {'message': "File not found"})
+            return endpoint, 200, self._send_json(200, {'file': info, 'revision': {'id': info['id']}})
+
+        return endpoint, 404, self._send_json(404, {'message': "Not found"})
+
+    @staticmethod
+    def _endpoint_name(path: str) -> str:
+        """将具体路径归并为接口名称，便于统计（如 /api/projects/1/files/3 -> files/{id}）。"""
+        if _TRANSLATION_PATH.match(path):
+            return "files/{id}/translation"
+        if _FILE_PATH.match(path):
+            return "files/{id}"
+        if _FILES_PATH.match(path):
+            return "files"
+        if _ARTIFACTS_PATH.match(path):
+            return "artifacts"
+        if _ARTIFACT_DOWNLOAD_PATH.match(path):
+            return "artifacts/download"
+        return path
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def start_mock_server(options: MockOptions = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    在后台线程中启动模拟服务器，返回 (server, base_url)。
+    port 为 0 时自动选择空闲端口；通过 server.state 访问服务器状态，用 server.shutdown() 停止。
+    """
+    server = ThreadingHTTPServer((host, port), MockParatranzHandler)
+    server.daemon_threads = True
+    server.state = MockParatranzState(options or MockOptions())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/api"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 Paratranz 模拟服务器。")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--seed-dir", help="启动时将该目录下的 en_us*.json 作为项目文件加载")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求的固定延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="在固定延迟之上附加的随机延迟上限（毫秒）")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="每秒允许的请求数（0 表示不限制）")
+    parser.add_argument("--burst", type=int, default=0, help="速率限制的突发容量（默认与 --rate-limit 相同）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 5xx 错误的概率")
+    parser.add_argument("--translated-ratio", type=float, default=0.8, help="词条中已翻译的比例")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--artifact-build-seconds", type=float, default=0.0, help="生成导出包所需的时间（秒）")
+    parser.add_argument("--artifact-zip", help="以该 zip 文件作为项目导出包（测试夹具）")
+    args = parser.parse_args()
+
+    options = MockOptions(args.latency_ms, args.jitter_ms, args.rate_limit, args.burst, args.error_rate,
+                          args.translated_ratio, args.seed, args.artifact_build_seconds, args.artifact_zip)
+    server, base_url = start_mock_server(options, args.host, args.port)
+    if args.seed_dir:
+        print(f"已加载 {server.state.seed_from_directory(args.seed_dir)} 个文件。")
+    print(f"模拟服务器已启动: PARATRANZ_API_URL={base_url}（Ctrl+C 停止）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+同步脚本吞吐量测试。
+
+在临时目录中生成合成整合包（见 generate_modpack.py），启动本地 Paratranz 模拟服务器
+（见 mock_paratranz.py），然后以子进程方式运行：
+    download:          .github/workflows/para2github.py （通过项目导出包下载译文、写入 CNPack 并合并 FTB Quests 语言文件）
+    download-per-file: 同上，但逐个文件请求译文（PARATRANZ_BULK_EXPORT=0）
+    upload:            .github/workflows/github2para.py （拆分 FTB Quests 语言文件并上传，需要安装 paratranz_client）
+并以 JSON 输出每个场景的耗时、文件吞吐量（文件/秒）、各接口的请求次数、响应状态码分布和服务端延迟分位数。
+可通过延迟、速率限制与错误注入参数模拟不同的网络状况，用于离线比较并发与重试策略的改动。
+
+用法:
+    python benchmarks/paratranz_harness.py [--scenario download download-per-file upload]
+                                           [--scale small|medium|large] [--latency-ms 50] [--jitter-ms 20]
+                                           [--rate-limit 10] [--burst 20] [--error-rate 0.01]
+                                           [--artifact-build-seconds 2] [--artifact-zip FIXTURE.zip] [--output FILE]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+WORKFLOWS_DIR = REPO_ROOT / ".github" / "workflows"
+sys.path.insert(0, str(WORKFLOWS_DIR))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+import LangSpliter  # noqa: E402
+from generate_modpack import QUESTS_DIR, generate_modpack  # noqa: E402
+from mock_paratranz import MockOptions, start_mock_server  # noqa: E402
+from run_benchmarks import SCALES  # noqa: E402
+
+PROJECT_ID = "1"
+# 与 github2para.py 中的拆分输出目录一致
+QUESTS_JSON_DIR = os.path.join("kubejs", "assets", "quests", "lang")
+
+SCENARIOS = {
+    # 名称: (脚本, 额外的环境变量)
+    "download": ("para2github.py", {}),
+    "download-per-file": ("para2github.py", {"PARATRANZ_BULK_EXPORT": "0"}),
+    "upload": ("github2para.py", {}),
+}
+
+
+def prepare_workspace(workspace: Path, params: dict) -> int:
+    """生成 Source/ 下的合成整合包，并像 github2para.py 一样预先拆分 FTB Quests 语言文件。返回待同步的文件数。"""
+    source_root = workspace / "Source"
+    generate_modpack(str(source_root), **params)
+    quests_dir = source_root / QUESTS_DIR
+    with contextlib.redirect_stdout(io.StringIO()):
+        LangSpliter.split_and_process_all(str(quests_dir / "lang" / "en_us.snbt"), str(quests_dir / "chapters"),
+                                          str(quests_dir / "chapter_groups.snbt"),
+                                          str(source_root / QUESTS_JSON_DIR), False)
+
+    # para2github 从当前目录读取替换规则和译文后处理规则
+    rules_dir = workspace / ".github" / "configs"
+    rules_dir.mkdir(parents=True, exist_ok=True)
+    for config_name in ("replace_rule.json", "translation_transforms.json"):
+        shutil.copy(REPO_ROOT / ".github" / "configs" / config_name, rules_dir / config_name)
+    return sum(1 for p in source_root.rglob("*.json") if "en_us" in p.name)
+
+
+def run_scenario(name: str, workspace: Path, server, base_url: str, files: int, timeout: float) -> dict:
+    """运行一个场景。files 为该场景需要同步的文件数，用于计算吞吐量。"""
+    script, extra_env = SCENARIOS[name]
+    env = dict(os.environ, API_TOKEN="mock-token", PROJECT_ID=PROJECT_ID, PARATRANZ_API_URL=base_url,
+               PYTHONIOENCODING="utf-8", **extra_env)
+    server.state.reset_stats()
+    start = time.perf_counter()
+    try:
+        completed = subprocess.run([sys.executable, str(WORKFLOWS_DIR / script)], cwd=workspace, env=env,
+                                   capture_output=True, text=True, encoding="utf-8", timeout=timeout)
+        exit_code, stderr = completed.returncode, completed.stderr
+    except subprocess.TimeoutExpired as e:
+        exit_code, stderr = None, f"超时（{timeout}s）: {e}"
+    wall_seconds = time.perf_counter() - start
+
+    stats = server.state.stats()
+    result = {
+        'script': script,
+        'exit_code': exit_code,
+        'wall_seconds': round(wall_seconds, 3),
+        'files': files,
+        'files_per_second': round(files / wall_seconds, 2) if wall_seconds else 0.0,
+        'server': stats,
+    }
+    if exit_code != 0:
+        # 只保留错误输出的末尾，便于定位失败原因
+        result['stderr_tail'] = stderr.strip().splitlines()[-5:]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在本地 Paratranz 模拟服务器上测试同步脚本的吞吐量。")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help="要运行的场景")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="合成数据规模")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="每个请求的固定延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="附加的随机延迟上限（毫秒）")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="每秒允许的请求数（0 表示不限制）")
+    parser.add_argument("--burst", type=int, default=0, help="速率限制的突发容量")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 5xx 错误的概率")
+    parser.add_argument("--artifact-build-seconds", type=float, default=0.0, help="模拟生成项目导出包所需的时间（秒）")
+    parser.add_argument("--artifact-zip", help="以该 zip 文件作为项目导出包（测试夹具）")
+    parser.add_argument("--timeout", type=float, default=600.0, help="单个场景的超时时间（秒）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--output", help="将 JSON 结果写入该文件")
+    args = parser.parse_args()
+
+    options = MockOptions(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit=args.rate_limit,
+                          burst=args.burst, error_rate=args.error_rate, seed=args.seed,
+                          artifact_build_seconds=args.artifact_build_seconds, artifact_zip=args.artifact_zip)
+    workspace = Path(tempfile.mkdtemp(prefix="ftbq_paratranz_"))
+    server = None
+    try:
+        print(f"正在生成合成数据（规模: {args.scale}）到 {workspace} ...", file=sys.stderr)
+        source_files = prepare_workspace(workspace, SCALES[args.scale])
+        server, base_url = start_mock_server(options)
+        seeded = server.state.seed_from_directory(str(workspace / "Source"))
+        print(f"模拟服务器: {base_url}，已加载 {seeded} 个文件。", file=sys.stderr)
+
+        results = {}
+        for name in args.scenario:
+            if name == "upload" and importlib.util.find_spec("paratranz_client") is None:
+                print("未安装 paratranz_client，跳过 upload 场景。", file=sys.stderr)
+                results[name] = {'skipped': "paratranz_client 未安装"}
+                continue
+            print(f"  -> 运行场景 {name} ...", file=sys.stderr)
+            results[name] = run_scenario(name, workspace, server, base_url, seeded, args.timeout)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    report = {
+        'scale': args.scale,
+        'source_files': source_files,
+        'mock': vars(options),
+        'results': results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+离线性能测试。
+
+在临时目录中用 generate_modpack.py 生成合成整合包，依次测试以下函数的耗时（多次运行取最小值）
+与峰值内存（tracemalloc 单独运行一次）：
+    LangSpliter.split_and_process_all
+    LangSpliter.merge_all_to_snbt
+    para2github.process_translation（流式解析 API 响应）
+    para2github.save_translation
+    check_ftb_colors.check_directory
+    compare_archives.compare_directories
+    update_checker.apply_exclusion_rules
+
+结果以 JSON 输出，并与已保存的基线（默认 benchmarks/baseline.json）逐项比较。
+基线与运行环境相关，更换机器后应先使用 --update-baseline 重新生成。
+
+用法:
+    python benchmarks/run_benchmarks.py [--scale small|medium|large] [--repeat N] [--output FILE]
+                                        [--baseline FILE] [--update-baseline] [--tolerance 0.25]
+                                        [--fail-on-regression] [--only NAME ...]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARKS_DIR.parent
+sys.path.insert(0, str(REPO_ROOT / ".github" / "workflows"))
+sys.path.insert(0, str(REPO_ROOT / ".github" / "scripts"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+# para2github 在导入时检查这两个环境变量；性能测试不访问网络，使用占位值即可
+os.environ.setdefault("API_TOKEN", "benchmark")
+os.environ.setdefault("PROJECT_ID", "0")
+
+import LangSpliter  # noqa: E402
+import check_ftb_colors  # noqa: E402
+import compare_archives  # noqa: E402
+import para2github  # noqa: E402
+import update_checker  # noqa: E402
+from generate_modpack import QUESTS_DIR, derive_next_version, generate_modpack  # noqa: E402
+
+DEFAULT_BASELINE_FILE = BENCHMARKS_DIR / "baseline.json"
+# 测试之间的输入依赖：被依赖的测试未被选中时，会先以不计时的方式运行一次以准备输入
+BENCHMARK_DEPENDENCIES = {
+    "LangSpliter.merge_all_to_snbt": "LangSpliter.split_and_process_all",
+    "check_ftb_colors.check_directory": "para2github.save_translation",
+}
+
+# 耗时的绝对差值低于该值（秒）时视为测量噪声，不计为退化
+WALL_NOISE_FLOOR = 0.02
+
+SCALES = {
+    "small": dict(chapters=5, quests=10, tasks=2, rewards=1, lore_lines=2, image_hovers=1,
+                  lang_files=3, lang_entries=100),
+    "medium": dict(chapters=20, quests=30, tasks=3, rewards=2, lore_lines=3, image_hovers=2,
+                   lang_files=10, lang_entries=500),
+    "large": dict(chapters=80, quests=60, tasks=4, rewards=3, lore_lines=4, image_hovers=3,
+                  lang_files=40, lang_entries=2000),
+}
+
+
+def translate_value(value):
+    """生成“译文”：保留颜色代码等格式字符，只替换部分单词，使长度与结构接近真实翻译。"""
+    if isinstance(value, list):
+        return [translate_value(v) for v in value]
+    return value.replace("iron", "铁").replace("gold", "金").replace("machine", "机器")
+
+
+def prepare_workspace(workspace: Path, params: dict) -> dict:
+    """生成测试所需的全部输入，返回各项测试共用的路径与数据。"""
+    source_root = workspace / "Source"
+    stats = generate_modpack(str(source_root), **params)
+    next_root = workspace / "Source_next"
+    derive_next_version(str(source_root), str(next_root))
+
+    # merge_all_to_snbt 与 para2github 从当前目录下读取替换规则和译文后处理规则
+    rules_dir = workspace / ".github" / "configs"
+    rules_dir.mkdir(parents=True, exist_ok=True)
+    for config_name in ("replace_rule.json", "translation_transforms.json"):
+        shutil.copy(REPO_ROOT / ".github" / "configs" / config_name, rules_dir / config_name)
+
+    translations = {}
+    translation_responses = {}
+    for relative_path in stats['lang_files']:
+        with open(source_root / relative_path, "r", encoding="utf-8") as f:
+            source = json.load(f)
+        translations[relative_path] = {k: translate_value(v) for k, v in source.items()}
+        # 与 Paratranz 获取译文接口相同格式的响应体
+        translation_responses[relative_path] = json.dumps(
+            [{'key': k, 'original': v, 'translation': translate_value(v), 'stage': 1} for k, v in source.items()],
+            ensure_ascii=False).encode("utf-8")
+
+    with open(REPO_ROOT / ".github" / "configs" / "modpack.json", "r", encoding="utf-8") as f:
+        exclusion_patterns = json.load(f).get("exclusionPatterns", [])
+
+    quests_dir = source_root / QUESTS_DIR
+    return {
+        'stats': stats,
+        'source_root': source_root,
+        'next_root': next_root,
+        'lang_file': quests_dir / "lang" / "en_us.snbt",
+        'chapters_dir': quests_dir / "chapters",
+        'groups_file': quests_dir / "chapter_groups.snbt",
+        'split_dir': workspace / "split",
+        'merge_dir': workspace / "merge",
+        'translations': translations,
+        'translation_responses': translation_responses,
+        'exclusion_patterns': exclusion_patterns,
+        'next_files': {p for p in next_root.rglob("*") if p.is_file()},
+    }
+
+
+def build_benchmarks(ctx: dict) -> dict:
+    """返回 {名称: 无参可调用对象}，按依赖顺序排列（merge 使用 split 的输出）。"""
+
+    def split():
+        return LangSpliter.split_and_process_all(str(ctx['lang_file']), str(ctx['chapters_dir']),
+                                                 str(ctx['groups_file']), str(ctx['split_dir']), False)
+
+    def merge():
+        LangSpliter.merge_all_to_snbt(str(ctx['split_dir']), str(ctx['merge_dir'] / "zh_cn.snbt"),
+                                      str(ctx['chapters_dir']), str(ctx['merge_dir'] / "chapters"))
+
+    def process_translation():
+        # 按 API 响应的分块大小逐块提供响应体，测试流式解析并直接写入字典的峰值内存
+        chunk_size = para2github.STREAM_CHUNK_SIZE
+        for relative_path, body in ctx['translation_responses'].items():
+            chunks = (body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+            para2github.process_translation(0, Path(relative_path), para2github.iter_json_array(chunks))
+
+    def save_translation():
+        # save_translation 使用相对于当前目录的 Source/ 与 CNPack/
+        for relative_path, zh_cn_dict in ctx['translations'].items():
+            para2github.save_translation(zh_cn_dict, Path(relative_path))
+
+    def check_directory():
+        return list(check_ftb_colors.check_directory("CNPack"))
+
+    def compare_directories():
+        return compare_archives.compare_directories(str(ctx['source_root']), str(ctx['next_root']))
+
+    def apply_exclusion_rules():
+        return update_checker.apply_exclusion_rules(ctx['next_files'], ctx['exclusion_patterns'], ctx['next_root'])
+
+    return {
+        "LangSpliter.split_and_process_all": split,
+        "LangSpliter.merge_all_to_snbt": merge,
+        "para2github.process_translation": process_translation,
+        "para2github.save_translation": save_translation,
+        "check_ftb_colors.check_directory": check_directory,
+        "compare_archives.compare_directories": compare_directories,
+        "update_checker.apply_exclusion_rules": apply_exclusion_rules,
+    }
+
+
+def measure(func, repeat: int) -> dict:
+    """运行 repeat 次取最短耗时，再在 tracemalloc 下单独运行一次记录峰值内存。被测函数的输出被丢弃。"""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+    # 先回收循环引用的垃圾，使峰值内存不受之前导入的模块与测试留下的垃圾回收进度影响
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'wall_seconds': round(min(timings), 6), 'peak_memory_bytes': peak}
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> dict:
+    """逐项计算当前结果与基线的比值，超过 1 + tolerance 的记为退化（耗时还需超出 WALL_NOISE_FLOOR）。"""
+    comparison = {}
+    baseline_results = baseline.get('results', {})
+    for name, result in results.items():
+        base = baseline_results.get(name)
+        if not base:
+            comparison[name] = {'status': 'new'}
+            continue
+        entry = {}
+        regressed = False
+        for metric in ('wall_seconds', 'peak_memory_bytes'):
+            if base.get(metric):
+                ratio = result[metric] / base[metric]
+                entry[f'{metric}_ratio'] = round(ratio, 3)
+                noise_floor = WALL_NOISE_FLOOR if metric == 'wall_seconds' else 0
+                if ratio > 1 + tolerance and result[metric] - base[metric] > noise_floor:
+                    regressed = True
+        entry['status'] = 'regressed' if regressed else 'ok'
+        comparison[name] = entry
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线性能测试：生成合成整合包并测试各处理函数的耗时与峰值内存。")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium", help="合成数据规模")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测试的计时次数（取最短耗时）")
+    parser.add_argument("--output", help="将 JSON 结果写入该文件（默认仅输出到标准输出）")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_FILE), help="基线文件路径")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对退化幅度（默认 0.25，即 25%%）")
+    parser.add_argument("--fail-on-regression", action="store_true", help="存在退化时以非零状态码退出")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="只运行名称中包含任一关键字的测试")
+    args = parser.parse_args()
+
+    params = SCALES[args.scale]
+    original_cwd = os.getcwd()
+    workspace = Path(tempfile.mkdtemp(prefix="ftbq_bench_"))
+    try:
+        print(f"正在生成合成数据（规模: {args.scale}）到 {workspace} ...", file=sys.stderr)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctx = prepare_workspace(workspace, params)
+        os.chdir(workspace)
+
+        benchmarks = build_benchmarks(ctx)
+        selected = [name for name in benchmarks
+                    if not args.only or any(keyword in name for keyword in args.only)]
+        results = {}
+        for name in selected:
+            dependency = BENCHMARK_DEPENDENCIES.get(name)
+            if dependency and dependency not in selected:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    benchmarks[dependency]()
+            print(f"  -> {name} ...", file=sys.stderr)
+            results[name] = measure(benchmarks[name], args.repeat)
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    stats = dict(ctx['stats'])
+    stats['lang_files'] = len(stats['lang_files'])
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'params': params,
+        'dataset': stats,
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.update_baseline:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print(f"警告：基线 {baseline_path} 的数据规模与本次不同，比较结果仅供参考。", file=sys.stderr)
+        report['comparison'] = compare_with_baseline(results, baseline, args.tolerance)
+        regressions = [name for name, entry in report['comparison'].items() if entry['status'] == 'regressed']
+
+    output = json.dumps(report, ensure_ascii=False, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    if args.update_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"已更新基线文件: {baseline_path}", file=sys.stderr)
+
+    if regressions:
+        print(f"性能退化（超过 {args.tolerance:.0%}）: {', '.join(regressions)}", file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
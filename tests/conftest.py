@@ -0,0 +1,45 @@
+"""
+测试共用的配置：将 .github/workflows（流水线脚本）与 benchmarks（合成数据生成器）加入导入路径。
+
+运行方式（在仓库根目录）:
+    python -m pytest -q tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / ".github" / "workflows"))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+
+from generate_modpack import QUESTS_DIR, generate_quests  # noqa: E402
+
+# 仓库中实际的 FTB Quests 源语言文件（Source 中有整合包内容时存在）
+REPO_LANG_SNBT = REPO_ROOT / "Source" / QUESTS_DIR / "lang" / "en_us.snbt"
+
+
+@pytest.fixture(scope="session")
+def quests_dir(tmp_path_factory) -> Path:
+    """生成一份小规模的合成任务树（章节 SNBT、lang/en_us.snbt），整个测试会话共用。"""
+    root = tmp_path_factory.mktemp("modpack")
+    generate_quests(str(root), chapters=4, quests=8, tasks=3, rewards=2, lore_lines=3, image_hovers=2, seed=7)
+    return root / QUESTS_DIR
+
+
+def lang_snbt_inputs(quests_dir: Path) -> list:
+    """差异测试使用的语言文件：合成任务树的 en_us.snbt，以及仓库中实际存在的 en_us.snbt。"""
+    paths = [quests_dir / "lang" / "en_us.snbt"]
+    if REPO_LANG_SNBT.is_file():
+        paths.append(REPO_LANG_SNBT)
+    return paths
+
+
+def tag_tree(value):
+    """将 ftb_snbt_lib 的标签树转换为带类型名的普通结构，便于逐项比较（包括 Byte 与 Integer 等数值类型）。"""
+    if isinstance(value, dict):
+        return [(type(key).__name__, str(key), tag_tree(item)) for key, item in value.items()]
+    if isinstance(value, list):
+        return (type(value).__name__, [tag_tree(item) for item in value])
+    return (type(value).__name__, value)
+
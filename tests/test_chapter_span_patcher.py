@@ -0,0 +1,230 @@
+"""
+章节文件源码区间修补（LangSpliter.parse_snbt_with_spans / ChapterSpanPatcher）的测试。
+
+区间修补直接改写用户的章节文件，因此其输出必须与完整解析的路径（snbtlib.loads → 修改 → snbtlib.dumps）
+加载后得到完全相同的标签树，无论输入使用何种格式（逗号、缩进、注释、转义、单行）；
+超出支持范围的输入必须抛出 SnbtSpanError，并由 update_chapter_files_with_components 回退到完整解析。
+"""
+import json
+import re
+
+import ftb_snbt_lib as snbtlib
+import pytest
+
+import LangSpliter
+from LangSpliter import (ChapterSpanPatcher, SnbtSpanError, parse_snbt_with_spans, split_and_process_all,
+                         update_chapter_files_with_components)
+from conftest import tag_tree
+
+
+def plain(value):
+    """将两种解析结果统一为普通结构（数值统一为 float），用于比较 parse_snbt_with_spans 与 snbtlib.loads。"""
+    if isinstance(value, dict):
+        return [(str(key), plain(item)) for key, item in value.items()]
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    if isinstance(value, str):
+        return str(value)
+    return float(value)
+
+
+# --- 输入的不同格式（snbtlib.loads 得到的标签树均与原文相同） ---
+def with_commas(text: str) -> str:
+    lines = text.split("\n")
+    for i in range(len(lines) - 1):
+        following = lines[i + 1].lstrip("\t")
+        if lines[i].strip() and not lines[i].endswith(("{", "[", ";")) and following[:1] not in ("}", "]", ""):
+            lines[i] += ","
+    return "\n".join(lines)
+
+
+def with_spaces(text: str) -> str:
+    return re.sub(r"(?m)^\t+", lambda m: "    " * len(m.group(0)), text)
+
+
+def with_comments(text: str) -> str:
+    return re.sub(r"(?m)\{$", "{ # 注释: \"不是字符串\" [", text)
+
+
+def single_line(text: str) -> str:
+    return re.sub(r"\n\t*", " ", text)
+
+
+def with_quoted_keys(text: str) -> str:
+    return re.sub(r"(?m)^([ \t]*)(id|title|hover): ", r'\1"\2": ', text)
+
+
+FORMATS = {
+    'dumps': lambda text: text,
+    'commas': with_commas,
+    'spaces': with_spaces,
+    'comments': with_comments,
+    'single_line': single_line,
+    'quoted_keys': with_quoted_keys,
+    'mixed': lambda text: with_quoted_keys(with_spaces(with_commas(text))),
+}
+
+
+def write_chapters(quests_dir, target_dir, reformat) -> dict:
+    target_dir.mkdir(parents=True, exist_ok=True)
+    texts = {}
+    for path in sorted((quests_dir / "chapters").glob("*.snbt")):
+        text = reformat(path.read_text(encoding="utf-8"))
+        # 格式变换不能改变章节的内容（加引号的键名在 ftb_snbt_lib 中为 String 类型，因此不比较键的类型）
+        assert plain(snbtlib.loads(text)) == plain(snbtlib.loads(path.read_text(encoding="utf-8")))
+        (target_dir / path.name).write_text(text, encoding="utf-8")
+        texts[path.name] = text
+    return texts
+
+
+@pytest.fixture(scope="module")
+def translations(quests_dir) -> dict:
+    """按拆分结果生成的译文：所有条目加上含引号、反斜杠与非 ASCII 字符的后缀，并将一个单行 hover 改为多行。"""
+    buffers = []
+    split_and_process_all(str(quests_dir / "lang" / "en_us.snbt"), str(quests_dir / "chapters"),
+                          str(quests_dir / "chapter_groups.snbt"), "split", False, buffers=buffers, persist=False)
+    combined = {}
+    for buffer in buffers:
+        for key, value in json.loads(buffer.data.decode("utf-8")).items():
+            combined[key] = f'{value} 译"文\\{key[-1]}'
+    single_hover = next(key for key in combined if key.endswith(".hover"))
+    combined[single_hover + "1"] = "新增的第二行"
+    assert any(re.search(r"\.(custom_name|lore\d+)$", key) for key in combined)
+    assert any(".feedback_message" in key for key in combined)
+    return combined
+
+
+class _AlwaysFallBack:
+    def __init__(self, text):
+        raise SnbtSpanError("测试：强制完整解析")
+
+
+def update_chapters(component_data, input_dir, output_dir, monkeypatch=None) -> dict:
+    if monkeypatch is not None:
+        monkeypatch.setattr(LangSpliter, "ChapterSpanPatcher", _AlwaysFallBack)
+    try:
+        update_chapter_files_with_components(component_data, str(input_dir), str(output_dir), {})
+    finally:
+        if monkeypatch is not None:
+            monkeypatch.undo()
+    return {path.name: path.read_text(encoding="utf-8") for path in sorted(output_dir.glob("*.snbt"))}
+
+
+# --- 解析结果与区间 ---
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_parse_matches_snbtlib(quests_dir, tmp_path, fmt):
+    for text in write_chapters(quests_dir, tmp_path, FORMATS[fmt]).values():
+        tree = parse_snbt_with_spans(text)
+        assert plain(tree) == plain(snbtlib.loads(text))
+
+        def check_spans(node):
+            if isinstance(node, dict):
+                for key, item in node.items():
+                    start, end = node.spans[key]
+                    assert plain(snbtlib.loads("{v: " + text[start:end] + "}")["v"]) == plain(item)
+                    check_spans(item)
+            elif isinstance(node, list):
+                for item in node:
+                    check_spans(item)
+        check_spans(tree)
+
+
+# --- 区间修补与完整解析的输出一致 ---
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_span_patch_matches_full_round_trip(quests_dir, tmp_path, translations, monkeypatch, fmt):
+    input_dir = tmp_path / "in"
+    write_chapters(quests_dir, input_dir, FORMATS[fmt])
+    patched = update_chapters(translations, input_dir, tmp_path / "patched")
+    redumped = update_chapters(translations, input_dir, tmp_path / "redumped", monkeypatch)
+
+    assert patched and patched.keys() == redumped.keys()
+    for name, text in patched.items():
+        assert tag_tree(snbtlib.loads(text)) == tag_tree(snbtlib.loads(redumped[name])), name
+        if fmt == 'dumps':
+            # 输入本身就是 dumps 的格式时，修补结果与重新序列化的结果逐字节相同
+            assert text == redumped[name], name
+
+
+def test_unmodified_text_is_preserved(quests_dir, tmp_path, translations):
+    input_dir = tmp_path / "in"
+    texts = write_chapters(quests_dir, input_dir, lambda text: with_comments(with_commas(text)))
+    patched = update_chapters(translations, input_dir, tmp_path / "patched")
+    for name, text in patched.items():
+        # 注释只在区间修补的结果中保留
+        assert text.count("# 注释") == texts[name].count("# 注释")
+
+
+def test_render_replaces_only_assigned_spans():
+    text = '{ # 注释\n    id: "0A",\n    images: [{hover: "old", x: 1.5d}],\n    title: "t"\n}\n'
+    patcher = ChapterSpanPatcher(text)
+    image = patcher.tree['images'][0]
+    patcher.assign(image, 'hover', ["第一行", 'say "hi" \\'])
+    patcher.assign(patcher.tree, 'title', "标题")
+    assert patcher.render() == ('{ # 注释\n    id: "0A",\n    images: [{hover: [\n    \t"第一行"\n    \t"say \\"hi\\" \\\\"\n'
+                                '    ], x: 1.5d}],\n    title: "标题"\n}\n')
+    assert plain(snbtlib.loads(patcher.render())) == plain(patcher.tree)
+
+
+# --- 回退条件 ---
+@pytest.mark.parametrize("text, message", [
+    ('{a: "x"} @', "无法识别"),
+    ('{a: }', "期望一个值"),
+    ('{[: "x"}', "期望键名"),
+    ('{"a" "x"}', "缺少 ':'"),
+    ('["x"]', "必须以 Compound 开头"),
+    ('{a: "x"} {b: "y"}', "多余内容"),
+])
+def test_parse_errors(text, message):
+    with pytest.raises(SnbtSpanError, match=message):
+        parse_snbt_with_spans(text)
+
+
+def test_assign_new_key_raises():
+    patcher = ChapterSpanPatcher('{item: {components: {"minecraft:lore": ["a"]}}}')
+    components = patcher.tree['item']['components']
+    patcher.assign(components, 'minecraft:lore', ["b", "c"])
+    with pytest.raises(SnbtSpanError, match="新增键"):
+        patcher.assign(components, 'minecraft:custom_name', "x")
+
+
+@pytest.mark.parametrize("chapter, component_data", [
+    # 需要新增键：components 中没有 custom_name
+    ('{id: "0A", quests: [{id: "0B", tasks: [{id: "0C", item: {id: "minecraft:stone", '
+     'components: {"minecraft:lore": ["old"]}}}]}]}',
+     {'tasks.0C.custom_name': '新名称', 'tasks.0C.lore0': '新描述'}),
+    # 需要新增键：奖励没有 feedback_message
+    ('{id: "0A", quests: [{id: "0B", rewards: [{id: "0D", type: "item"}]}]}',
+     {'reward.0D.feedback_message': '完成'}),
+    # ftb_snbt_lib 会跳过的非法字符，区间解析器无法识别
+    ('{id: "0A", images: [{hover: "old"}] @}',
+     {'chapter.0A.image.0.hover': '新'}),
+])
+def test_fallbacks_match_full_round_trip(tmp_path, monkeypatch, chapter, component_data):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    (input_dir / "chapter.snbt").write_text(chapter, encoding="utf-8")
+    with pytest.raises(SnbtSpanError):
+        patcher = ChapterSpanPatcher(chapter)
+        LangSpliter.apply_embedded_translations(patcher.tree, *_modifications(component_data), patcher.assign, set())
+
+    result = update_chapters(component_data, input_dir, tmp_path / "out")
+    expected = update_chapters(component_data, input_dir, tmp_path / "expected", monkeypatch)
+    assert result == expected
+    # 回退路径的输出即 snbtlib.dumps 的结果
+    assert result["chapter.snbt"] == snbtlib.dumps(snbtlib.loads(result["chapter.snbt"]))
+
+
+def _modifications(component_data):
+    """按 update_chapter_files_with_components 的方式整理修改（仅覆盖上面用到的键）。"""
+    mods_by_id, feedback, hovers = {}, {}, {}
+    for key, value in component_data.items():
+        parts = key.split('.')
+        if parts[-1] == 'custom_name':
+            mods_by_id.setdefault(parts[1], {})['name'] = value
+        elif parts[-1].startswith('lore'):
+            mods_by_id.setdefault(parts[1], {}).setdefault('lore', []).append(value)
+        elif parts[-1].startswith('feedback_message'):
+            feedback.setdefault(parts[1], []).append(value)
+        elif parts[-1].startswith('hover'):
+            hovers.setdefault(parts[1], {}).setdefault(int(parts[3]), []).append(value)
+    return mods_by_id, feedback, hovers, set()
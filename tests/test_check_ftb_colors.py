@@ -0,0 +1,61 @@
+"""
+颜色代码检查（check_ftb_colors.check_json）的测试：没有 '&' 的文件不解析，strict_json 时仍报告 JSON 格式错误。
+"""
+import pytest
+
+from check_ftb_colors import check_json
+
+PARSE_ERROR = "JSON 解析失败，请检查 JSON 格式"
+
+
+def messages(file_path, text=None, strict_json=False) -> list:
+    return [(record.key, record.error_message)
+            for record in check_json(str(file_path), text, strict_json)]
+
+
+MALFORMED = ['{"a": "x",}', '{"a": "x"', '', '{"a": "x"} {"b": "y"}']
+
+
+@pytest.mark.parametrize("text", MALFORMED)
+def test_malformed_json_without_ampersand_is_skipped(tmp_path, text):
+    path = tmp_path / "zh_cn.json"
+    path.write_text(text, encoding="utf-8")
+    assert messages(path) == []
+    assert messages(path, text) == []
+    assert messages(path, text.encode("utf-8")) == []
+
+
+@pytest.mark.parametrize("text", MALFORMED)
+def test_malformed_json_without_ampersand_is_reported_when_strict(tmp_path, text):
+    path = tmp_path / "zh_cn.json"
+    path.write_text(text, encoding="utf-8")
+    assert messages(path, strict_json=True) == [("-", PARSE_ERROR)]
+    assert messages(path, text, strict_json=True) == [("-", PARSE_ERROR)]
+    assert messages(path, text.encode("utf-8"), strict_json=True) == [("-", PARSE_ERROR)]
+
+
+def test_malformed_json_with_ampersand_is_reported(tmp_path):
+    path = tmp_path / "zh_cn.json"
+    path.write_text('{"a": "&a",}', encoding="utf-8")
+    assert messages(path) == [("-", PARSE_ERROR)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "x", "b": ["y"]}', []),
+    ('{"a": "&a颜色 &r"}', []),
+    ('{"a": "&z错误"}', [("a", "'&'后包含非法字符 'z'")]),
+    ('{"a": "\\u0026z"}', [("a", "'&'后包含非法字符 'z'")]),
+    ('{"a": "结尾&"}', [("a", "行尾包含非法字符 '&'")]),
+    ('{"a": {"b": ["ok", "第二行\\n&z"]}}', [("a.b[1][line 2]", "'&'后包含非法字符 'z'")]),
+])
+def test_color_errors(tmp_path, text, expected):
+    path = tmp_path / "zh_cn.json"
+    path.write_text(text, encoding="utf-8")
+    assert messages(path) == expected
+    assert messages(path, text) == expected
+    assert messages(path, text.encode("utf-8")) == expected
+    assert messages(path, strict_json=True) == expected
+
+
+def test_missing_file(tmp_path):
+    assert messages(tmp_path / "missing.json") == [("-", "文件未找到")]
@@ -0,0 +1,168 @@
+"""
+语言文件快速解析器（LangSpliter.iter_flat_lang_snbt / load_lang_snbt）与 ftb_snbt_lib 的差异测试。
+
+快速解析器取代了主流程中的 snbtlib.loads，因此对任意输入，两者要么得到相同的条目（键、值与顺序），
+要么都无法解析；超出扁平形状的内容必须抛出 FlatLangSnbtError，由 load_lang_snbt 回退到 ftb_snbt_lib。
+"""
+import random
+
+import ftb_snbt_lib as snbtlib
+import pytest
+
+from LangSpliter import FlatLangSnbtError, iter_flat_lang_snbt, load_lang_snbt
+from conftest import lang_snbt_inputs
+
+
+def normalize(data) -> list:
+    """[(键, 值)]，值为 str 或 list[str]；其他类型的值以类型名标记，保证与快速解析器的结果可比较。"""
+    def value_of(value):
+        if isinstance(value, str):
+            return str(value)
+        if isinstance(value, list) and all(isinstance(line, str) for line in value):
+            return [str(line) for line in value]
+        return (type(value).__name__, repr(value))
+    return [(str(key), value_of(value)) for key, value in data.items()]
+
+
+def outcome(loader, text):
+    try:
+        return 'ok', normalize(loader(text))
+    except Exception:
+        return 'error', None
+
+
+def assert_same_as_snbtlib(text):
+    expected = outcome(snbtlib.loads, text)
+    assert outcome(load_lang_snbt, text) == expected, text
+
+
+# --- 实际的语言文件 ---
+def test_lang_files_match_snbtlib(quests_dir):
+    for path in lang_snbt_inputs(quests_dir):
+        text = path.read_text(encoding="utf-8")
+        entries = list(iter_flat_lang_snbt(text))
+        assert entries, path
+        assert normalize(dict(entries)) == normalize(snbtlib.loads(text)), path
+
+
+# --- 边界情况 ---
+@pytest.mark.parametrize("text", [
+    '{ }',
+    '{}',
+    '{a: "x"}',
+    '{a: "x", b: "y"}',
+    '{a: "x" b: "y"}',                         # 逗号可以省略
+    '{\n\ta: "x"\n\t# 注释\n\tb: "y"\n}\n',
+    '{a: "x"} # 结尾的注释',
+    '{a.b-c+d_0: "x"}',
+    '{"quoted key": "x", "k:v": "y"}',
+    '{"esc\\"aped": "x"}',
+    '{a: "say \\"hi\\""}',                     # 转义的引号
+    '{a: "C:\\\\path\\\\to"}',                 # 转义的反斜杠
+    '{a: "\\\\\\"mixed\\\\"}',
+    '{a: "line\\nbreak \\u0026 \\q"}',         # 其余反斜杠序列原样保留
+    '{a: "&a颜色 — ünïcödé ✓ 🎉"}',
+    '{a: ""}',
+    '{a: [ ]}',
+    '{a: ["one"]}',
+    '{a: [\n\t\t"line 1"\n\t\t"line 2"\n\t\t""\n\t]}',
+    '{a: ["x", "y", "z"]}',
+    '{a: "first", a: "second", b: "y"}',       # 重复键：保留首次出现的位置，使用最后一次的值
+    '{a: "x",, b: "y"}',                       # 以下为两者都无法解析的输入
+    '{a: "x",}',
+    '{, a: "x"}',
+    '{a: ["x",]}',
+    '{a : "x"}',
+    '{a: "unterminated}',
+    '{a: "x"',
+    '{a: "x"}\n{b: "y"}',
+    '',
+])
+def test_edge_cases_match_snbtlib(text):
+    assert_same_as_snbtlib(text)
+
+
+# --- 必须回退到 ftb_snbt_lib 的形状 ---
+@pytest.mark.parametrize("text", [
+    '{a: 1}',
+    '{a: 1.5d, b: "x"}',
+    '{a: true}',
+    '{a: {b: "x"}}',
+    '{a: [1, 2]}',
+    '{a: ["x", 1b]}',
+    '{a: [I; 1, 2]}',
+    '{true_key: "x"}',                         # ftb_snbt_lib 将以 true/false 开头的名称识别为布尔值
+    '{falsehood: "x"}',
+    '{a: "x"} trailing',
+    '["x"]',
+])
+def test_unsupported_shapes_fall_back(text):
+    with pytest.raises(FlatLangSnbtError):
+        list(iter_flat_lang_snbt(text))
+    assert_same_as_snbtlib(text)
+
+
+# --- 随机生成与变异的输入 ---
+_ALPHABET = ['a', 'Z', '0', ' ', '"', '\\', '\n', '\t', '&', ':', ',', '#', 'é', '中', '🎉', '[', ']', '{', '}']
+_SEPARATORS = ['', ' ', '\n', '\t', '\n\t', ' # 注释\n']
+
+
+def _random_string(rng: random.Random) -> str:
+    chars = ''.join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 12)))
+    # 按 SNBT 的规则转义，偶尔保留无效的反斜杠序列
+    escaped = chars.replace('\\', '\\\\').replace('"', '\\"')
+    if rng.random() < 0.2:
+        escaped += rng.choice(['\\n', '\\u0026', '\\t'])
+    return f'"{escaped}"'
+
+
+def _random_key(rng: random.Random) -> str:
+    if rng.random() < 0.2:
+        return _random_string(rng)
+    return rng.choice(['quest', 'task', 'chapter', 'ftbquests', 'a']) + '.' + ''.join(
+        rng.choice('0123456789ABCDEF._-+') for _ in range(rng.randint(1, 16)))
+
+
+def _random_value(rng: random.Random) -> str:
+    if rng.random() < 0.6:
+        return _random_string(rng)
+    sep = rng.choice(_SEPARATORS)
+    lines = [_random_string(rng) for _ in range(rng.randint(0, 4))]
+    joiner = rng.choice([',' + sep, sep or ' '])
+    return '[' + sep + joiner.join(lines) + sep + ']'
+
+
+def _random_lang_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 8)):
+        parts.append(_random_key(rng) + ':' + rng.choice(['', ' ', '\t']) + _random_value(rng))
+    sep = rng.choice(_SEPARATORS)
+    joiner = rng.choice([',' + sep, sep or ' ', '\n\t'])
+    return '{' + sep + joiner.join(parts) + sep + '}' + rng.choice(['', '\n', ' # 结尾\n'])
+
+
+def _mutate(rng: random.Random, text: str) -> str:
+    for _ in range(rng.randint(1, 3)):
+        pos = rng.randint(0, len(text))
+        action = rng.random()
+        if action < 0.4:
+            text = text[:pos] + text[pos + 1:]
+        elif action < 0.8:
+            text = text[:pos] + rng.choice(_ALPHABET + ['1', 'true', '1b', '{b: "x"}']) + text[pos:]
+        else:
+            text = text[:pos] + text[pos:pos + 5] + text[pos:]
+    return text
+
+
+def test_random_lang_files_match_snbtlib():
+    rng = random.Random(20240601)
+    for _ in range(500):
+        text = _random_lang_text(rng)
+        assert outcome(snbtlib.loads, text)[0] == 'ok', text
+        assert_same_as_snbtlib(text)
+
+
+def test_mutated_lang_files_match_snbtlib():
+    rng = random.Random(20240602)
+    for _ in range(1000):
+        assert_same_as_snbtlib(_mutate(rng, _random_lang_text(rng)))
@@ -0,0 +1,92 @@
+"""
+语言文件流式写出（LangSpliter.write_flat_lang_snbt / format_snbt_text_value）与 snbtlib.dumps 的逐字节一致性测试。
+"""
+import io
+import random
+
+import ftb_snbt_lib as snbtlib
+import pytest
+from ftb_snbt_lib.tag import Compound, List, String
+
+from LangSpliter import format_snbt_text_value, load_lang_snbt, write_flat_lang_snbt
+from conftest import lang_snbt_inputs
+
+
+def to_tag(value):
+    return List([String(line) for line in value]) if isinstance(value, list) else String(value)
+
+
+def written(items) -> str:
+    fp = io.StringIO()
+    count = write_flat_lang_snbt(fp, items)
+    assert count == len(items)
+    return fp.getvalue()
+
+
+def dumped(items) -> str:
+    return snbtlib.dumps(Compound({key: to_tag(value) for key, value in items}))
+
+
+# --- 边界情况 ---
+@pytest.mark.parametrize("items", [
+    [],
+    [("a", "x")],
+    [("a", "")],
+    [("a", [])],
+    [("a", ["only line"])],
+    [("a", ["line 1", "line 2", ""])],
+    [("a", 'say "hi"'), ("b", "C:\\path\\to"), ("c", '\\"mixed\\')],
+    [("a", "line\nbreak"), ("b", "tab\there"), ("c", "\\n \\u0026")],
+    [("a", "&a颜色 — ünïcödé ✓ 🎉"), ("b", ["第一行", "第二行 &r"])],
+    [("quest.0123456789ABCDEF.quest_desc", ["", "&6Title", 'He said "go"', "C:\\dir"])],
+    [("chapter_group.ABC.title", "x"), ("file.0.title", ["a", "b"]), ("z.last", "")],
+])
+def test_edge_cases_match_dumps(items):
+    assert written(items) == dumped(items)
+
+
+def test_lang_files_round_trip_to_dumps(quests_dir):
+    for path in lang_snbt_inputs(quests_dir):
+        items = sorted(load_lang_snbt(path.read_text(encoding="utf-8")).items())
+        items = [(key, list(value) if isinstance(value, list) else str(value)) for key, value in items]
+        assert written(items) == dumped(items), path
+
+
+# --- 嵌套位置的值（章节文件的区间修补使用同一格式） ---
+@pytest.mark.parametrize("value", ["x", 'q"uote\\', [], ["one"], ["a", "b\\c", '"d"'], ["", ""]])
+@pytest.mark.parametrize("depth", [1, 2, 3])
+def test_nested_values_match_dumps(value, depth):
+    tree = Compound({'k': to_tag(value)})
+    for _ in range(depth - 1):
+        tree = Compound({'n': tree})
+    text = snbtlib.dumps(tree)
+    key_line = next(line for line in text.split("\n") if line.lstrip("\t").startswith("k: "))
+    indent = key_line[:len(key_line) - len(key_line.lstrip("\t"))]
+    assert f"{indent}k: {format_snbt_text_value(value, indent)}" in text
+
+
+# --- 随机生成的 Compound ---
+_ALPHABET = ['a', 'Z', '0', ' ', '"', '\\', '\n', '\t', '&', ':', ',', '#', '{', ']', 'é', '中', '🎉']
+
+
+def _random_text(rng: random.Random) -> str:
+    return ''.join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 16)))
+
+
+def _random_items(rng: random.Random) -> list:
+    items = {}
+    for _ in range(rng.randint(0, 12)):
+        key = rng.choice(['quest', 'task', 'reward', 'chapter']) + '.' + ''.join(
+            rng.choice('0123456789ABCDEF') for _ in range(16)) + rng.choice(['.title', '.quest_desc', ''])
+        if rng.random() < 0.5:
+            items[key] = _random_text(rng)
+        else:
+            items[key] = [_random_text(rng) for _ in range(rng.randint(0, 5))]
+    return sorted(items.items())
+
+
+def test_random_compounds_match_dumps():
+    rng = random.Random(20240603)
+    for _ in range(3000):
+        items = _random_items(rng)
+        assert written(items) == dumped(items), items
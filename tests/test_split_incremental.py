@@ -0,0 +1,72 @@
+"""
+内存中增量拆分（LangSpliter.split_and_process_all，persist=False 并提供 manifest_file）的测试：
+输入未变化时不生成任何待上传的缓冲区，只有内容变化的文件会再次生成；
+清单延后保存时，上传失败的文件不记入清单，下次运行时会再次生成。
+"""
+import json
+import shutil
+
+import pytest
+
+from LangSpliter import save_split_manifest, split_and_process_all
+
+
+@pytest.fixture
+def quests_copy(quests_dir, tmp_path):
+    target = tmp_path / "quests"
+    shutil.copytree(quests_dir, target)
+    return target
+
+
+def split_in_memory(quests, manifest_file, pending_manifest=None) -> dict:
+    buffers = []
+    result = split_and_process_all(str(quests / "lang" / "en_us.snbt"), str(quests / "chapters"),
+                                   str(quests / "chapter_groups.snbt"), "split", False,
+                                   incremental=True, buffers=buffers, persist=False,
+                                   manifest_file=str(manifest_file), pending_manifest=pending_manifest)
+    assert result is not None
+    return {buffer.filename: buffer.data for buffer in buffers}
+
+
+def test_unchanged_inputs_yield_no_buffers(quests_copy, tmp_path):
+    manifest_file = tmp_path / "cache" / "split_manifest.json"
+    first = split_in_memory(quests_copy, manifest_file)
+    assert first and manifest_file.is_file()
+    assert not (tmp_path / "split").exists()
+
+    assert split_in_memory(quests_copy, manifest_file) == {}
+
+
+def test_only_changed_outputs_are_regenerated(quests_copy, tmp_path):
+    manifest_file = tmp_path / "split_manifest.json"
+    first = split_in_memory(quests_copy, manifest_file)
+
+    chapter_file = next(name for name in first if name.startswith("en_us_chapter"))
+    key = next(iter(json.loads(first[chapter_file].decode("utf-8"))))
+    lang_file = quests_copy / "lang" / "en_us.snbt"
+    text = lang_file.read_text(encoding="utf-8")
+    assert f"\t{key}: \"" in text
+    lang_file.write_text(text.replace(f"\t{key}: \"", f"\t{key}: \"已修改 ", 1), encoding="utf-8")
+
+    second = split_in_memory(quests_copy, manifest_file)
+    assert list(second) == [chapter_file]
+    assert json.loads(second[chapter_file].decode("utf-8"))[key].startswith("已修改 ")
+
+
+def test_failed_upload_is_retried_on_next_run(quests_copy, tmp_path):
+    manifest_file = tmp_path / "split_manifest.json"
+    pending = {}
+    first = split_in_memory(quests_copy, manifest_file, pending)
+    assert not manifest_file.exists()
+
+    # 模拟一个章节文件与一个分类文件上传失败
+    chapter_file = next(name for name in first if name.startswith("en_us_chapter"))
+    category_file = next(name for name in first if not name.startswith("en_us_chapter"))
+    save_split_manifest(pending, [chapter_file, category_file])
+
+    pending = {}
+    second = split_in_memory(quests_copy, manifest_file, pending)
+    assert second == {name: first[name] for name in (chapter_file, category_file)}
+    save_split_manifest(pending)
+
+    assert split_in_memory(quests_copy, manifest_file) == {}